@@ -1,10 +1,16 @@
 __all__ = [
     "api_client",
     "api_schemas",
+    "archive",
     "cli",
+    "concurrency",
     "database",
     "database_key_utils",
+    "database_writer",
+    "http_cache",
+    "json_stream",
     "logging_config",
     "pipeline",
+    "planner",
     "scrape",
 ]
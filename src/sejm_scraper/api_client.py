@@ -1,13 +1,51 @@
+import contextlib
+import contextvars
+import functools
+import re
+import time
+import weakref
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterator,
+    Mapping,
+)
+from dataclasses import dataclass
+from enum import StrEnum
+
+import anyio
 import httpx
 import stamina
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
-from sejm_scraper import api_schemas
+from sejm_scraper import api_schemas, concurrency, json_stream
 
 _HTTP_TOO_MANY_REQUESTS = 429
 _HTTP_INTERNAL_SERVER_ERROR = 500
 
 
+def _is_overloaded(response: httpx.Response) -> bool:
+    """Return True for responses that signal the API is overloaded."""
+    return (
+        response.status_code == _HTTP_TOO_MANY_REQUESTS
+        or response.status_code >= _HTTP_INTERNAL_SERVER_ERROR
+    )
+
+
+def _is_cache_hit(response: httpx.Response) -> bool:
+    """Return True for responses whose latency says nothing of the API.
+
+    These are responses served from a local cache and ``304 Not
+    Modified`` answers, which carry no body.
+    """
+    return (
+        bool(response.extensions.get(FROM_CACHE))
+        or response.status_code == httpx.codes.NOT_MODIFIED
+    )
+
+
 def _is_retryable_error(exception: Exception) -> bool:
     """Return True for transient failures that are worth retrying.
 
@@ -17,16 +55,28 @@ def _is_retryable_error(exception: Exception) -> bool:
     fix them.
     """
     if isinstance(exception, httpx.HTTPStatusError):
-        status_code = exception.response.status_code
-        return (
-            status_code == _HTTP_TOO_MANY_REQUESTS
-            or status_code >= _HTTP_INTERNAL_SERVER_ERROR
-        )
+        return _is_overloaded(exception.response)
     return isinstance(exception, httpx.TransportError)
 
 
+def _retry_backoff(exception: Exception) -> bool | float:
+    """Decide whether to retry, and how long to wait if the API says.
+
+    A retryable response carrying ``Retry-After`` is retried after the
+    requested delay instead of the exponential backoff; the transport
+    has already paused the shared `request_bucket` for the same time.
+    """
+    if not _is_retryable_error(exception):
+        return False
+    if isinstance(exception, httpx.HTTPStatusError):
+        delay = concurrency.retry_after(exception.response)
+        if delay is not None:
+            return delay
+    return True
+
+
 _retry = stamina.retry(
-    on=_is_retryable_error,
+    on=_retry_backoff,
     attempts=3,
     wait_initial=4,
     wait_max=30,
@@ -34,57 +84,602 @@ _retry = stamina.retry(
 BASE_URL = "https://api.sejm.gov.pl/sejm"
 TIMEOUT = 30
 
+# Response extension set by transports that answer a request without
+# sending it, such as `http_cache.CachingTransport`.
+FROM_CACHE = "sejm_scraper.from_cache"
+
+# Shared by every client built with `create_transport`, so the rate limit
+# and Retry-After pauses apply to all requests the process makes. There
+# is no rate limit unless one is configured.
+request_bucket = concurrency.TokenBucket(rate=None)
+
+
+def configure_rate_limit(*, requests_per_second: float | None) -> None:
+    """Set the request rate of the whole process.
+
+    Args:
+        requests_per_second: Requests per second, or None for no limit.
+            Retry-After pauses are honoured either way.
+    """
+    request_bucket.rate = requests_per_second
+
+
+def create_transport() -> httpx.AsyncBaseTransport:
+    """Create a network transport limited by `request_bucket`."""
+    return concurrency.RateLimitedTransport(request_bucket)
+
+
+class EndpointFamily(StrEnum):
+    """Group of API endpoints that share the same URL shape."""
+
+    TERMS = "terms"
+    PROCEEDINGS = "proceedings"
+    VOTING_TABLE = "voting_table"
+    VOTINGS = "votings"
+    VOTING_DETAIL = "voting_detail"
+    MPS = "mps"
+    CLUBS = "clubs"
+
+
+_ENDPOINT_PATTERN = re.compile(
+    r"/term(?:(?P<term>\d+)/(?P<resource>proceedings|votings|MP|clubs)"
+    r"(?:/(?P<sitting>\d+)(?:/(?P<voting>\d+))?)?)?$"
+)
+
+_RESOURCE_FAMILIES = {
+    "proceedings": EndpointFamily.PROCEEDINGS,
+    "MP": EndpointFamily.MPS,
+    "clubs": EndpointFamily.CLUBS,
+}
+
+
+def classify_url(url: str) -> tuple[EndpointFamily, int | None] | None:
+    """Identify which endpoint family a Sejm API URL belongs to.
+
+    Args:
+        url: Absolute request URL, with or without a query string.
+
+    Returns:
+        The endpoint family and the term number the URL is scoped to
+        (None for the term list), or None if the URL is not one of the
+        endpoints this client calls.
+    """
+    match = _ENDPOINT_PATTERN.search(url.split("?", 1)[0])
+    if match is None:
+        return None
+    if match["term"] is None:
+        return EndpointFamily.TERMS, None
+    term = int(match["term"])
+    resource = match["resource"]
+    if resource != "votings":
+        if match["sitting"] is not None:
+            return None
+        return _RESOURCE_FAMILIES[resource], term
+    if match["voting"] is not None:
+        return EndpointFamily.VOTING_DETAIL, term
+    if match["sitting"] is not None:
+        return EndpointFamily.VOTINGS, term
+    return EndpointFamily.VOTING_TABLE, term
+
+
+class NotModifiedError(Exception):
+    """Raised when a conditional request is answered with 304.
+
+    The resource is unchanged since the validators the request was made
+    with were recorded, so the caller can skip processing it.
+    """
+
+    def __init__(self, url: str) -> None:
+        super().__init__(url)
+        self.url = url
+
+
+@dataclass(frozen=True)
+class Validators:
+    """HTTP cache validators a server returned for a URL."""
+
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class ValidatorStore:
+    """Per-URL validators used to make conditional requests.
+
+    Requests made with a store send ``If-None-Match`` and
+    ``If-Modified-Since`` built from the validators known for the URL,
+    and a ``304 Not Modified`` answer raises `NotModifiedError`.
+    Validators from successful responses are kept apart as *fresh*
+    until the caller has persisted the data they describe and takes
+    them with `pop_fresh`; recording them any earlier would let a crash
+    mark data as unchanged before it was ever stored.
+    """
+
+    def __init__(self, known: Mapping[str, Validators] | None = None) -> None:
+        self._known = dict(known or {})
+        self._fresh: dict[str, Validators] = {}
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        """Return the conditional request headers for a URL."""
+        validators = self._known.get(url)
+        if validators is None:
+            return {}
+        headers = {}
+        if validators.etag is not None:
+            headers["If-None-Match"] = validators.etag
+        if validators.last_modified is not None:
+            headers["If-Modified-Since"] = validators.last_modified
+        return headers
+
+    def record(self, url: str, response: httpx.Response) -> None:
+        """Remember the validators of a successful response as fresh."""
+        validators = Validators(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        if validators != Validators():
+            self._fresh[url] = validators
+
+    def fork(self) -> "ValidatorStore":
+        """Return a store with the same known validators but none fresh.
+
+        Work fetched concurrently but persisted separately can then each
+        take only the fresh validators of its own responses.
+        """
+        return ValidatorStore(self._known)
+
+    def pop_fresh(self) -> dict[str, Validators]:
+        """Take the fresh validators, making them the known ones."""
+        fresh, self._fresh = self._fresh, {}
+        self._known.update(fresh)
+        return fresh
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint family that keeps failing.
+
+    The family's circuit breaker has seen too many overloaded responses
+    in a row; requests to it are refused until it has had time to
+    recover.
+    """
+
+    def __init__(self, family: EndpointFamily) -> None:
+        super().__init__(f"circuit open for {family.value} endpoints")
+        self.family = family
+
+
+class RetryBudgetExhaustedError(Exception):
+    """Raised instead of retrying once too many requests were retries."""
+
+    def __init__(self, url: str) -> None:
+        super().__init__(f"retry budget exhausted, not retrying {url}")
+        self.url = url
+
+
+# How many completed responses each client keeps for repeated requests.
+# Repeats happen close together (e.g. duplicate voting numbers within a
+# sitting), so a short memory is enough and keeps memory use low.
+SINGLE_FLIGHT_MEMO_SIZE = 64
+
+# Consecutive overloaded responses from one endpoint family that open
+# its circuit, and how long it then stays open.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 30.0
+
+# Share of requests that may be retries, on top of a few always allowed.
+RETRY_BUDGET_RATIO = 0.1
+RETRY_BUDGET_MIN_RETRIES = 10
+
+
+@dataclass
+class _ClientState:
+    """Request bookkeeping shared by everything one client sends."""
+
+    single_flight: concurrency.SingleFlight
+    circuit_breakers: dict[EndpointFamily, concurrency.CircuitBreaker]
+    retry_budget: concurrency.RetryBudget
+
+
+# Keyed by client, so the state lasts for one run and never leaks into
+# another one.
+_client_states: weakref.WeakKeyDictionary[httpx.AsyncClient, _ClientState] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client_state(client: httpx.AsyncClient) -> _ClientState:
+    state = _client_states.get(client)
+    if state is None:
+        state = _ClientState(
+            single_flight=concurrency.SingleFlight(
+                memo_size=SINGLE_FLIGHT_MEMO_SIZE
+            ),
+            circuit_breakers={
+                family: concurrency.CircuitBreaker(
+                    family.value,
+                    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                    reset_timeout=CIRCUIT_RESET_TIMEOUT,
+                )
+                for family in EndpointFamily
+            },
+            retry_budget=concurrency.RetryBudget(
+                ratio=RETRY_BUDGET_RATIO,
+                min_retries=RETRY_BUDGET_MIN_RETRIES,
+            ),
+        )
+        _client_states[client] = state
+    return state
+
+
+def forget_responses(client: httpx.AsyncClient) -> None:
+    """Stop reusing responses ``client`` received for later requests.
+
+    For a long-lived client that polls: repeated requests otherwise get
+    the response remembered from the last identical one.
+    """
+    _client_state(client).single_flight.forget()
+
+
+class ByteCounter:
+    """Running total of response body bytes; see `count_bytes`."""
+
+    def __init__(self, parent: "ByteCounter | None" = None) -> None:
+        self.total = 0
+        self._parent = parent
+
+    def add(self, size: int) -> None:
+        self.total += size
+        if self._parent is not None:
+            self._parent.add(size)
+
+
+_byte_counter: contextvars.ContextVar[ByteCounter | None] = (
+    contextvars.ContextVar("byte_counter", default=None)
+)
+
+
+@contextlib.contextmanager
+def count_bytes() -> Iterator[ByteCounter]:
+    """Count the response body bytes received inside the block.
+
+    Counts requests made by the current task and the tasks it starts,
+    and also adds them to any enclosing counter. A response shared by
+    coalesced requests is counted once, for the request that made it.
+    """
+    counter = ByteCounter(_byte_counter.get())
+    token = _byte_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _byte_counter.reset(token)
+
+
+def _count_received(size: int) -> None:
+    counter = _byte_counter.get()
+    if counter is not None:
+        counter.add(size)
+
+
+@contextlib.asynccontextmanager
+async def _attempt(
+    *,
+    client: httpx.AsyncClient,
+    url: str,
+    limiter: concurrency.AdaptiveLimiter | None,
+) -> AsyncIterator[Callable[[httpx.Response], None]]:
+    """Guard one request attempt and report its outcome.
+
+    Refuses the attempt if the circuit of the URL's endpoint family is
+    open, and holds a limiter slot for its duration. Yields a callback
+    to call with the response; a transport error raised inside the
+    block counts as overload. Every attempt is reported, so retries of
+    an overloaded request count against the window too, except cache
+    hits, whose near-zero latency would skew the limiter's window. An overloaded
+    attempt that the retry budget cannot pay a retry for is turned into
+    `RetryBudgetExhaustedError`, which is not retried.
+
+    Raises:
+        CircuitOpenError: If the endpoint family's circuit is open.
+        RetryBudgetExhaustedError: If the attempt failed and no retry
+            is left in the budget.
+    """
+    state = _client_state(client)
+    endpoint = classify_url(url)
+    breaker = None
+    if endpoint is not None:
+        family, _ = endpoint
+        breaker = state.circuit_breakers[family]
+        if not breaker.allow():
+            raise CircuitOpenError(family)
+    state.retry_budget.record_request()
+
+    def record(*, started: float, overloaded: bool) -> None:
+        if limiter is not None:
+            limiter.record(started=started, overloaded=overloaded)
+        if breaker is not None:
+            breaker.record(overloaded=overloaded)
+
+    async with contextlib.AsyncExitStack() as stack:
+        if limiter is not None:
+            await stack.enter_async_context(limiter)
+        started = time.monotonic()
+
+        def report(response: httpx.Response) -> None:
+            if _is_cache_hit(response):
+                return
+            overloaded = _is_overloaded(response)
+            record(started=started, overloaded=overloaded)
+            if overloaded and not state.retry_budget.try_retry():
+                raise RetryBudgetExhaustedError(url)
+
+        try:
+            yield report
+        except httpx.TransportError as error:
+            record(started=started, overloaded=True)
+            if not state.retry_budget.try_retry():
+                raise RetryBudgetExhaustedError(url) from error
+            raise
+
+
+async def _get(
+    *,
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Mapping[str, str] | None = None,
+    limiter: concurrency.AdaptiveLimiter | None = None,
+) -> httpx.Response:
+    """Send a GET request, guarded by `_attempt`."""
+    async with _attempt(client=client, url=url, limiter=limiter) as report:
+        response = await client.get(url, headers=headers, timeout=TIMEOUT)
+        report(response)
+    _count_received(len(response.content))
+    return response
+
+
+async def _hedged_get(
+    *,
+    client: httpx.AsyncClient,
+    url: str,
+    limiter: concurrency.AdaptiveLimiter | None,
+    hedger: concurrency.Hedger,
+) -> httpx.Response:
+    """Send a GET request, and a duplicate if the first one is slow.
+
+    The first successful response to arrive is returned and the other
+    request is cancelled. A failed request (an error response or an
+    exception) does not win: its outcome is only used if the other
+    request fails too, or was never sent.
+    """
+    outcomes, received = anyio.create_memory_object_stream[
+        httpx.Response | Exception
+    ](2)
+
+    async def send() -> None:
+        try:
+            outcome = await _get(client=client, url=url, limiter=limiter)
+        except Exception as error:  # re-raised below
+            outcome = error
+        outcomes.send_nowait(outcome)
+
+    started = time.monotonic()
+    hedge_after = hedger.hedge_delay()
+    failure: httpx.Response | Exception | None = None
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(send)
+        pending = 1
+        while pending:
+            with anyio.move_on_after(hedge_after) as waiting:
+                outcome = await received.receive()
+            if waiting.cancelled_caught:
+                hedge_after = None
+                if hedger.try_hedge():
+                    task_group.start_soon(send)
+                    pending += 1
+                continue
+            pending -= 1
+            if isinstance(outcome, httpx.Response) and not outcome.is_error:
+                if not _is_cache_hit(outcome):
+                    hedger.record(time.monotonic() - started)
+                task_group.cancel_scope.cancel()
+                return outcome
+            if failure is None:
+                failure = outcome
+            # A failed first request is retried as usual, not hedged.
+            hedge_after = None
+    if isinstance(failure, Exception):
+        raise failure
+    return failure  # ty: ignore[invalid-return-type]  # set once all requests failed
+
+
+async def _coalesce[T](
+    *,
+    client: httpx.AsyncClient,
+    key: Hashable,
+    call: Callable[[], Awaitable[T]],
+) -> T:
+    """Share one request and its parsed result among identical requests."""
+    return await _client_state(client).single_flight.run(key, call)
+
 
-@_retry
 async def fetch_votes(
     *,
     client: httpx.AsyncClient,
     term: int,
     sitting: int,
     voting: int,
+    limiter: concurrency.AdaptiveLimiter | None = None,
+    hedger: concurrency.Hedger | None = None,
 ) -> api_schemas.VotingWithMpVotesSchema:
     """Fetch detailed voting results including individual MP votes.
 
+    Concurrent or recent requests for the same voting share a single
+    response.
+
     Args:
         client: HTTP client instance.
         term: Sejm term number.
         sitting: Sitting number within the term.
         voting: Voting number within the sitting.
+        limiter: If set, hold one of its slots while each request runs.
+        hedger: If set, send a second request when the first is slow
+            compared with recent ones, and use whichever answers first.
 
     Returns:
         Voting data with individual MP vote records.
     """
-    response = await client.get(
-        f"{BASE_URL}/term{term}/votings/{sitting}/{voting}",
-        timeout=TIMEOUT,
+    url = f"{BASE_URL}/term{term}/votings/{sitting}/{voting}"
+    return await _coalesce(
+        client=client,
+        key=url,
+        call=functools.partial(
+            _get_votes,
+            client=client,
+            url=url,
+            limiter=limiter,
+            hedger=hedger,
+        ),
     )
+
+
+@_retry
+async def _get_votes(
+    *,
+    client: httpx.AsyncClient,
+    url: str,
+    limiter: concurrency.AdaptiveLimiter | None,
+    hedger: concurrency.Hedger | None,
+) -> api_schemas.VotingWithMpVotesSchema:
+    if hedger is None:
+        response = await _get(client=client, url=url, limiter=limiter)
+    else:
+        response = await _hedged_get(
+            client=client, url=url, limiter=limiter, hedger=hedger
+        )
     response.raise_for_status()
-    return api_schemas.VotingWithMpVotesSchema(**response.json())
+    return api_schemas.VotingWithMpVotesSchema.model_validate_json(
+        response.content
+    )
 
 
 @_retry
+async def stream_votes(
+    *,
+    client: httpx.AsyncClient,
+    term: int,
+    sitting: int,
+    voting: int,
+    limiter: concurrency.AdaptiveLimiter | None = None,
+) -> AsyncIterator[api_schemas.MpVoteSchema | api_schemas.VotingSchema]:
+    """Stream a voting's MP votes, parsing them as the body arrives.
+
+    Unlike `fetch_votes`, the response is never held in memory as a
+    whole: each MP vote is validated and yielded as soon as its part of
+    the body has been received. Once the body is complete, the voting
+    itself (every field but the votes) is yielded last.
+
+    A failed attempt is retried from the start, so the votes received
+    before the failure are yielded again.
+
+    Args:
+        client: HTTP client instance.
+        term: Sejm term number.
+        sitting: Sitting number within the term.
+        voting: Voting number within the sitting.
+        limiter: If set, hold one of its slots while each request runs.
+
+    Yields:
+        Each MP vote, then the voting.
+    """
+    url = f"{BASE_URL}/term{term}/votings/{sitting}/{voting}"
+    parser = json_stream.ArrayStreamParser("votes")
+    async with (
+        _attempt(client=client, url=url, limiter=limiter) as report,
+        client.stream("GET", url, timeout=TIMEOUT) as response,
+    ):
+        report(response)
+        if response.is_error:
+            await response.aread()
+        response.raise_for_status()
+        # The parser only yields JSON values (strings, numbers, lists
+        # and dicts), which are coerced as `fetch_votes` coerces them.
+        async for chunk in response.aiter_bytes():
+            _count_received(len(chunk))
+            for vote in parser.feed(chunk):
+                yield api_schemas.MpVoteSchema.model_validate(vote)
+    yield api_schemas.VotingSchema.model_validate(parser.close())
+
+
+@functools.cache
+def _list_adapter[T: BaseModel](model: type[T]) -> TypeAdapter[list[T]]:
+    """Return a (cached) validator for a JSON array of ``model`` objects.
+
+    Validating the raw response bytes in one call lets pydantic parse
+    the JSON itself, rather than building a throwaway tree of Python
+    dicts with ``response.json()`` and validating it item by item.
+    """
+    return TypeAdapter(list[model])
+
+
 async def _fetch_list[T: BaseModel](
     *,
     client: httpx.AsyncClient,
     path: str,
     model: type[T],
+    validators: ValidatorStore | None = None,
+    limiter: concurrency.AdaptiveLimiter | None = None,
 ) -> list[T]:
-    response = await client.get(
-        f"{BASE_URL}/{path}",
-        timeout=TIMEOUT,
+    url = f"{BASE_URL}/{path}"
+    headers = validators.request_headers(url) if validators else {}
+    # Conditional requests only share a response with requests that
+    # carry the same validators, as the answer depends on them.
+    response, items = await _coalesce(
+        client=client,
+        key=(url, *sorted(headers.items())),
+        call=functools.partial(
+            _get_list,
+            client=client,
+            url=url,
+            headers=headers,
+            model=model,
+            limiter=limiter,
+        ),
     )
+    if response.status_code == httpx.codes.NOT_MODIFIED:
+        raise NotModifiedError(url)
+    if validators is not None:
+        validators.record(url, response)
+    # Callers may filter or extend the list they get; the shared one
+    # must stay intact.
+    return list(items)
+
+
+@_retry
+async def _get_list[T: BaseModel](
+    *,
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Mapping[str, str],
+    model: type[T],
+    limiter: concurrency.AdaptiveLimiter | None,
+) -> tuple[httpx.Response, list[T]]:
+    response = await _get(
+        client=client, url=url, headers=headers, limiter=limiter
+    )
+    if response.status_code == httpx.codes.NOT_MODIFIED:
+        return response, []
     response.raise_for_status()
-    return [model(**item) for item in response.json()]
+    return response, _list_adapter(model).validate_json(response.content)
 
 
 async def fetch_terms(
     *,
     client: httpx.AsyncClient,
+    limiter: concurrency.AdaptiveLimiter | None = None,
 ) -> list[api_schemas.TermSchema]:
     """Fetch all Sejm terms.
 
     Args:
         client: HTTP client instance.
+        limiter: If set, hold one of its slots while each request runs.
 
     Returns:
         List of term schemas.
@@ -93,6 +688,7 @@ async def fetch_terms(
         client=client,
         path="term",
         model=api_schemas.TermSchema,
+        limiter=limiter,
     )
 
 
@@ -100,12 +696,14 @@ async def fetch_sittings(
     *,
     client: httpx.AsyncClient,
     term: int,
+    limiter: concurrency.AdaptiveLimiter | None = None,
 ) -> list[api_schemas.SittingSchema]:
     """Fetch all sittings for a given term.
 
     Args:
         client: HTTP client instance.
         term: Sejm term number.
+        limiter: If set, hold one of its slots while each request runs.
 
     Returns:
         List of sitting schemas.
@@ -114,6 +712,7 @@ async def fetch_sittings(
         client=client,
         path=f"term{term}/proceedings",
         model=api_schemas.SittingSchema,
+        limiter=limiter,
     )
 
 
@@ -122,6 +721,8 @@ async def fetch_votings(
     client: httpx.AsyncClient,
     term: int,
     sitting: int,
+    validators: ValidatorStore | None = None,
+    limiter: concurrency.AdaptiveLimiter | None = None,
 ) -> list[api_schemas.VotingSchema]:
     """Fetch all votings for a given term and sitting.
 
@@ -129,14 +730,23 @@ async def fetch_votings(
         client: HTTP client instance.
         term: Sejm term number.
         sitting: Sitting number within the term.
+        validators: If set, make a conditional request with the
+            validators known for the URL.
+        limiter: If set, hold one of its slots while each request runs.
 
     Returns:
         List of voting schemas.
+
+    Raises:
+        NotModifiedError: If validators were given and the server
+            reports the resource unchanged.
     """
     return await _fetch_list(
         client=client,
         path=f"term{term}/votings/{sitting}",
         model=api_schemas.VotingSchema,
+        validators=validators,
+        limiter=limiter,
     )
 
 
@@ -144,6 +754,7 @@ async def fetch_voting_table(
     *,
     client: httpx.AsyncClient,
     term: int,
+    limiter: concurrency.AdaptiveLimiter | None = None,
 ) -> list[api_schemas.VotingTableEntrySchema]:
     """Fetch the voting table for a term (flat list of sitting-day entries).
 
@@ -153,6 +764,7 @@ async def fetch_voting_table(
     Args:
         client: HTTP client instance.
         term: Sejm term number.
+        limiter: If set, hold one of its slots while each request runs.
 
     Returns:
         List of voting table entry schemas.
@@ -161,6 +773,7 @@ async def fetch_voting_table(
         client=client,
         path=f"term{term}/votings",
         model=api_schemas.VotingTableEntrySchema,
+        limiter=limiter,
     )
 
 
@@ -168,20 +781,31 @@ async def fetch_clubs(
     *,
     client: httpx.AsyncClient,
     term: int,
+    validators: ValidatorStore | None = None,
+    limiter: concurrency.AdaptiveLimiter | None = None,
 ) -> list[api_schemas.ClubSchema]:
     """Fetch all clubs for a given term.
 
     Args:
         client: HTTP client instance.
         term: Sejm term number.
+        validators: If set, make a conditional request with the
+            validators known for the URL.
+        limiter: If set, hold one of its slots while each request runs.
 
     Returns:
         List of club schemas.
+
+    Raises:
+        NotModifiedError: If validators were given and the server
+            reports the resource unchanged.
     """
     return await _fetch_list(
         client=client,
         path=f"term{term}/clubs",
         model=api_schemas.ClubSchema,
+        validators=validators,
+        limiter=limiter,
     )
 
 
@@ -189,18 +813,29 @@ async def fetch_mps(
     *,
     client: httpx.AsyncClient,
     term: int,
+    validators: ValidatorStore | None = None,
+    limiter: concurrency.AdaptiveLimiter | None = None,
 ) -> list[api_schemas.MpSchema]:
     """Fetch all MPs for a given term.
 
     Args:
         client: HTTP client instance.
         term: Sejm term number.
+        validators: If set, make a conditional request with the
+            validators known for the URL.
+        limiter: If set, hold one of its slots while each request runs.
 
     Returns:
         List of MP schemas.
+
+    Raises:
+        NotModifiedError: If validators were given and the server
+            reports the resource unchanged.
     """
     return await _fetch_list(
         client=client,
         path=f"term{term}/MP",
         model=api_schemas.MpSchema,
+        validators=validators,
+        limiter=limiter,
     )
@@ -0,0 +1,189 @@
+"""Append-only archive of raw API responses, and offline replay from it."""
+
+import gzip
+import json
+from collections import OrderedDict
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from sejm_scraper import api_client
+
+# Uncompressed size at which buffered records are written out as one
+# gzip member. Larger members compress better; anything still buffered
+# is lost if the process dies, so the buffer is kept moderate.
+FLUSH_BYTES = 1024**2
+
+# Term segments kept in memory while replaying. The pipeline works
+# through terms in order, so the term list plus the current term is
+# enough.
+_LOADED_SEGMENTS = 2
+
+# Archived bodies are stored decoded, so the headers describing how they
+# were framed on the wire no longer apply when they are replayed.
+_WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def segment_name(url: str) -> str:
+    """Return the archive file a response for ``url`` is stored in.
+
+    Responses are split into one segment per term, so replaying a term
+    only has to read that term's file.
+    """
+    endpoint = api_client.classify_url(url)
+    if endpoint is None:
+        return "other.jsonl.gz"
+    _, term = endpoint
+    if term is None:
+        return "terms.jsonl.gz"
+    return f"term{term}.jsonl.gz"
+
+
+class ResponseArchive:
+    """Writes every response to gzip-framed JSONL segments.
+
+    Each record holds the URL, status, headers, body and the UTC time
+    the response was received. Records are buffered per segment and
+    appended as a separate gzip member, so a segment file is a valid
+    gzip stream at all times and is never rewritten.
+
+    Args:
+        directory: Directory holding the segment files; created if
+            missing.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._buffers: dict[str, list[bytes]] = {}
+        self._buffered_bytes: dict[str, int] = {}
+
+    def __enter__(self) -> "ResponseArchive":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def append(self, response: httpx.Response) -> None:
+        """Add a response whose body has been read to the archive."""
+        url = str(response.request.url)
+        record = json.dumps(
+            {
+                "url": url,
+                "status": response.status_code,
+                "headers": response.headers.multi_items(),
+                "fetched_at": datetime.now(UTC).isoformat(),
+                "body": response.content.decode("utf-8", "surrogateescape"),
+            },
+            ensure_ascii=False,
+        ).encode("utf-8", "surrogateescape")
+        name = segment_name(url)
+        self._buffers.setdefault(name, []).append(record + b"\n")
+        self._buffered_bytes[name] = (
+            self._buffered_bytes.get(name, 0) + len(record) + 1
+        )
+        if self._buffered_bytes[name] >= FLUSH_BYTES:
+            self._flush(name)
+
+    def close(self) -> None:
+        """Write out all buffered records."""
+        for name in list(self._buffers):
+            self._flush(name)
+
+    def _flush(self, name: str) -> None:
+        records = self._buffers.pop(name, [])
+        self._buffered_bytes.pop(name, None)
+        if not records:
+            return
+        with (self.directory / name).open("ab") as segment:
+            segment.write(gzip.compress(b"".join(records)))
+
+
+def read_segment(path: str | Path) -> list[dict[str, Any]]:
+    """Read all records of an archive segment, oldest first."""
+    with gzip.open(path, "rt", encoding="utf-8", errors="surrogateescape") as f:
+        return [json.loads(line) for line in f]
+
+
+class ArchivingTransport(httpx.AsyncBaseTransport):
+    """HTTP transport that appends every response to a `ResponseArchive`."""
+
+    def __init__(
+        self,
+        archive: ResponseArchive,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._archive = archive
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        await response.aread()
+        # The wrapped transport's response carries no request yet.
+        response.request = request
+        self._archive.append(response)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """HTTP transport that answers requests from a `ResponseArchive`.
+
+    Each URL is answered with the most recent successful response
+    archived for it. URLs with none get a 404, which the API client
+    does not retry, so a gap in the archive stops a replay right away
+    instead of silently leaving data out. Nothing is sent over the
+    network.
+
+    Args:
+        directory: Directory holding the segment files.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self._segments: OrderedDict[str, dict[str, dict[str, Any]]] = (
+            OrderedDict()
+        )
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        url = str(request.url)
+        record = self._segment(segment_name(url)).get(url)
+        if record is None:
+            return httpx.Response(
+                httpx.codes.NOT_FOUND,
+                text=f"not in archive: {url}",
+                request=request,
+            )
+        return httpx.Response(
+            record["status"],
+            headers=[
+                (name, value)
+                for name, value in record["headers"]
+                if name.lower() not in _WIRE_HEADERS
+            ],
+            content=record["body"].encode("utf-8", "surrogateescape"),
+            request=request,
+        )
+
+    def _segment(self, name: str) -> dict[str, dict[str, Any]]:
+        if name in self._segments:
+            self._segments.move_to_end(name)
+            return self._segments[name]
+        path = self.directory / name
+        responses = {}
+        if path.exists():
+            for record in read_segment(path):
+                if record["status"] == httpx.codes.OK:
+                    responses[record["url"]] = record
+        self._segments[name] = responses
+        if len(self._segments) > _LOADED_SEGMENTS:
+            self._segments.popitem(last=False)
+        return responses
@@ -1,10 +1,26 @@
 """CLI entrypoint for sejm_scraper."""
 
+import contextlib
+import dataclasses
+import json
+from collections.abc import AsyncIterator
+from datetime import timedelta
+from pathlib import Path
+
 import anyio
+import httpx
 import typer
 from sqlalchemy import Engine
 
-from sejm_scraper import database, logging_config, pipeline
+from sejm_scraper import (
+    api_client,
+    archive,
+    database,
+    http_cache,
+    logging_config,
+    pipeline,
+    planner,
+)
 
 app = typer.Typer(help="Scrape Polish Sejm parliamentary data.")
 
@@ -16,12 +32,134 @@ _LOG_FORMAT_HELP = (
     "'json' for one JSON object per line."
 )
 _DEFAULT_LOG_FORMAT = logging_config.LogFormat.CONSOLE
+_CACHE_PATH_HELP = (
+    "Path to an on-disk HTTP response cache. When set, API responses "
+    "are reused across runs instead of being downloaded again."
+)
+_CACHE_MAX_MB_HELP = "Size budget of the response cache in megabytes."
+_CACHE_TTL_HELP = (
+    "Override how long responses of an endpoint family stay fresh, as "
+    "FAMILY=SECONDS (repeatable). Families: "
+    + ", ".join(family.value for family in api_client.EndpointFamily)
+    + ". Responses of closed terms never expire."
+)
+_CONDITIONAL_HELP = (
+    "Send conditional requests for MP, club and voting lists and skip "
+    "the work below any list the API reports unchanged."
+)
+_STREAM_VOTES_HELP = (
+    "Parse each voting's MP votes as the response arrives instead of "
+    "loading it whole, lowering peak memory use."
+)
+_FLUSH_ROWS_HELP = (
+    "Vote records a sitting may collect in memory before those of its "
+    "finished votings are written to the database."
+)
+_HEDGE_PERCENTILE_HELP = (
+    "Send a second request for a voting's MP votes when the first is "
+    "still running after this percentile of recent request latencies, "
+    "and use whichever answers first. At most 5% of requests are hedged."
+)
+_CONCURRENT_TERMS_HELP = (
+    "Number of terms to scrape at once, sharing the request limits. "
+    "Pass the same value to 'resume' after an interrupted run."
+)
+_SHARD_HELP = (
+    "Scrape only this part of the sittings, as INDEX/COUNT (e.g. 2/4), "
+    "into a database file of its own next to --db-path. Run every part "
+    "from 1/COUNT to COUNT/COUNT, then combine them with 'merge'."
+)
+_BULK_LOAD_HELP = (
+    "Create the tables without foreign key constraints, and check the "
+    "foreign keys and add the constraints once everything is loaded. "
+    "Meant for full rebuilds into a new database file."
+)
+_REQUESTS_PER_SECOND_HELP = (
+    "Cap on the number of requests per second sent to the API, shared by "
+    "all concurrent requests. No cap by default."
+)
+_ARCHIVE_DIR_HELP = (
+    "Directory to append every raw API response to, as compressed JSONL "
+    "segments per term, for rebuilding the database later with 'replay'."
+)
+_DEFAULT_CACHE_MAX_MB = http_cache.DEFAULT_MAX_BYTES // 1024**2
 
 
 def _engine_from_path(db_path: str) -> Engine:
     return database.get_engine(url=f"duckdb:///{db_path}")
 
 
+def _shard_db_path(db_path: str, shard: pipeline.Shard) -> str:
+    path = Path(db_path)
+    return str(
+        path.with_name(
+            f"{path.stem}.shard-{shard.index}-of-{shard.count}{path.suffix}"
+        )
+    )
+
+
+def _parse_shard(value: str | None) -> pipeline.Shard | None:
+    if value is None:
+        return None
+    try:
+        return pipeline.Shard.parse(value)
+    except ValueError as error:
+        raise typer.BadParameter(str(error), param_hint="--shard") from None
+
+
+def _parse_cache_ttls(
+    values: list[str],
+) -> dict[api_client.EndpointFamily, timedelta]:
+    ttls: dict[api_client.EndpointFamily, timedelta] = {}
+    for value in values:
+        family, _, seconds = value.partition("=")
+        try:
+            ttls[api_client.EndpointFamily(family)] = timedelta(
+                seconds=float(seconds)
+            )
+        except ValueError:
+            msg = f"expected FAMILY=SECONDS, got {value!r}"
+            raise typer.BadParameter(msg, param_hint="--cache-ttl") from None
+    return ttls
+
+
+@contextlib.asynccontextmanager
+async def _http_client(
+    *,
+    cache_path: str | None,
+    cache_max_mb: int,
+    cache_ttls: list[str],
+    requests_per_second: float | None,
+    archive_dir: str | None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """Build the HTTP client the pipeline fetches with."""
+    ttls = _parse_cache_ttls(cache_ttls)
+    api_client.configure_rate_limit(
+        requests_per_second=requests_per_second or None
+    )
+    async with contextlib.AsyncExitStack() as stack:
+        # Cached responses are served above the rate limit, so only
+        # requests that reach the network use up tokens.
+        transport = api_client.create_transport()
+        if cache_path is not None:
+            cache = stack.enter_context(
+                http_cache.ResponseCache(
+                    cache_path,
+                    max_bytes=cache_max_mb * 1024**2,
+                    ttls=ttls,
+                )
+            )
+            transport = http_cache.CachingTransport(cache, transport)
+        if archive_dir is not None:
+            response_archive = stack.enter_context(
+                archive.ResponseArchive(archive_dir)
+            )
+            transport = archive.ArchivingTransport(response_archive, transport)
+        yield await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport)
+        )
+
+
 @app.callback()
 def main(
     *,
@@ -59,16 +197,58 @@ def scrape(
         ),
     ),
     db_path: str = typer.Option(DEFAULT_DB_PATH, help=_DB_PATH_HELP),
+    cache_path: str | None = typer.Option(None, help=_CACHE_PATH_HELP),
+    cache_max_mb: int = typer.Option(
+        _DEFAULT_CACHE_MAX_MB, help=_CACHE_MAX_MB_HELP
+    ),
+    cache_ttl: list[str] = typer.Option([], help=_CACHE_TTL_HELP),
+    conditional: bool = typer.Option(False, help=_CONDITIONAL_HELP),
+    stream_votes: bool = typer.Option(False, help=_STREAM_VOTES_HELP),
+    flush_rows: int = typer.Option(
+        pipeline.DEFAULT_FLUSH_ROWS, min=1, help=_FLUSH_ROWS_HELP
+    ),
+    hedge_percentile: float | None = typer.Option(
+        None, min=1, max=99, help=_HEDGE_PERCENTILE_HELP
+    ),
+    concurrent_terms: int = typer.Option(1, min=1, help=_CONCURRENT_TERMS_HELP),
+    shard: str | None = typer.Option(None, help=_SHARD_HELP),
+    bulk_load: bool = typer.Option(False, help=_BULK_LOAD_HELP),
+    requests_per_second: float | None = typer.Option(
+        None,
+        min=0,
+        help=_REQUESTS_PER_SECOND_HELP,
+    ),
+    archive_dir: str | None = typer.Option(None, help=_ARCHIVE_DIR_HELP),
 ) -> None:
     """Run the full scraping pipeline."""
+    part = _parse_shard(shard)
+    if part is not None:
+        db_path = _shard_db_path(db_path, part)
 
     async def _run() -> None:
-        await pipeline.pipeline(
-            engine=_engine_from_path(db_path),
-            from_term=from_term,
-            from_sitting=from_sitting,
-            from_voting=from_voting,
-        )
+        async with _http_client(
+            cache_path=cache_path,
+            cache_max_mb=cache_max_mb,
+            cache_ttls=cache_ttl,
+            requests_per_second=requests_per_second,
+            archive_dir=archive_dir,
+        ) as http_client:
+            await pipeline.pipeline(
+                engine=_engine_from_path(db_path),
+                http_client=http_client,
+                options=pipeline.PipelineOptions(
+                    conditional=conditional,
+                    stream_votes=stream_votes,
+                    flush_rows=flush_rows,
+                    hedge_percentile=hedge_percentile,
+                    concurrent_terms=concurrent_terms,
+                    shard=part,
+                    bulk_load=bulk_load,
+                ),
+                from_term=from_term,
+                from_sitting=from_sitting,
+                from_voting=from_voting,
+            )
 
     anyio.run(_run)
 
@@ -77,10 +257,275 @@ def scrape(
 def resume(
     *,
     db_path: str = typer.Option(DEFAULT_DB_PATH, help=_DB_PATH_HELP),
+    cache_path: str | None = typer.Option(None, help=_CACHE_PATH_HELP),
+    cache_max_mb: int = typer.Option(
+        _DEFAULT_CACHE_MAX_MB, help=_CACHE_MAX_MB_HELP
+    ),
+    cache_ttl: list[str] = typer.Option([], help=_CACHE_TTL_HELP),
+    conditional: bool = typer.Option(False, help=_CONDITIONAL_HELP),
+    stream_votes: bool = typer.Option(False, help=_STREAM_VOTES_HELP),
+    flush_rows: int = typer.Option(
+        pipeline.DEFAULT_FLUSH_ROWS, min=1, help=_FLUSH_ROWS_HELP
+    ),
+    hedge_percentile: float | None = typer.Option(
+        None, min=1, max=99, help=_HEDGE_PERCENTILE_HELP
+    ),
+    concurrent_terms: int = typer.Option(1, min=1, help=_CONCURRENT_TERMS_HELP),
+    shard: str | None = typer.Option(None, help=_SHARD_HELP),
+    bulk_load: bool = typer.Option(False, help=_BULK_LOAD_HELP),
+    requests_per_second: float | None = typer.Option(
+        None,
+        min=0,
+        help=_REQUESTS_PER_SECOND_HELP,
+    ),
+    archive_dir: str | None = typer.Option(None, help=_ARCHIVE_DIR_HELP),
 ) -> None:
     """Resume scraping from the last completed point in the database."""
+    part = _parse_shard(shard)
+    if part is not None:
+        db_path = _shard_db_path(db_path, part)
 
     async def _run() -> None:
-        await pipeline.resume_pipeline(engine=_engine_from_path(db_path))
+        async with _http_client(
+            cache_path=cache_path,
+            cache_max_mb=cache_max_mb,
+            cache_ttls=cache_ttl,
+            requests_per_second=requests_per_second,
+            archive_dir=archive_dir,
+        ) as http_client:
+            await pipeline.resume_pipeline(
+                engine=_engine_from_path(db_path),
+                http_client=http_client,
+                options=pipeline.PipelineOptions(
+                    conditional=conditional,
+                    stream_votes=stream_votes,
+                    flush_rows=flush_rows,
+                    hedge_percentile=hedge_percentile,
+                    concurrent_terms=concurrent_terms,
+                    shard=part,
+                    bulk_load=bulk_load,
+                ),
+            )
 
     anyio.run(_run)
+
+
+@app.command()
+def gap_fill(
+    *,
+    term: list[int] = typer.Option(
+        [],
+        help=(
+            "Number of a stored term to check (repeatable). Defaults to "
+            "the most recent stored term."
+        ),
+    ),
+    db_path: str = typer.Option(DEFAULT_DB_PATH, help=_DB_PATH_HELP),
+    cache_path: str | None = typer.Option(None, help=_CACHE_PATH_HELP),
+    cache_max_mb: int = typer.Option(
+        _DEFAULT_CACHE_MAX_MB, help=_CACHE_MAX_MB_HELP
+    ),
+    cache_ttl: list[str] = typer.Option([], help=_CACHE_TTL_HELP),
+    stream_votes: bool = typer.Option(False, help=_STREAM_VOTES_HELP),
+    flush_rows: int = typer.Option(
+        pipeline.DEFAULT_FLUSH_ROWS, min=1, help=_FLUSH_ROWS_HELP
+    ),
+    hedge_percentile: float | None = typer.Option(
+        None, min=1, max=99, help=_HEDGE_PERCENTILE_HELP
+    ),
+    requests_per_second: float | None = typer.Option(
+        None,
+        min=0,
+        help=_REQUESTS_PER_SECOND_HELP,
+    ),
+    archive_dir: str | None = typer.Option(None, help=_ARCHIVE_DIR_HELP),
+) -> None:
+    """Scrape only the votings and votes missing from the database."""
+
+    async def _run() -> None:
+        async with _http_client(
+            cache_path=cache_path,
+            cache_max_mb=cache_max_mb,
+            cache_ttls=cache_ttl,
+            requests_per_second=requests_per_second,
+            archive_dir=archive_dir,
+        ) as http_client:
+            await pipeline.gap_fill_pipeline(
+                engine=_engine_from_path(db_path),
+                http_client=http_client,
+                options=pipeline.PipelineOptions(
+                    stream_votes=stream_votes,
+                    flush_rows=flush_rows,
+                    hedge_percentile=hedge_percentile,
+                ),
+                terms=term or None,
+            )
+
+    anyio.run(_run)
+
+
+@app.command()
+def watch(
+    *,
+    interval: float = typer.Option(
+        pipeline.WATCH_INTERVAL,
+        min=1,
+        help=(
+            "Seconds between polls of the current term's voting table, "
+            "varied slightly at random and longer after failed polls."
+        ),
+    ),
+    db_path: str = typer.Option(DEFAULT_DB_PATH, help=_DB_PATH_HELP),
+    stream_votes: bool = typer.Option(False, help=_STREAM_VOTES_HELP),
+    flush_rows: int = typer.Option(
+        pipeline.DEFAULT_FLUSH_ROWS, min=1, help=_FLUSH_ROWS_HELP
+    ),
+    hedge_percentile: float | None = typer.Option(
+        None, min=1, max=99, help=_HEDGE_PERCENTILE_HELP
+    ),
+    requests_per_second: float | None = typer.Option(
+        None,
+        min=0,
+        help=_REQUESTS_PER_SECOND_HELP,
+    ),
+    archive_dir: str | None = typer.Option(None, help=_ARCHIVE_DIR_HELP),
+) -> None:
+    """Keep polling the current term and store new votings as they appear."""
+
+    async def _run() -> None:
+        # No response cache: it would answer the polls.
+        async with _http_client(
+            cache_path=None,
+            cache_max_mb=_DEFAULT_CACHE_MAX_MB,
+            cache_ttls=[],
+            requests_per_second=requests_per_second,
+            archive_dir=archive_dir,
+        ) as http_client:
+            await pipeline.watch_pipeline(
+                engine=_engine_from_path(db_path),
+                http_client=http_client,
+                options=pipeline.PipelineOptions(
+                    stream_votes=stream_votes,
+                    flush_rows=flush_rows,
+                    hedge_percentile=hedge_percentile,
+                ),
+                interval=interval,
+            )
+
+    anyio.run(_run)
+
+
+@app.command()
+def plan(
+    *,
+    from_term: int | None = typer.Option(
+        None, help="Start from this term number."
+    ),
+    db_path: str = typer.Option(DEFAULT_DB_PATH, help=_DB_PATH_HELP),
+    requests_per_second: float | None = typer.Option(
+        None,
+        help=(
+            "Request rate to estimate the time with. Defaults to the rate "
+            "measured from earlier runs in the database, or "
+            f"{planner.DEFAULT_REQUESTS_PER_SECOND:g} per second."
+        ),
+    ),
+    output: str = typer.Option(
+        "-", help="File to write the JSON plan to; '-' for standard output."
+    ),
+) -> None:
+    """Count the requests a scrape has left, and estimate its time."""
+    if requests_per_second is not None and requests_per_second <= 0:
+        msg = "must be positive"
+        raise typer.BadParameter(msg, param_hint="--requests-per-second")
+
+    async def _run() -> planner.Plan:
+        async with _http_client(
+            cache_path=None,
+            cache_max_mb=_DEFAULT_CACHE_MAX_MB,
+            cache_ttls=[],
+            requests_per_second=None,
+            archive_dir=None,
+        ) as http_client:
+            return await planner.plan_scrape(
+                engine=_engine_from_path(db_path),
+                http_client=http_client,
+                from_term=from_term,
+                requests_per_second=requests_per_second,
+            )
+
+    text = json.dumps(dataclasses.asdict(anyio.run(_run)), indent=2)
+    if output == "-":
+        typer.echo(text)
+    else:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+
+
+@app.command()
+def replay(
+    *,
+    archive_dir: str = typer.Option(
+        ..., help="Directory of an archive written with --archive-dir."
+    ),
+    from_term: int | None = typer.Option(
+        None, help="Start from this term number."
+    ),
+    db_path: str = typer.Option(DEFAULT_DB_PATH, help=_DB_PATH_HELP),
+) -> None:
+    """Rebuild the database from an archive, without any network access."""
+
+    async def _run() -> None:
+        async with httpx.AsyncClient(
+            transport=archive.ReplayTransport(archive_dir)
+        ) as http_client:
+            await pipeline.pipeline(
+                engine=_engine_from_path(db_path),
+                http_client=http_client,
+                from_term=from_term,
+            )
+
+    anyio.run(_run)
+
+
+@app.command()
+def merge(
+    *,
+    shard_path: list[str] = typer.Option(
+        [],
+        help=(
+            "Database file to merge (repeatable). Defaults to every shard "
+            "file written next to --db-path with --shard."
+        ),
+    ),
+    db_path: str = typer.Option(DEFAULT_DB_PATH, help=_DB_PATH_HELP),
+) -> None:
+    """Merge the databases of sharded runs into the main database."""
+    if not shard_path:
+        main_path = Path(db_path)
+        shard_path = sorted(
+            str(path)
+            for path in main_path.parent.glob(
+                f"{main_path.stem}.shard-*{main_path.suffix}"
+            )
+        )
+    if not shard_path:
+        msg = f"no shard files found next to {db_path}"
+        raise typer.BadParameter(msg, param_hint="--shard-path")
+    engine = _engine_from_path(db_path)
+    for path in shard_path:
+        database.merge_database(engine=engine, path=path)
+
+
+@app.command()
+def compact(
+    *,
+    output: str = typer.Option(
+        ..., help="Path of the compact DuckDB file to write."
+    ),
+    db_path: str = typer.Option(DEFAULT_DB_PATH, help=_DB_PATH_HELP),
+) -> None:
+    """Write a copy of the data with compact integer keys, for querying."""
+    if Path(output).exists():
+        msg = f"{output} already exists"
+        raise typer.BadParameter(msg, param_hint="--output")
+    database.compact_database(engine=_engine_from_path(db_path), path=output)
@@ -0,0 +1,515 @@
+"""Concurrency and rate control for requests to the Sejm API."""
+
+import math
+import statistics
+import time
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from types import TracebackType
+
+import anyio
+import httpx
+import structlog
+
+logger = structlog.get_logger()
+
+# Longest server-requested pause that is honoured; anything beyond this
+# is more likely a misconfigured header than a real instruction.
+MAX_RETRY_AFTER = 120.0
+
+_HTTP_TOO_MANY_REQUESTS = 429
+_HTTP_SERVICE_UNAVAILABLE = 503
+
+
+class AdaptiveLimiter:
+    """Concurrency limiter whose window follows the API's health (AIMD).
+
+    Works like an `anyio.CapacityLimiter`, but the number of slots (the
+    *window*) changes with the outcomes callers report through
+    `record`. Each time a full window of requests has completed, the
+    95th percentile of their latencies is compared with the best one
+    seen so far; if it is within ``latency_tolerance`` of it and none
+    of those requests failed, the window grows by one slot. An
+    overloaded response (429, 5xx or a timeout) instead shrinks the
+    window by ``decrease_factor`` straight away. Requests that were
+    already running when the window shrank do not shrink it again, so a
+    burst of failures from one window is answered by a single cut.
+
+    Args:
+        initial_limit: Window to start with.
+        min_limit: The window never shrinks below this.
+        max_limit: The window never grows above this.
+        decrease_factor: Multiplier applied to the window on overload.
+        latency_tolerance: How many times the best observed p95 latency
+            a window's p95 may reach and still count as healthy.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        if not min_limit <= initial_limit <= max_limit:
+            msg = "initial_limit must be between min_limit and max_limit"
+            raise ValueError(msg)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self._limiter = anyio.CapacityLimiter(initial_limit)
+        self._latencies: list[float] = []
+        self._failures = 0
+        self._best_p95: float | None = None
+        self._decreased_at = -math.inf
+
+    @property
+    def limit(self) -> int:
+        """The current window: how many requests may run at once."""
+        return int(self._limiter.total_tokens)
+
+    async def __aenter__(self) -> None:
+        await self._limiter.acquire()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._limiter.release()
+
+    def record(self, *, started: float, overloaded: bool) -> None:
+        """Report the outcome of a request made while holding a slot.
+
+        Args:
+            started: `time.monotonic` value taken when the request was
+                sent.
+            overloaded: Whether the API answered in a way that signals
+                overload (429, 5xx or a timeout).
+        """
+        if overloaded:
+            self._failures += 1
+            if started > self._decreased_at:
+                self._decrease()
+            return
+        self._latencies.append(time.monotonic() - started)
+        if len(self._latencies) + self._failures < self.limit:
+            return
+        p95 = _p95(self._latencies)
+        healthy = self._failures == 0 and (
+            self._best_p95 is None
+            or p95 <= self._best_p95 * self.latency_tolerance
+        )
+        if self._best_p95 is None or p95 < self._best_p95:
+            self._best_p95 = p95
+        self._latencies.clear()
+        self._failures = 0
+        if healthy and self.limit < self.max_limit:
+            self._set_limit(self.limit + 1, p95=p95)
+
+    def _decrease(self) -> None:
+        self._decreased_at = time.monotonic()
+        self._latencies.clear()
+        self._failures = 0
+        limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        if limit != self.limit:
+            self._set_limit(limit, p95=None)
+
+    def _set_limit(self, limit: int, *, p95: float | None) -> None:
+        logger.info(
+            "concurrency window changed",
+            previous=self.limit,
+            limit=limit,
+            p95_seconds=None if p95 is None else round(p95, 3),
+        )
+        self._limiter.total_tokens = limit
+
+
+def _p95(samples: list[float]) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=20, method="inclusive")[-1]
+
+
+class TokenBucket:
+    """Rate limiter shared by every request that should count against it.
+
+    Hands out ``rate`` tokens per second, at most ``burst`` of them at
+    once, so the total request rate stays steady however many tasks are
+    waiting. `pause` stops handing out tokens altogether for a while,
+    for every waiter at once; that is how a server's ``Retry-After``
+    applies to all requests rather than just the one it answered.
+
+    The bucket only sleeps and reads the monotonic clock, so it is not
+    bound to an event loop and can live for the whole process.
+
+    Args:
+        rate: Tokens per second, or None for no rate limit (pauses are
+            still honoured).
+        burst: How many tokens may be taken back to back after the
+            bucket has been idle.
+    """
+
+    def __init__(self, *, rate: float | None, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        # Theoretical arrival time of the next token (GCRA): the bucket
+        # is full once the clock has passed it.
+        self._next_token_at = -math.inf
+        self._paused_until = -math.inf
+
+    async def acquire(self) -> None:
+        """Wait for a token and take it."""
+        while True:
+            now = time.monotonic()
+            ready_at = self._paused_until
+            if self.rate is not None:
+                burst_span = (self.burst - 1) / self.rate
+                ready_at = max(ready_at, self._next_token_at - burst_span)
+            if ready_at <= now:
+                if self.rate is not None:
+                    self._next_token_at = (
+                        max(self._next_token_at, now) + 1 / self.rate
+                    )
+                return
+            # Other waiters may wake at the same time or the bucket may
+            # be paused meanwhile, so the check is repeated after sleeping.
+            await anyio.sleep(ready_at - now)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` from now."""
+        paused_until = time.monotonic() + seconds
+        if paused_until > self._paused_until:
+            self._paused_until = paused_until
+            logger.info("request rate paused", seconds=round(seconds, 3))
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """HTTP transport that takes a `TokenBucket` token per request.
+
+    A 429 or 503 response carrying ``Retry-After`` pauses the bucket for
+    the requested time.
+    """
+
+    def __init__(
+        self,
+        bucket: TokenBucket,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._bucket = bucket
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        await self._bucket.acquire()
+        response = await self._transport.handle_async_request(request)
+        if response.status_code in {
+            _HTTP_TOO_MANY_REQUESTS,
+            _HTTP_SERVICE_UNAVAILABLE,
+        }:
+            delay = retry_after(response)
+            if delay is not None:
+                self._bucket.pause(delay)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Return how long a response asks the client to wait, in seconds.
+
+    Args:
+        response: The response to read ``Retry-After`` from.
+
+    Returns:
+        The delay, capped at `MAX_RETRY_AFTER`, or None if the header is
+        missing or malformed.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=UTC)
+        delay = (retry_at - datetime.now(UTC)).total_seconds()
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+@dataclass
+class _Flight:
+    done: anyio.Event = field(default_factory=anyio.Event)
+    result: object = None
+    error: Exception | None = None
+    completed: bool = False
+
+
+class SingleFlight:
+    """Coalesces concurrent and repeated calls that share a key.
+
+    While a call for a key is running, later calls for the same key wait
+    for it and share its result, or its exception, instead of running
+    again. The results of the last ``memo_size`` completed calls are
+    also kept and returned to later callers directly. Failed calls are
+    not remembered. If the call everyone is waiting on is cancelled, one
+    of the waiters runs it again.
+
+    Args:
+        memo_size: How many completed results to keep.
+    """
+
+    def __init__(self, *, memo_size: int) -> None:
+        self.memo_size = memo_size
+        self._flights: dict[Hashable, _Flight] = {}
+        self._memo: OrderedDict[Hashable, object] = OrderedDict()
+
+    async def run[T](
+        self, key: Hashable, call: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Return the result of ``call``, shared with other callers of ``key``.
+
+        Args:
+            key: Identifies calls that are interchangeable.
+            call: Produces the result when no shared one is available.
+
+        Returns:
+            The (possibly shared) result.
+        """
+        while True:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]  # ty: ignore[invalid-return-type]  # stored by a call for the same key
+            flight = self._flights.get(key)
+            if flight is None:
+                break
+            await flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.completed:
+                return flight.result  # ty: ignore[invalid-return-type]  # stored by a call for the same key
+
+        flight = _Flight()
+        self._flights[key] = flight
+        try:
+            result = await call()
+            flight.result = result
+            flight.completed = True
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            del self._flights[key]
+            flight.done.set()
+        self._memo[key] = result
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return result
+
+    def forget(self) -> None:
+        """Drop the remembered results, so later calls run afresh."""
+        self._memo.clear()
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint that keeps failing.
+
+    After ``failure_threshold`` overloaded responses in a row the
+    circuit *opens* and `allow` refuses requests, so callers fail fast
+    instead of queueing up behind retries of a broken endpoint. Once
+    ``reset_timeout`` seconds have passed, requests are let through
+    again; the first success closes the circuit, a failure opens it for
+    another ``reset_timeout``.
+
+    Args:
+        name: Identifies the circuit in logs.
+        failure_threshold: Consecutive failures that open the circuit.
+        reset_timeout: Seconds the circuit stays open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently refused."""
+        return (
+            self._opened_at is not None
+            and time.monotonic() - self._opened_at < self.reset_timeout
+        )
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        return not self.is_open
+
+    def record(self, *, overloaded: bool) -> None:
+        """Report the outcome of a request the circuit allowed."""
+        if not overloaded:
+            self._failures = 0
+            if self._opened_at is not None:
+                self._opened_at = None
+                logger.info("circuit closed", circuit=self.name)
+            return
+        self._failures += 1
+        # While half-open (reset_timeout elapsed), a single failure is
+        # enough to open the circuit again.
+        if self._opened_at is not None or (
+            self._failures >= self.failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+            logger.warning(
+                "circuit opened",
+                circuit=self.name,
+                failures=self._failures,
+                reset_timeout=self.reset_timeout,
+            )
+
+
+class RetryBudget:
+    """Caps retries at a fraction of recent requests.
+
+    Within a sliding ``window``, retries may make up at most ``ratio``
+    of the requests sent, plus ``min_retries`` so that a quiet period
+    still allows a few. When the API degrades, retries stop once the
+    budget is spent instead of multiplying the load.
+
+    Args:
+        ratio: Retries allowed per request sent.
+        min_retries: Retries always allowed within the window.
+        window: Length of the sliding window in seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        ratio: float = 0.1,
+        min_retries: int = 10,
+        window: float = 60.0,
+    ) -> None:
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: deque[float] = deque()
+        self._retries: deque[float] = deque()
+
+    def record_request(self) -> None:
+        """Count a request (first attempt or retry) as sent."""
+        self._requests.append(time.monotonic())
+
+    def try_retry(self) -> bool:
+        """Spend one retry from the budget, if any is left.
+
+        Returns:
+            Whether the retry may be made.
+        """
+        cutoff = time.monotonic() - self.window
+        for timestamps in (self._requests, self._retries):
+            while timestamps and timestamps[0] < cutoff:
+                timestamps.popleft()
+        if len(self._retries) >= self.min_retries + self.ratio * len(
+            self._requests
+        ):
+            return False
+        self._retries.append(time.monotonic())
+        return True
+
+
+class Hedger:
+    """Decides when a slow request is worth sending a second time.
+
+    Tracks the latencies of the last ``window`` requests. Once it has
+    ``min_samples`` of them, a request still running after the
+    ``percentile``-th percentile of those latencies may be duplicated
+    (*hedged*), and whichever copy answers first is used. At most
+    ``max_hedge_ratio`` of all requests are hedged, so a generally slow
+    API does not end up receiving twice the load.
+
+    Args:
+        percentile: Percentile (0-100) of recent latencies after which
+            a request is hedged.
+        max_hedge_ratio: Largest share of requests that may be hedged.
+        window: How many recent latencies to keep.
+        min_samples: Latencies needed before any request is hedged.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 95,
+        max_hedge_ratio: float = 0.05,
+        window: int = 200,
+        min_samples: int = 20,
+    ) -> None:
+        if not 0 < percentile < 100:  # noqa: PLR2004
+            msg = "percentile must be between 0 and 100"
+            raise ValueError(msg)
+        self.percentile = percentile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._requests = 0
+        self._hedges = 0
+
+    def hedge_delay(self) -> float | None:
+        """Count a new request and return when it should be hedged.
+
+        Returns:
+            Seconds after which to hedge the request, or None if there
+            are not enough latencies to tell yet.
+        """
+        self._requests += 1
+        if len(self._latencies) < self.min_samples:
+            return None
+        # Interpolated between the two nearest latencies, as
+        # `statistics.quantiles(method="inclusive")` does for whole
+        # percentiles, so that fractional ones are not rounded.
+        latencies = sorted(self._latencies)
+        position = (len(latencies) - 1) * self.percentile / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, len(latencies) - 1)
+        return latencies[lower] + (latencies[upper] - latencies[lower]) * (
+            position - lower
+        )
+
+    def try_hedge(self) -> bool:
+        """Take a hedge from the allowance, if any is left.
+
+        Returns:
+            Whether the hedge may be sent.
+        """
+        if self._hedges + 1 > self.max_hedge_ratio * self._requests:
+            return False
+        self._hedges += 1
+        logger.info(
+            "hedging slow request",
+            hedges=self._hedges,
+            requests=self._requests,
+        )
+        return True
+
+    def record(self, latency: float) -> None:
+        """Record how long a (possibly hedged) request took to answer."""
+        self._latencies.append(latency)
@@ -1,12 +1,27 @@
-import json
-import os
-import tempfile
 from collections.abc import Sequence
 from datetime import UTC, date, datetime
+from enum import StrEnum
+from pathlib import Path
 from typing import Any, Union
 
+import pyarrow as pa
 import sqlmodel
-from sqlalchemy import Boolean, Column, Date, DateTime, Engine, Integer
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Connection,
+    Date,
+    DateTime,
+    Engine,
+    Enum,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+)
+from sqlalchemy.schema import CreateTable
 from sqlmodel import Field, SQLModel, create_engine
 
 from sejm_scraper.api_schemas import Vote
@@ -16,6 +31,57 @@ DEFAULT_DUCKDB_URL = "duckdb:///sejm_scraper.duckdb"
 # Name of the audit column stamped with the UTC time of each write.
 LOADED_AT_COLUMN = "loaded_at"
 
+# Name of the column holding a hash of the rest of a row's content.
+FINGERPRINT_COLUMN = "fingerprint"
+
+# Offending keys listed per foreign key when an integrity check fails.
+MAX_REPORTED_KEYS = 10
+
+# Prefix of the tables `add_foreign_keys` copies rows out of.
+_UNCONSTRAINED_PREFIX = "_unconstrained_"
+
+# Leading hex digits of a natural key kept in its compact form. Sixty
+# bits keep compact keys non-negative BIGINTs, and make a collision
+# among the tens of millions of vote records unlikely.
+COMPACT_KEY_DIGITS = 15
+
+# Suffixes of the tables mapping a compact table's keys to natural keys,
+# and of the views showing its rows with natural keys.
+KEY_TABLE_SUFFIX = "_key"
+HEX_VIEW_SUFFIX = "_hex"
+
+
+class KeyCollisionError(Exception):
+    """Raised when distinct natural keys share the same compact key.
+
+    Attributes:
+        table: Table whose keys collide.
+        keys: Up to `MAX_REPORTED_KEYS` colliding compact keys, in hex.
+    """
+
+    def __init__(self, table: str, keys: list[str]) -> None:
+        super().__init__(f"compact keys of {table} collide: {', '.join(keys)}")
+        self.table = table
+        self.keys = keys
+
+
+class ForeignKeyViolationError(Exception):
+    """Raised when rows refer to keys missing from the table they point at.
+
+    Attributes:
+        violations: Up to `MAX_REPORTED_KEYS` offending keys for each
+            violated foreign key, written as ``table.column ->
+            parent.column``.
+    """
+
+    def __init__(self, violations: dict[str, list[str]]) -> None:
+        details = "; ".join(
+            f"{foreign_key}: {', '.join(keys)}"
+            for foreign_key, keys in violations.items()
+        )
+        super().__init__(f"foreign keys violated: {details}")
+        self.violations = violations
+
 
 def get_engine(*, url: str = DEFAULT_DUCKDB_URL, echo: bool = False) -> Engine:
     """Create a SQLAlchemy engine for the database.
@@ -31,12 +97,18 @@ def get_engine(*, url: str = DEFAULT_DUCKDB_URL, echo: bool = False) -> Engine:
 
 
 class LoadedAtMixin(SQLModel):
-    """Adds a ``loaded_at`` audit column to a table.
-
-    The value is a timezone-aware UTC (Zulu) timestamp recording when the
-    row was last written. `bulk_upsert` overrides it on every insert and
-    merge, so the column is never null; the ``default_factory`` only
-    matters for rows constructed and persisted by other means.
+    """Adds ``loaded_at`` and ``fingerprint`` audit columns to a table.
+
+    ``loaded_at`` is a timezone-aware UTC (Zulu) timestamp recording when
+    the row's content last changed. `bulk_upsert` overrides it on every
+    insert and on every merge that changes the row, so the column is
+    never null; the ``default_factory`` only matters for rows
+    constructed and persisted by other means.
+
+    ``fingerprint`` is a hash of every other column, computed by
+    `bulk_upsert`, which leaves a stored row alone when it is written
+    again with the same fingerprint. It is null for rows persisted by
+    other means, and for rows stored before the column was added.
     """
 
     loaded_at: datetime = Field(
@@ -44,6 +116,7 @@ class LoadedAtMixin(SQLModel):
         sa_type=DateTime(timezone=True),  # ty: ignore[invalid-argument-type]  # SQLAlchemy type instance accepted at runtime
         nullable=False,
     )
+    fingerprint: Union[str, None] = None
 
 
 class Term(LoadedAtMixin, table=True):
@@ -147,108 +220,660 @@ class MpToTermLink(LoadedAtMixin, table=True):
     inactivity_description: Union[str, None]
 
 
+class UnitKind(StrEnum):
+    TERM = "TERM"
+    SITTING = "SITTING"
+    VOTING = "VOTING"
+
+
+class UnitStatus(StrEnum):
+    STARTED = "STARTED"
+    DONE = "DONE"
+
+
+class ScrapeProgress(LoadedAtMixin, table=True):
+    """Progress of one unit of scraping work: a term, sitting or voting.
+
+    A unit is keyed by the natural key of what it scrapes, and its row
+    is written in the same transaction as the unit's data, so a DONE
+    unit is fully stored. Terms and sittings are recorded as STARTED
+    when their first data is written; votings are only recorded once
+    done.
+
+    Attributes:
+        parent_id: Key of the enclosing unit (the term of a sitting, the
+            sitting of a voting); None for terms.
+        attempts: How many runs have started the unit.
+        duration_seconds: Time spent fetching the unit, in the latest
+            attempt to finish it.
+        response_bytes: Response bytes received for the unit, in the
+            latest attempt to finish it.
+        listed_votings: For a sitting filled in by
+            `pipeline.gap_fill_pipeline`, how many votings the term's
+            voting table listed for it then; None otherwise. A sitting
+            with fewer votings stored is not filled in again until the
+            table lists a different number.
+    """
+
+    id: str = Field(primary_key=True)
+    kind: UnitKind
+    parent_id: Union[str, None]
+    status: UnitStatus
+    attempts: int
+    duration_seconds: float
+    response_bytes: int
+    listed_votings: Union[int, None] = None
+
+
+class HttpValidator(LoadedAtMixin, table=True):
+    """Validators of the last API response stored for a URL.
+
+    Written in the same transaction as the data the response produced,
+    so a row here means that data is in the database.
+    """
+
+    url: str = Field(primary_key=True)
+    etag: Union[str, None]
+    last_modified: Union[str, None]
+
+
+def done_units(session: sqlmodel.Session) -> frozenset[str]:
+    """Return the keys of the units the progress ledger records as done.
+
+    A sitting marked done before its last day was over is left out, as
+    it may have gained votings since: it is done for good once it is
+    scraped again after that day.
+    """
+    ongoing = (
+        sqlmodel.select(SittingDay.id)
+        .where(
+            SittingDay.sitting_id == ScrapeProgress.id,
+            SittingDay.date >= sqlmodel.cast(ScrapeProgress.loaded_at, Date),
+        )
+        .exists()
+    )
+    return frozenset(
+        session.exec(
+            sqlmodel.select(ScrapeProgress.id).where(
+                ScrapeProgress.status == UnitStatus.DONE,
+                sqlmodel.or_(
+                    ScrapeProgress.kind != UnitKind.SITTING,
+                    sqlmodel.not_(ongoing),
+                ),
+            )
+        )
+    )
+
+
 def bulk_upsert(
     *,
     session: sqlmodel.Session,
     model: type[SQLModel],
     records: Sequence[SQLModel],
+    insert_only: bool = False,
 ) -> None:
-    """Bulk upsert records using DuckDB's vectorized INSERT OR REPLACE.
+    """Bulk upsert records using a single vectorized DuckDB statement.
 
     SQLAlchemy's ORM `session.merge()` / `session.add()` issues one
     INSERT per row, and DuckDB's `executemany` likewise executes the
     prepared statement row by row — both are extremely slow for the
     thousands of vote records per sitting. This function bypasses those
-    paths by serialising records to a JSON temp file and loading them
-    in a single `INSERT OR REPLACE ... SELECT FROM read_json(...)`
-    statement, letting DuckDB handle the bulk load with its vectorized
-    execution engine. Column types are passed to `read_json` explicitly
-    (derived from the table schema), so no type inference is involved.
+    paths by transposing records into an in-memory Arrow table, one
+    typed array per column, and registering it with DuckDB as a view.
+    A single `INSERT ... SELECT` then scans the Arrow buffers directly,
+    letting DuckDB handle the bulk load with its vectorized execution
+    engine without any serialisation round trip. Column types are set
+    explicitly (derived from the table schema), so no type inference
+    is involved.
+
+    Existing rows are replaced, but through `ON CONFLICT DO UPDATE`
+    rather than `INSERT OR REPLACE`: DuckDB rejects a replace (and any
+    update of a foreign key column) on a row that other rows reference,
+    which would make re-scraping a stored sitting fail. The update
+    therefore skips the foreign key columns of referenced tables. Keys
+    are derived from the same natural values as the foreign keys they
+    contain, so those columns cannot differ for an existing row anyway.
+
+    A stored row is only updated when its content changed: each row's
+    fingerprint, a hash of all its columns but the audit ones, is
+    computed in the same statement and compared with the stored one.
+    Re-scraping unchanged data thus writes next to nothing, and
+    ``loaded_at`` tells when a row last actually changed.
+
+    Checking every row for a conflict is the costly part of a large load
+    of new rows, and working out which rows are new (e.g. by anti-join
+    against the table) costs more than it saves. Callers that know none
+    of the records is stored, such as the votes of a sitting scraped for
+    the first time, pass ``insert_only`` to get a plain ``INSERT``.
 
     Args:
         session: Active SQLModel session.
         model: The SQLModel table class.
         records: Instances to upsert.
+        insert_only: Insert the records without conflict handling. Of
+            records sharing a key, only the first is inserted; a key
+            already stored makes the insert fail.
     """
     if not records:
         return
     table = model.__table__  # ty: ignore[unresolved-attribute]  # SQLModel tables have __table__ at runtime
     columns = list(table.columns)
     col_names = ", ".join(col.name for col in columns)
-    col_types = ", ".join(
-        f"'{col.name}': '{_duckdb_column_type(col)}'" for col in columns
-    )
-
-    # Stamp every inserted/merged row with the current UTC (Zulu) time,
-    # overriding whatever the record carries so the column always reflects
-    # the moment of this write. The offset-bearing ISO string is parsed by
-    # DuckDB into the tz-aware TIMESTAMPTZ column.
-    loaded_at = datetime.now(UTC).isoformat()
-    rows = [
+    if insert_only:
+        # An upsert lets a repeated key through, a plain insert does not.
+        key_names = [col.name for col in table.primary_key.columns]
+        unique: dict[tuple[Any, ...], SQLModel] = {}
+        for r in records:
+            unique.setdefault(tuple(getattr(r, k) for k in key_names), r)
+        records = list(unique.values())
+        conflict_clause = ""
+    else:
+        conflict_clause = _on_conflict_update(table)
+
+    # The audit columns are not taken from the records: loaded_at is
+    # bound as a query parameter below, so every row gets the same
+    # stamp, and the fingerprint is computed from the data columns.
+    data_columns = [
+        col
+        for col in columns
+        if col.name not in {LOADED_AT_COLUMN, FINGERPRINT_COLUMN}
+    ]
+    arrow_table = pa.table(
         {
-            col.name: loaded_at
-            if col.name == LOADED_AT_COLUMN
-            else _json_safe(getattr(r, col.name))
-            for col in columns
+            col.name: pa.array(
+                [getattr(r, col.name) for r in records],
+                type=_arrow_column_type(col),
+            )
+            for col in data_columns
         }
-        for r in records
-    ]
+    )
+    select_list = ", ".join(
+        "$loaded_at"
+        if col.name == LOADED_AT_COLUMN
+        else _fingerprint(data_columns)
+        if col.name == FINGERPRINT_COLUMN
+        else col.name
+        for col in columns
+    )
 
     # duckdb-engine's ConnectionWrapper proxies attribute access to
-    # the raw DuckDBPyConnection via __getattr__, so .execute()
-    # works directly against the native DuckDB connection.
+    # the raw DuckDBPyConnection via __getattr__, so .register() and
+    # .execute() work directly against the native DuckDB connection.
     dbapi_conn = session.connection().connection.dbapi_connection
-
-    with tempfile.NamedTemporaryFile(
-        mode="w",
-        suffix=".json",
-        delete=False,
-        encoding="utf-8",
-    ) as f:
-        json.dump(rows, f)
-        tmp_path = f.name
-
+    view_name = f"_bulk_upsert_{table.name}"
+    dbapi_conn.register(view_name, arrow_table)  # ty: ignore[unresolved-attribute]  # guaranteed non-None inside active session
     try:
-        path = tmp_path.replace("\\", "/")
+        # Stamp every inserted/merged row with the current UTC (Zulu)
+        # time, overriding whatever the record carries so the column
+        # always reflects the moment of this write.
         dbapi_conn.execute(  # ty: ignore[unresolved-attribute]  # guaranteed non-None inside active session
-            f"INSERT OR REPLACE INTO {table.name} ({col_names}) "  # noqa: S608
-            f"SELECT {col_names} FROM read_json('{path}', "
-            f"format='array', columns={{{col_types}}})"
+            f"INSERT INTO {table.name} ({col_names}) "  # noqa: S608
+            f"SELECT {select_list} FROM {view_name} {conflict_clause}",
+            {"loaded_at": datetime.now(UTC)},
         )
     finally:
-        os.unlink(tmp_path)
+        dbapi_conn.unregister(view_name)  # ty: ignore[unresolved-attribute]  # guaranteed non-None inside active session
+
+
+def _on_conflict_update(table: "Table") -> str:
+    """Build the clause making an insert into ``table`` an upsert.
 
+    See `bulk_upsert` for why foreign key columns of referenced tables
+    are left alone. Rows whose fingerprint is unchanged are not updated.
+    """
+    key_names = ", ".join(col.name for col in table.primary_key.columns)
+    referenced = _is_referenced(table)
+    update_list = ", ".join(
+        f"{col.name} = EXCLUDED.{col.name}"
+        for col in table.columns
+        if not col.primary_key and not (referenced and col.foreign_keys)
+    )
+    return (
+        f"ON CONFLICT ({key_names}) DO UPDATE SET {update_list} "
+        f"WHERE {table.name}.{FINGERPRINT_COLUMN} "
+        f"IS DISTINCT FROM EXCLUDED.{FINGERPRINT_COLUMN}"
+    )
+
+
+def _fingerprint(columns: "Sequence[Column[Any]]") -> str:
+    """Build the expression hashing a row's values of ``columns``.
+
+    The values are hashed as a JSON object, which keeps them apart and
+    tells a null from any string, so distinct rows get distinct input.
+    """
+    fields = ", ".join(f'"{col.name}" := "{col.name}"' for col in columns)
+    return f"md5(to_json(struct_pack({fields})))"
 
-def _duckdb_column_type(column: "Column[Any]") -> str:
-    """Map a SQLAlchemy column type to an explicit DuckDB type."""
+
+def _is_referenced(table: "Table") -> bool:
+    """Whether any table has a foreign key pointing at this one."""
+    return any(
+        foreign_key.column.table is table
+        for other in table.metadata.tables.values()
+        for foreign_key in other.foreign_keys
+    )
+
+
+def _arrow_column_type(column: "Column[Any]") -> pa.DataType:
+    """Map a SQLAlchemy column type to an explicit Arrow type."""
     if isinstance(column.type, Boolean):
-        return "BOOLEAN"
+        return pa.bool_()
     if isinstance(column.type, Integer):
-        return "BIGINT"
-    # DateTime must be checked before Date: a tz-aware datetime serialises
-    # to an ISO string with offset that DuckDB parses as TIMESTAMPTZ.
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    # Audit timestamps are written as tz-aware UTC (Zulu) instants.
     if isinstance(column.type, DateTime):
-        return "TIMESTAMP WITH TIME ZONE"
+        return pa.timestamp("us", tz="UTC")
     if isinstance(column.type, Date):
-        return "DATE"
+        return pa.date32()
     # Strings and string-backed enums
-    return "VARCHAR"
+    return pa.string()
+
+
+def merge_database(*, engine: Engine, path: str | Path) -> None:
+    """Upsert every row of another database file into this database.
 
+    Meant for combining the databases written by sharded runs: each
+    table is copied with one ``INSERT ... SELECT`` straight from the
+    attached file, parents before children, and rows already present
+    are replaced the way `bulk_upsert` replaces them. The ``loaded_at``
+    stamps are kept from the file, so they still tell when each row was
+    scraped. All tables are merged in one transaction.
 
-def _json_safe(value: object) -> object:
-    """Convert values that `json.dump` cannot serialise natively."""
-    if isinstance(value, date):
-        return value.isoformat()
-    return value
+    The progress of sittings and votings is merged with their data, but
+    that of terms is not: a shard marks a term done once its own share
+    of the sittings is, so `pipeline.resume_pipeline` would skip an
+    ended term whose other shards were not merged yet. Left without a
+    term's progress, it reruns the term and scrapes just the sittings
+    not merged. HTTP validators are not merged either, so that no
+    conditional request is skipped for data that only a shard holds.
 
+    Args:
+        engine: Engine of the database to merge into; its tables are
+            created if missing.
+        path: DuckDB file to merge from, as written by the pipeline.
+    """
+    create_db_and_tables(engine=engine)
+    source = str(path).replace("'", "''")
+    with engine.connect() as connection:
+        # Attached outside the transaction: DuckDB only detaches a
+        # database once the transaction that read it has ended.
+        dbapi_conn = connection.connection.dbapi_connection
+        dbapi_conn.execute(f"ATTACH '{source}' AS merge_source (READ_ONLY)")  # ty: ignore[unresolved-attribute]  # guaranteed non-None inside active connection
+        try:
+            with connection.begin():
+                for table in SQLModel.metadata.sorted_tables:
+                    if table.name == HttpValidator.__tablename__:
+                        continue
+                    where = (
+                        f"WHERE kind <> '{UnitKind.TERM}' "
+                        if table.name == ScrapeProgress.__tablename__
+                        else ""
+                    )
+                    col_names = ", ".join(col.name for col in table.columns)
+                    connection.exec_driver_sql(
+                        f"INSERT INTO {table.name} ({col_names}) "  # noqa: S608
+                        f"SELECT {col_names} FROM merge_source.{table.name} "
+                        f"{where}{_on_conflict_update(table)}"
+                    )
+        finally:
+            dbapi_conn.execute("DETACH merge_source")  # ty: ignore[unresolved-attribute]  # guaranteed non-None inside active connection
+
+
+def _check_foreign_keys(
+    connection: Connection, tables: "Sequence[Table]"
+) -> None:
+    """Check that the foreign keys of ``tables`` refer to stored rows.
 
-def create_db_and_tables(*, engine: Engine | None = None) -> None:
+    Raises:
+        ForeignKeyViolationError: If rows refer to missing keys.
+    """
+    violations = {}
+    for table in tables:
+        for foreign_key in table.foreign_keys:
+            column, parent = foreign_key.parent.name, foreign_key.column
+            keys = connection.exec_driver_sql(
+                f"SELECT DISTINCT child.{column} "  # noqa: S608
+                f"FROM {table.name} AS child "
+                f"ANTI JOIN {parent.table.name} AS parent "
+                f"ON child.{column} = parent.{parent.name} "
+                f"WHERE child.{column} IS NOT NULL "
+                f"ORDER BY 1 LIMIT {MAX_REPORTED_KEYS}"
+            ).scalars()
+            if reported := list(keys):
+                violations[
+                    f"{table.name}.{column} -> "
+                    f"{parent.table.name}.{parent.name}"
+                ] = reported
+    if violations:
+        raise ForeignKeyViolationError(violations)
+
+
+def compact_database(*, engine: Engine, path: str | Path) -> None:
+    """Write a copy of the data tables with compact BIGINT keys.
+
+    Natural keys are 64-digit hex SHA-256 digests, repeated in every
+    row that refers to them, so on the vote table they take up most of
+    the space and make joins compare long strings. In the copy, every
+    primary and foreign key holds the first `COMPACT_KEY_DIGITS` hex
+    digits of the natural key as a BIGINT (see
+    `database_key_utils.compact_key`); tables keep their constraints,
+    and joins compare integers.
+
+    Each natural key is still stored once, in a ``<table>_key`` table
+    mapping the table's compact keys to their natural keys. Foreign
+    keys are compacted through the mapping of the table they refer to
+    rather than by truncating them, so they always point at the row
+    their natural key does. For each table, a ``<table>_hex`` view shows
+    its rows with the natural keys, which join back to the scraped
+    database and to the keys `database_key_utils` generates. The keys
+    of vote records, which no table refers to, are rebuilt by the view
+    from the rows they are hashed from instead, so that ``voterecord_key``
+    only holds those that cannot be: normally none.
+
+    This is a copy for querying, not a schema the pipeline writes to: it
+    keeps using natural keys. The progress ledger and HTTP validators
+    are not copied.
+
+    Before anything is written, each table's keys are checked for
+    collisions, and its foreign keys for keys missing from the table
+    they refer to, which a database loaded with ``foreign_keys=False``
+    may hold.
+
+    Args:
+        engine: Engine of the database to copy.
+        path: DuckDB file to write; must not exist yet.
+
+    Raises:
+        FileExistsError: If ``path`` exists.
+        KeyCollisionError: If two natural keys of a table share a
+            compact key.
+        ForeignKeyViolationError: If rows refer to missing keys.
+    """
+    if Path(path).exists():
+        raise FileExistsError(path)
+    tables = [
+        table
+        for table in SQLModel.metadata.sorted_tables
+        if table.foreign_keys or _is_referenced(table)
+    ]
+    with engine.connect() as connection:
+        for table in tables:
+            (key,) = table.primary_key.columns
+            collisions = connection.exec_driver_sql(
+                f"SELECT left({key.name}, {COMPACT_KEY_DIGITS}) "  # noqa: S608
+                f"FROM {table.name} GROUP BY 1 HAVING count(*) > 1 "
+                f"ORDER BY 1 LIMIT {MAX_REPORTED_KEYS}"
+            ).scalars()
+            if colliding := list(collisions):
+                raise KeyCollisionError(table.name, colliding)
+        _check_foreign_keys(connection, tables)
+
+    compact_metadata = MetaData()
+    for table in tables:
+        compact = table.to_metadata(compact_metadata)
+        for column in compact.columns:
+            if _is_key(column):
+                column.type = BigInteger()
+                column.autoincrement = False
+        # Without a primary key: its index would take as much space as
+        # the mapping, and the keys were checked to be unique already.
+        Table(
+            f"{table.name}{KEY_TABLE_SUFFIX}",
+            compact_metadata,
+            Column("id", BigInteger, nullable=False),
+            Column("natural_key", String, nullable=False),
+        )
+    compact_engine = get_engine(url=f"duckdb:///{path}")
+    try:
+        compact_metadata.create_all(compact_engine)
+        with compact_engine.begin() as connection:
+            for table in tables:
+                connection.exec_driver_sql(
+                    f"CREATE VIEW {table.name}{HEX_VIEW_SUFFIX} AS "
+                    + _remap_keys(table, prefix="", to_compact=False)
+                )
+    finally:
+        compact_engine.dispose()
+
+    target = str(path).replace("'", "''")
+    with engine.connect() as connection:
+        dbapi_conn = connection.connection.dbapi_connection
+        dbapi_conn.execute(f"ATTACH '{target}' AS compact_target")  # ty: ignore[unresolved-attribute]  # guaranteed non-None inside active connection
+        try:
+            with connection.begin():
+                for table in tables:
+                    (key,) = table.primary_key.columns
+                    natural_key = f"mapped_row.{key.name}"
+                    # Vote record keys the view rebuilds are not mapped.
+                    unrebuilt = ""
+                    if table.name == VoteRecord.__tablename__:
+                        rebuilt, joins = _rebuilt_vote_key_sql("mapped_row")
+                        unrebuilt = f"{joins} WHERE {natural_key} <> {rebuilt}"
+                    connection.exec_driver_sql(
+                        f"INSERT INTO compact_target.{table.name}"  # noqa: S608
+                        f"{KEY_TABLE_SUFFIX} "
+                        f"SELECT {_compact_key_sql(natural_key)}, "
+                        f"{natural_key} "
+                        f"FROM {table.name} AS mapped_row {unrebuilt}"
+                    )
+                    col_names = ", ".join(col.name for col in table.columns)
+                    connection.exec_driver_sql(
+                        f"INSERT INTO compact_target.{table.name} "
+                        f"({col_names}) "
+                        + _remap_keys(
+                            table, prefix="compact_target.", to_compact=True
+                        )
+                    )
+        finally:
+            dbapi_conn.execute("DETACH compact_target")  # ty: ignore[unresolved-attribute]  # guaranteed non-None inside active connection
+
+
+def _remap_keys(table: "Table", *, prefix: str, to_compact: bool) -> str:
+    """Build a query of ``table``'s rows with its keys mapped.
+
+    Every key column is joined to the ``<table>_key`` mapping of the
+    table it identifies, found under ``prefix``: natural keys are
+    mapped to compact ones if ``to_compact``, and back otherwise. The
+    primary key is compacted directly, as its mapping is built that
+    way. Nullable foreign keys stay null. Vote record keys missing from
+    their mapping are rebuilt (see `_rebuilt_vote_key_sql`).
+    """
+    source, target = (
+        ("natural_key", "id") if to_compact else ("id", "natural_key")
+    )
+    select_list = []
+    joins = []
+    for column in table.columns:
+        if not _is_key(column):
+            select_list.append(f"mapped_row.{column.name}")
+            continue
+        if column.primary_key and to_compact:
+            # A table's own keys are what its mapping is made from.
+            select_list.append(
+                f"{_compact_key_sql(f'mapped_row.{column.name}')} "
+                f"AS {column.name}"
+            )
+            continue
+        if column.primary_key:
+            mapped = table.name
+        else:
+            (foreign_key,) = column.foreign_keys
+            mapped = foreign_key.column.table.name
+        alias = f"map_{column.name}"
+        mapped_key = f"{alias}.{target}"
+        if column.primary_key and mapped == VoteRecord.__tablename__:
+            rebuilt, rebuild_joins = _rebuilt_vote_key_sql("mapped_row")
+            mapped_key = f"coalesce({mapped_key}, {rebuilt})"
+            joins.append(rebuild_joins)
+        select_list.append(f"{mapped_key} AS {column.name}")
+        joins.append(
+            f"LEFT JOIN {prefix}{mapped}{KEY_TABLE_SUFFIX} AS {alias} "
+            f"ON mapped_row.{column.name} = {alias}.{source}"
+        )
+    return (
+        f"SELECT {', '.join(select_list)} "  # noqa: S608
+        f"FROM {table.name} AS mapped_row {' '.join(joins)}"
+    )
+
+
+def _rebuilt_vote_key_sql(vote: str) -> tuple[str, str]:
+    """Build the expression hashing a vote record's key from its rows.
+
+    The key is hashed from its term, sitting, voting, option and MP as
+    `database_key_utils.generate_vote_natural_key` does, which the
+    joins returned with it look up from the record aliased ``vote``.
+    They join on whatever keys the tables hold, compact or natural.
+
+    Returns:
+        The expression, and the joins it needs.
+    """
+    parts = [
+        "key_term.number",
+        "key_sitting.number",
+        "key_voting.sitting_day",
+        "key_voting.number",
+        "key_voting.date",
+        "key_option.index",
+        f"{vote}.mp_term_id",
+    ]
+    hashed = " || '||' || ".join(
+        f"coalesce(CAST({part} AS VARCHAR), '')" for part in parts
+    )
+    joins = (
+        f"JOIN {VotingOption.__tablename__} AS key_option "
+        f"ON {vote}.voting_option_id = key_option.id "
+        f"JOIN {Voting.__tablename__} AS key_voting "
+        "ON key_option.voting_id = key_voting.id "
+        f"JOIN {Sitting.__tablename__} AS key_sitting "
+        "ON key_voting.sitting_id = key_sitting.id "
+        f"JOIN {Term.__tablename__} AS key_term "
+        "ON key_sitting.term_id = key_term.id"
+    )
+    return f"sha256({hashed})", joins
+
+
+def _compact_key_sql(natural_key: str) -> str:
+    """Build the expression compacting a natural key, like `compact_key`."""
+    return f"('0x' || left({natural_key}, {COMPACT_KEY_DIGITS}))::BIGINT"
+
+
+def _is_key(column: "Column[Any]") -> bool:
+    """Whether a column holds a natural key: a primary or foreign key."""
+    return bool(column.primary_key or column.foreign_keys)
+
+
+def create_db_and_tables(
+    *, engine: Engine | None = None, foreign_keys: bool = True
+) -> None:
     """Create all database tables.
 
     Args:
         engine: SQLAlchemy engine to use. Defaults to a new engine
             with the default DuckDB URL.
+        foreign_keys: Whether to create the tables with their foreign
+            key constraints. Tables created without them skip the
+            checks while being loaded; `add_foreign_keys` checks the
+            loaded rows and adds the constraints afterwards. Tables
+            that already exist are left as they are.
     """
     if engine is None:
         engine = get_engine()
-    SQLModel.metadata.create_all(engine)
+    if foreign_keys:
+        SQLModel.metadata.create_all(engine)
+    else:
+        with engine.begin() as connection:
+            for table in SQLModel.metadata.sorted_tables:
+                # Enum types are created by `create_all` but not by a
+                # bare CREATE TABLE.
+                for column in table.columns:
+                    if isinstance(column.type, Enum):
+                        column.type.create(connection, checkfirst=True)
+                connection.execute(
+                    CreateTable(
+                        table,
+                        include_foreign_key_constraints=[],
+                        if_not_exists=True,
+                    )
+                )
+    # Tables created before a column was added get it, null for the
+    # stored rows. A fingerprint is then computed on the row's next
+    # write, which rewrites it once.
+    added_columns = [
+        *(
+            (table.name, FINGERPRINT_COLUMN, "VARCHAR")
+            for table in SQLModel.metadata.sorted_tables
+        ),
+        (ScrapeProgress.__tablename__, "listed_votings", "INTEGER"),
+    ]
+    with engine.begin() as connection:
+        existing = {
+            (table_name, column_name)
+            for table_name, column_name in connection.exec_driver_sql(
+                "SELECT table_name, column_name "
+                "FROM information_schema.columns "
+                "WHERE table_schema = current_schema()"
+            )
+        }
+        for table_name, column_name, column_type in added_columns:
+            if (table_name, column_name) not in existing:
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {table_name} "
+                    f"ADD COLUMN {column_name} {column_type}"
+                )
+
+
+def add_foreign_keys(*, engine: Engine) -> None:
+    """Check the rows of tables lacking their foreign keys, then add them.
+
+    Completes a load into tables created with ``foreign_keys=False``.
+    Every foreign key is checked with one anti-join of the whole table
+    against the table it points at. If any row points at a missing key,
+    nothing is changed and the offending keys are reported. Otherwise,
+    as DuckDB cannot add a constraint to an existing table, each table
+    is rebuilt with its constraints and its rows copied over in one
+    ``INSERT ... SELECT``, parents before children. All of this runs in
+    one transaction. Tables that already have their foreign keys are
+    left alone, so calling this again is cheap.
+
+    Args:
+        engine: Engine of the database to complete.
+
+    Raises:
+        ForeignKeyViolationError: If rows refer to missing keys.
+    """
+    with engine.begin() as connection:
+        constrained = set(
+            connection.exec_driver_sql(
+                "SELECT DISTINCT table_name FROM duckdb_constraints() "
+                "WHERE schema_name = current_schema() "
+                "AND constraint_type = 'FOREIGN KEY'"
+            ).scalars()
+        )
+        tables = [
+            table
+            for table in SQLModel.metadata.sorted_tables
+            if table.foreign_keys and table.name not in constrained
+        ]
+
+        _check_foreign_keys(connection, tables)
+
+        # All renamed first, so each rebuilt table refers to its rebuilt
+        # parents rather than to the copies being emptied.
+        for table in tables:
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table.name} "
+                f"RENAME TO {_UNCONSTRAINED_PREFIX}{table.name}"
+            )
+        for table in tables:
+            col_names = ", ".join(col.name for col in table.columns)
+            connection.execute(CreateTable(table))
+            connection.exec_driver_sql(
+                f"INSERT INTO {table.name} ({col_names}) "  # noqa: S608
+                f"SELECT {col_names} "
+                f"FROM {_UNCONSTRAINED_PREFIX}{table.name}"
+            )
+            connection.exec_driver_sql(
+                f"DROP TABLE {_UNCONSTRAINED_PREFIX}{table.name}"
+            )
@@ -206,3 +206,19 @@ def generate_mp_to_term_link_natural_key(
         mp.birth_place,
         term.number,
     )
+
+
+def compact_key(natural_key: str) -> int:
+    """Return the compact form of a natural key.
+
+    This is the key as stored by `database.compact_database`: the
+    leading `database.COMPACT_KEY_DIGITS` hex digits of the SHA-256
+    hash, read as an integer.
+
+    Args:
+        natural_key: Hex-encoded SHA-256 hash.
+
+    Returns:
+        Non-negative integer fitting a BIGINT.
+    """
+    return int(natural_key[: database.COMPACT_KEY_DIGITS], 16)
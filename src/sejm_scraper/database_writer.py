@@ -0,0 +1,122 @@
+"""Single database writer fed by a bounded queue of jobs."""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any, Self
+
+import anyio
+import anyio.from_thread
+import anyio.to_thread
+import sqlmodel
+from anyio.abc import TaskGroup
+from sqlalchemy import Connection, Engine
+
+# Jobs waiting for the writer before producers are made to wait. A job
+# can hold a whole sitting of vote records, so the queue only needs to
+# absorb the odd write that is slower than usual.
+DEFAULT_MAX_PENDING = 4
+
+
+@dataclass
+class _Job:
+    work: Callable[[sqlmodel.Session], Any]
+    # Set once the job has run, for callers waiting on its result.
+    done: anyio.Event | None = None
+    result: Any = None
+    error: Exception | None = None
+
+
+class DatabaseWriter:
+    """Runs all database work in one worker thread that owns the session.
+
+    Jobs run strictly in the order they are queued, all on the same
+    session, off the event loop: a slow upsert or commit does not hold
+    up requests in flight. `submit` queues a job without waiting for
+    it; once ``max_pending`` jobs are waiting it blocks until the writer
+    catches up, so memory held by pending writes stays bounded when the
+    database is slower than the network. `run` queues a job and returns
+    its result, so it sees the effect of every job queued before it.
+
+    A failing `submit`ted job stops the writer, and its error is raised
+    from the ``async with`` block like that of any task in a task group.
+    Jobs still queued when the block exits are run before it returns,
+    even if it exits with an error: each job is a complete unit of work.
+
+    Args:
+        engine: Engine to open the writer's connection with.
+        max_pending: Jobs that may wait in the queue.
+    """
+
+    def __init__(
+        self, engine: Engine, *, max_pending: int = DEFAULT_MAX_PENDING
+    ) -> None:
+        self._engine = engine
+        self._send, self._receive = anyio.create_memory_object_stream[_Job](
+            max_pending
+        )
+        self._task_group: TaskGroup | None = None
+        self._stopped = anyio.Event()
+
+    async def __aenter__(self) -> Self:
+        # Connected here rather than in the worker thread: a pool may
+        # tie connections to threads, and an in-memory DuckDB would
+        # then give the writer a database of its own.
+        connection = self._engine.connect()
+        self._task_group = anyio.create_task_group()
+        await self._task_group.__aenter__()
+        self._task_group.start_soon(self._run_writer, connection)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        self._send.close()
+        # Let the writer finish the queued jobs before the task group is
+        # left: leaving it with an error would cancel the writer first.
+        with anyio.CancelScope(shield=True):
+            await self._stopped.wait()
+        return await self._task_group.__aexit__(exc_type, exc, traceback)  # ty: ignore[possibly-missing-attribute]  # set on entry
+
+    async def submit(self, work: Callable[[sqlmodel.Session], object]) -> None:
+        """Queue a job, waiting only while the queue is full."""
+        await self._send.send(_Job(work))
+
+    async def run[T](self, work: Callable[[sqlmodel.Session], T]) -> T:
+        """Queue a job and wait for its result.
+
+        Raises:
+            Exception: Whatever the job raised; the writer carries on.
+        """
+        job = _Job(work, done=anyio.Event())
+        await self._send.send(job)
+        await job.done.wait()  # ty: ignore[possibly-missing-attribute]  # set above
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    async def _run_writer(self, connection: Connection) -> None:
+        try:
+            await anyio.to_thread.run_sync(self._write, connection)
+        finally:
+            self._stopped.set()
+
+    def _write(self, connection: Connection) -> None:
+        with connection, sqlmodel.Session(connection) as session:
+            while True:
+                try:
+                    job = anyio.from_thread.run(self._receive.receive)
+                except anyio.EndOfStream:
+                    return
+                if job.done is None:
+                    job.work(session)
+                    continue
+                try:
+                    job.result = job.work(session)
+                except Exception as error:  # raised to the caller of `run`
+                    session.rollback()
+                    job.error = error
+                anyio.from_thread.run_sync(job.done.set)
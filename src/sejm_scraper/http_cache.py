@@ -0,0 +1,387 @@
+"""Persistent on-disk cache for Sejm API responses."""
+
+import sqlite3
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from hashlib import sha256
+from pathlib import Path
+
+import httpx
+import pydantic
+
+from sejm_scraper import api_client, api_schemas
+
+DEFAULT_CACHE_PATH = "sejm_scraper.cache.sqlite3"
+
+# Upper bound on the total size of cached response bodies.
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+# How long a cached response is served before it is fetched again.
+# Lists that grow while a term is running expire quickly; a voting's
+# detail does not change once published. Responses scoped to a closed
+# term never expire regardless of these values.
+DEFAULT_TTLS: Mapping[api_client.EndpointFamily, timedelta] = {
+    api_client.EndpointFamily.TERMS: timedelta(days=1),
+    api_client.EndpointFamily.PROCEEDINGS: timedelta(hours=1),
+    api_client.EndpointFamily.VOTING_TABLE: timedelta(hours=1),
+    api_client.EndpointFamily.VOTINGS: timedelta(hours=1),
+    api_client.EndpointFamily.VOTING_DETAIL: timedelta(days=7),
+    api_client.EndpointFamily.MPS: timedelta(days=1),
+    api_client.EndpointFamily.CLUBS: timedelta(days=1),
+}
+
+# Bumped whenever the tables below change. A cache file written with
+# another version is discarded, as its content can always be refetched.
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+DROP TABLE IF EXISTS response;
+DROP TABLE IF EXISTS content;
+DROP TABLE IF EXISTS closed_term;
+CREATE TABLE content (
+    hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE response (
+    url TEXT PRIMARY KEY,
+    family TEXT NOT NULL,
+    term INTEGER,
+    content_hash TEXT NOT NULL REFERENCES content (hash),
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX response_accessed_at ON response (accessed_at);
+CREATE TABLE closed_term (
+    number INTEGER PRIMARY KEY
+);
+"""
+
+_terms_adapter = pydantic.TypeAdapter(list[api_schemas.TermSchema])
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A stored response body with the validators it was served with."""
+
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    fresh: bool
+
+    def matches(self, request: httpx.Request) -> bool:
+        """Whether the request's conditional headers match this body."""
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return if_none_match == self.etag
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            return if_modified_since == self.last_modified
+        return False
+
+
+class ResponseCache:
+    """Content-addressed store of response bodies keyed by URL.
+
+    Bodies are stored once per distinct content (SHA-256) in a SQLite
+    file, so identical responses served under different URLs share
+    storage. Entries expire after a per-endpoint-family TTL, except
+    those scoped to a term that has ended: once the term list reports a
+    ``to`` date in the past, that term's data can no longer change and
+    is kept indefinitely. When the total body size exceeds
+    ``max_bytes``, the least recently used entries are evicted.
+
+    SQLite is used rather than DuckDB because the cache is a small
+    key-value workload that several scraper processes may share.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_PATH,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Mapping[api_client.EndpointFamily, timedelta] | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._connection = sqlite3.connect(path)
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version != _SCHEMA_VERSION:
+            self._connection.executescript(
+                f"{_SCHEMA}\nPRAGMA user_version = {_SCHEMA_VERSION};"
+            )
+        self._closed_terms = {
+            number
+            for (number,) in self._connection.execute(
+                "SELECT number FROM closed_term"
+            )
+        }
+
+    def close(self) -> None:
+        """Close the underlying database file."""
+        self._connection.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def get(self, url: str) -> bytes | None:
+        """Return the cached body for a URL if it is still fresh.
+
+        Args:
+            url: Absolute request URL.
+
+        Returns:
+            The response body, or None on a miss or an expired entry.
+        """
+        cached = self.lookup(url)
+        if cached is None or not cached.fresh:
+            return None
+        return cached.body
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        """Return the cached response for a URL, fresh or not.
+
+        Args:
+            url: Absolute request URL.
+
+        Returns:
+            The cached response, or None if nothing is stored.
+        """
+        row = self._connection.execute(
+            "SELECT response.family, response.term, response.stored_at,"
+            " response.etag, response.last_modified, content.body"
+            " FROM response"
+            " JOIN content ON content.hash = response.content_hash"
+            " WHERE response.url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        family, term, stored_at, etag, last_modified, body = row
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                "UPDATE response SET accessed_at = ? WHERE url = ?",
+                (now, url),
+            )
+        return CachedResponse(
+            body=body,
+            etag=etag,
+            last_modified=last_modified,
+            fresh=self._is_fresh(
+                family=api_client.EndpointFamily(family),
+                term=term,
+                age=now - stored_at,
+            ),
+        )
+
+    def refresh(self, url: str) -> None:
+        """Mark a stored response as revalidated by the server."""
+        with self._connection:
+            self._connection.execute(
+                "UPDATE response SET stored_at = ? WHERE url = ?",
+                (time.time(), url),
+            )
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        *,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Store a response body, evicting old entries if over budget.
+
+        URLs that are not Sejm API endpoints are ignored.
+
+        Args:
+            url: Absolute request URL.
+            body: Raw (decoded) response body.
+            etag: The response's ``ETag`` header, if any.
+            last_modified: The response's ``Last-Modified`` header, if any.
+        """
+        endpoint = api_client.classify_url(url)
+        if endpoint is None:
+            return
+        family, term = endpoint
+        content_hash = sha256(body).hexdigest()
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO content (hash, body, size)"
+                " VALUES (?, ?, ?)",
+                (content_hash, body, len(body)),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response (url, family, term,"
+                " content_hash, etag, last_modified, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    family.value,
+                    term,
+                    content_hash,
+                    etag,
+                    last_modified,
+                    now,
+                    now,
+                ),
+            )
+            self._delete_orphaned_content()
+        if family is api_client.EndpointFamily.TERMS:
+            self._record_closed_terms(body)
+        self._evict()
+
+    def _is_fresh(
+        self,
+        *,
+        family: api_client.EndpointFamily,
+        term: int | None,
+        age: float,
+    ) -> bool:
+        if term is not None and term in self._closed_terms:
+            return True
+        return age < self.ttls[family].total_seconds()
+
+    def _record_closed_terms(self, body: bytes) -> None:
+        try:
+            terms = _terms_adapter.validate_json(body)
+        except pydantic.ValidationError:
+            # The API client reports the invalid response; the cache
+            # just does not learn anything from it.
+            return
+        today = datetime.now(UTC).date()
+        closed = {
+            term.number
+            for term in terms
+            if term.to_date is not None and term.to_date < today
+        }
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO closed_term (number) VALUES (?)",
+                [(number,) for number in sorted(closed)],
+            )
+        self._closed_terms |= closed
+
+    def _delete_orphaned_content(self) -> None:
+        self._connection.execute(
+            "DELETE FROM content WHERE hash NOT IN"
+            " (SELECT content_hash FROM response)"
+        )
+
+    def _evict(self) -> None:
+        (total,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM content"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        with self._connection:
+            for url, size in self._connection.execute(
+                "SELECT response.url, content.size FROM response"
+                " JOIN content ON content.hash = response.content_hash"
+                " ORDER BY response.accessed_at"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._connection.execute(
+                    "DELETE FROM response WHERE url = ?", (url,)
+                )
+                # Shared content is only freed with its last reference,
+                # so this may overestimate what was reclaimed; the next
+                # eviction pass corrects it.
+                total -= size
+            self._delete_orphaned_content()
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """HTTP transport that serves GET requests from a `ResponseCache`.
+
+    Fresh cached bodies are returned without touching the network, or
+    as ``304 Not Modified`` when the request's own conditional headers
+    match them; such responses carry the `api_client.FROM_CACHE`
+    extension. Stale entries are revalidated with the validators they
+    were stored with, so an unchanged resource costs only headers.
+    Successful responses from the wrapped transport are stored.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._cache = cache
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        if request.method != "GET":
+            return await self._transport.handle_async_request(request)
+        url = str(request.url)
+        cached = self._cache.lookup(url)
+        if cached is not None and cached.fresh:
+            if cached.matches(request):
+                response = _cached_response(
+                    request, cached, status_code=httpx.codes.NOT_MODIFIED
+                )
+            else:
+                response = _cached_response(request, cached)
+            response.extensions[api_client.FROM_CACHE] = True
+            return response
+
+        conditional = (
+            "If-None-Match" in request.headers
+            or "If-Modified-Since" in request.headers
+        )
+        if cached is not None and not conditional:
+            if cached.etag is not None:
+                request.headers["If-None-Match"] = cached.etag
+            if cached.last_modified is not None:
+                request.headers["If-Modified-Since"] = cached.last_modified
+
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            if cached is not None and cached.matches(request):
+                self._cache.refresh(url)
+                if not conditional:
+                    await response.aclose()
+                    return _cached_response(request, cached)
+            return response
+        if response.status_code == httpx.codes.OK:
+            self._cache.put(
+                url,
+                await response.aread(),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _cached_response(
+    request: httpx.Request,
+    cached: CachedResponse,
+    *,
+    status_code: int = httpx.codes.OK,
+) -> httpx.Response:
+    headers = {"content-type": "application/json"}
+    if cached.etag is not None:
+        headers["ETag"] = cached.etag
+    if cached.last_modified is not None:
+        headers["Last-Modified"] = cached.last_modified
+    return httpx.Response(
+        status_code,
+        headers=headers,
+        content=b"" if status_code == httpx.codes.NOT_MODIFIED else cached.body,
+        request=request,
+    )
@@ -0,0 +1,156 @@
+"""Incremental parsing of large JSON API responses."""
+
+import codecs
+import json
+from typing import Any
+
+_WHITESPACE = " \t\n\r"
+
+
+class ArrayStreamParser:
+    """Parses a JSON object whose one large array arrives in chunks.
+
+    The elements of the array under ``array_key`` are returned from
+    `feed` as soon as each is complete, and the buffer they were parsed
+    from is released, so memory use is bounded by the size of a chunk
+    and an element rather than the whole document. Every other member
+    of the object is kept and returned by `close`.
+
+    Args:
+        array_key: Key of the top-level member to stream.
+    """
+
+    def __init__(self, array_key: str) -> None:
+        self._array_key = array_key
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._state = "start"
+        self._key: str | None = None
+        self._members: dict[str, Any] = {}
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Parse another chunk of the document.
+
+        Args:
+            chunk: The next bytes of the UTF-8 encoded document.
+
+        Returns:
+            Array elements completed by this chunk, in order.
+
+        Raises:
+            ValueError: If the document is not a JSON object, or the
+                member under ``array_key`` is not an array.
+        """
+        self._buffer = self._buffer[self._position :] + self._utf8.decode(chunk)
+        self._position = 0
+        return self._parse(final=False)
+
+    def close(self) -> dict[str, Any]:
+        """Finish parsing once the whole document has been fed.
+
+        Returns:
+            The object's members other than ``array_key``.
+
+        Raises:
+            ValueError: If the document is incomplete or malformed.
+        """
+        self._buffer = self._buffer[self._position :] + self._utf8.decode(
+            b"", final=True
+        )
+        self._position = 0
+        self._parse(final=True)
+        if self._state != "done":
+            msg = "incomplete JSON document"
+            raise ValueError(msg)
+        return self._members
+
+    def _parse(self, *, final: bool) -> list[Any]:
+        elements: list[Any] = []
+        while True:
+            char = self._next_char()
+            if char is None or self._state == "done":
+                return elements
+            if self._state == "start":
+                self._expect(char, "{")
+                self._state = "key"
+            elif self._state == "key":
+                if char == "}":
+                    self._position += 1
+                    self._state = "done"
+                    continue
+                if char == ",":
+                    self._position += 1
+                    continue
+                key = self._decode(final=final)
+                if key is _INCOMPLETE:
+                    return elements
+                if not isinstance(key, str):
+                    msg = "expected an object key"
+                    raise ValueError(msg)
+                self._key = key
+                self._state = "colon"
+            elif self._state == "colon":
+                self._expect(char, ":")
+                self._state = "value"
+            elif self._state == "value":
+                if self._key == self._array_key:
+                    self._expect(char, "[")
+                    self._state = "array"
+                    continue
+                value = self._decode(final=final)
+                if value is _INCOMPLETE:
+                    return elements
+                self._members[self._key or ""] = value
+                self._state = "key"
+            elif self._state == "array":
+                if char == "]":
+                    self._position += 1
+                    self._state = "key"
+                    continue
+                if char == ",":
+                    self._position += 1
+                    continue
+                element = self._decode(final=final)
+                if element is _INCOMPLETE:
+                    return elements
+                elements.append(element)
+
+    def _next_char(self) -> str | None:
+        """Skip whitespace and peek at the next character, if any."""
+        while (
+            self._position < len(self._buffer)
+            and self._buffer[self._position] in _WHITESPACE
+        ):
+            self._position += 1
+        if self._position == len(self._buffer):
+            return None
+        return self._buffer[self._position]
+
+    def _expect(self, char: str, expected: str) -> None:
+        if char != expected:
+            msg = f"expected {expected!r} at {char!r}"
+            raise ValueError(msg)
+        self._position += 1
+
+    def _decode(self, *, final: bool) -> Any:
+        """Decode the value at the current position, if it is complete.
+
+        A value that runs up to the end of the buffer may be cut short
+        (a number split across chunks decodes fine), so it only counts
+        as complete once something follows it or the document ends.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._position)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return _INCOMPLETE
+        if end == len(self._buffer) and not final:
+            return _INCOMPLETE
+        self._position = end
+        return value
+
+
+_INCOMPLETE = object()
@@ -1,159 +1,1236 @@
+import contextlib
+import functools
+import random
+import time
+from collections.abc import (
+    AsyncIterator,
+    Callable,
+    Collection,
+    Mapping,
+    Sequence,
+)
+from dataclasses import dataclass, field
+
 import anyio
 import httpx
 import sqlmodel
 import structlog
 from sqlalchemy import Engine
 
-from sejm_scraper import database, scrape
+from sejm_scraper import (
+    api_client,
+    concurrency,
+    database,
+    database_writer,
+    scrape,
+)
 
 logger = structlog.get_logger()
 
-# Cap on simultaneous requests to the Sejm API when scraping votes.
-# The API is a public government service; hammering it with hundreds
-# of concurrent requests risks throttling or bans.
-MAX_CONCURRENT_VOTE_REQUESTS = 10
+# Simultaneous requests to the Sejm API when scraping votes. The window
+# adapts to how the API copes, starting from the initial value, but never
+# exceeds the cap: the API is a public government service, and hammering
+# it with hundreds of concurrent requests risks throttling or bans.
+INITIAL_CONCURRENT_VOTE_REQUESTS = 10
+MAX_CONCURRENT_VOTE_REQUESTS = 32
+
+# Sittings whose votes may be fetched before the sittings ahead of them
+# are written. Two lets the next sitting's requests overlap the current
+# sitting's slowest requests and its database write; more would mostly
+# hold more scraped votes in memory.
+SITTING_LOOKAHEAD = 2
+
+# Terms the API has no proceedings (sitting list) for, whose sittings
+# are taken from the voting table instead.
+TERMS_WITHOUT_PROCEEDINGS = frozenset({3, 4, 5, 6})
+
+# Vote records and voting options a sitting may hold in memory before
+# those of its finished votings are written out. A voting has about 460
+# vote records, so this flushes every forty-odd votings; a sitting with
+# hundreds of votings would otherwise hold over 100k rows at once.
+DEFAULT_FLUSH_ROWS = 20_000
+
+# Seconds between polls in `watch_pipeline`, the share of it varied at
+# random so that several watchers do not poll in step, and the longest
+# wait after repeated failures.
+WATCH_INTERVAL = 300.0
+WATCH_JITTER = 0.1
+WATCH_MAX_BACKOFF = 3600.0
+
+
+# A database write queued to the writer.
+type _Write = Callable[[sqlmodel.Session], None]
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of several disjoint parts of the sittings to scrape.
+
+    Every sitting belongs to exactly one shard, decided by its key
+    alone, so separate processes given the shards ``1/N`` to ``N/N`` of
+    the same run scrape each sitting once between them. Terms, MPs and
+    clubs are scraped by every shard, since votes refer to them.
+
+    Attributes:
+        index: Which part this is, from 1 to ``count``.
+        count: Number of parts.
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.index <= self.count:
+            msg = f"shard {self.index}/{self.count} is out of range"
+            raise ValueError(msg)
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        """Parse a shard written as ``INDEX/COUNT``, e.g. ``2/4``.
+
+        Raises:
+            ValueError: If ``value`` is not a valid shard.
+        """
+        index, separator, count = value.partition("/")
+        if not separator or not index.isdigit() or not count.isdigit():
+            msg = f"expected INDEX/COUNT, got {value!r}"
+            raise ValueError(msg)
+        return cls(int(index), int(count))
+
+    def owns(self, sitting: database.Sitting) -> bool:
+        """Whether ``sitting`` is scraped by this shard."""
+        # Keys are SHA-256 digests, so sittings spread evenly.
+        return int(sitting.id, 16) % self.count == self.index - 1
+
+
+@dataclass(frozen=True)
+class PipelineOptions:
+    """Optional behaviours of `pipeline`; the defaults scrape everything.
+
+    Attributes:
+        conditional: Make conditional requests for the MP, club and
+            voting lists, and skip storing a list, or scraping the
+            votes of a sitting, when the API reports the list unchanged
+            since it was last stored.
+        stream_votes: Parse each voting's MP votes as the response
+            arrives rather than loading the response whole, bounding
+            the memory used per in-flight request.
+        hedge_percentile: If set, a voting's votes request still running
+            after this percentile (0-100) of recent request latencies
+            is sent a second time, and the first answer is used. Only
+            applies when not streaming votes.
+        concurrent_terms: How many terms to scrape at once. All terms
+            share the same request limiter, so this mainly keeps it
+            busy when a single term cannot. `resume_pipeline` resumes
+            every stored term separately when this is above one.
+        shard: If set, only scrape the sittings of this shard.
+        flush_rows: Vote records and voting options a sitting collects
+            before those of its finished votings are written, keeping
+            memory use flat however long the sitting is.
+        bulk_load: Create missing tables without foreign key
+            constraints, and only check the foreign keys, and add the
+            constraints, once the pipeline has loaded everything (see
+            `database.add_foreign_keys`). Meant for full rebuilds into
+            a new database.
+    """
+
+    conditional: bool = False
+    stream_votes: bool = False
+    hedge_percentile: float | None = None
+    concurrent_terms: int = 1
+    shard: Shard | None = None
+    flush_rows: int = DEFAULT_FLUSH_ROWS
+    bulk_load: bool = False
+
+
+@dataclass(frozen=True)
+class TermStart:
+    """Where to start scraping within a term.
+
+    Attributes:
+        sitting: Start from this sitting number onwards.
+        voting: Start from this voting number onwards, within the
+            starting sitting (requires sitting).
+    """
+
+    sitting: int | None = None
+    voting: int | None = None
+
+
+def _load_validators(
+    database_client: sqlmodel.Session,
+) -> api_client.ValidatorStore:
+    return api_client.ValidatorStore(
+        {
+            row.url: api_client.Validators(
+                etag=row.etag, last_modified=row.last_modified
+            )
+            for row in database_client.exec(
+                sqlmodel.select(database.HttpValidator)
+            )
+        }
+    )
+
+
+def _save_validators(
+    database_client: sqlmodel.Session,
+    validators: api_client.ValidatorStore | None,
+) -> None:
+    """Stage fresh validators to be committed with the data they cover."""
+    if validators is None:
+        return
+    database.bulk_upsert(
+        session=database_client,
+        model=database.HttpValidator,
+        records=[
+            database.HttpValidator(
+                url=url,
+                etag=fresh.etag,
+                last_modified=fresh.last_modified,
+            )
+            for url, fresh in validators.pop_fresh().items()
+        ],
+    )
+
+
+def _record_progress(
+    database_client: sqlmodel.Session,
+    units: Sequence[database.ScrapeProgress],
+    *,
+    new_attempt: bool,
+) -> None:
+    """Stage ledger rows, counting attempts on from the stored rows.
+
+    Args:
+        database_client: Session to stage the rows in.
+        units: Rows to write; their ``attempts`` is replaced.
+        new_attempt: Whether the rows record a unit being started (or
+            done in one go), rather than an attempt already counted
+            finishing.
+    """
+    if not units:
+        return
+    stored_attempts = dict(
+        database_client.exec(
+            sqlmodel.select(
+                database.ScrapeProgress.id, database.ScrapeProgress.attempts
+            ).where(
+                sqlmodel.col(database.ScrapeProgress.id).in_(
+                    [unit.id for unit in units]
+                )
+            )
+        ).all()
+    )
+    for unit in units:
+        unit.attempts = stored_attempts.get(unit.id, 0) + int(new_attempt)
+    database.bulk_upsert(
+        session=database_client,
+        model=database.ScrapeProgress,
+        records=units,
+    )
+
+
+@dataclass
+class _SittingWork:
+    """A sitting scraped ahead of being written to the database."""
+
+    sitting: database.Sitting
+    sitting_days: list[database.SittingDay]
+    from_voting: int | None
+    validators: api_client.ValidatorStore | None
+    # Votings already stored with their votes, which are not refetched.
+    complete_voting_ids: frozenset[str] = frozenset()
+    # Whether the sitting has no votings stored, and so no votes either:
+    # its votes are then inserted without checking for stored ones.
+    new: bool = False
+    # None if the voting list is unchanged and its votings are stored.
+    votings: scrape.ScrapedVotingsResult | None = None
+    votes: list[database.VoteRecord] = field(default_factory=list)
+    detail_options: list[database.VotingOption] = field(default_factory=list)
+    voting_progress: list[database.ScrapeProgress] = field(default_factory=list)
+    # Votings written whole in a chunk, with their detail options, which
+    # the sitting's commit must not write over with the listed ones.
+    written_voting_ids: set[str] = field(default_factory=set)
+    duration_seconds: float = 0.0
+    response_bytes: int = 0
+    # Set once the sitting row is queued, so chunks queued after it can
+    # refer to it.
+    queued: anyio.Event = field(default_factory=anyio.Event)
+    fetched: anyio.Event = field(default_factory=anyio.Event)
+
+    def pending_rows(self) -> int:
+        """Vote records and detail options not yet written."""
+        return len(self.votes) + len(self.detail_options)
+
+
+@dataclass
+class _VoteChunk:
+    """Finished votings of a sitting, written before the sitting is."""
+
+    votings: list[database.Voting]
+    voting_options: list[database.VotingOption]
+    detail_options: list[database.VotingOption]
+    votes: list[database.VoteRecord]
+    progress: list[database.ScrapeProgress]
+    new: bool
+
+
+def _take_chunk(work: _SittingWork) -> _VoteChunk:
+    """Move the votes of the sitting's finished votings into a chunk.
+
+    A voting's votes, detail options and ledger row are added together,
+    so the chunk holds every finished voting whole.
+    """
+    voting_ids = {unit.id for unit in work.voting_progress}
+    work.written_voting_ids |= voting_ids
+    listed = work.votings
+    chunk = _VoteChunk(
+        votings=[v for v in listed.votings if v.id in voting_ids],  # ty: ignore[possibly-missing-attribute]  # votes are only scraped after the voting list
+        voting_options=[
+            o
+            for o in listed.voting_options  # ty: ignore[possibly-missing-attribute]  # as above
+            if o.voting_id in voting_ids
+        ],
+        detail_options=work.detail_options,
+        votes=work.votes,
+        progress=work.voting_progress,
+        new=work.new,
+    )
+    work.detail_options, work.votes, work.voting_progress = [], [], []
+    return chunk
+
+
+def _store_vote_chunk(
+    database_client: sqlmodel.Session,
+    chunk: _VoteChunk,
+) -> None:
+    """Commit votings of a sitting still being scraped.
+
+    The votings in ``chunk.progress`` are finished, and are marked done
+    in the ledger, but not their sitting: a resumed run scrapes the
+    sitting again and skips only them. A chunk of a voting still being
+    streamed has no progress, so the voting is scraped again too.
+    """
+    database.bulk_upsert(
+        session=database_client, model=database.Voting, records=chunk.votings
+    )
+    database.bulk_upsert(
+        session=database_client,
+        model=database.VotingOption,
+        records=chunk.voting_options,
+    )
+    database.bulk_upsert(
+        session=database_client,
+        model=database.VotingOption,
+        records=chunk.detail_options,
+    )
+    database.bulk_upsert(
+        session=database_client,
+        model=database.VoteRecord,
+        records=chunk.votes,
+        insert_only=chunk.new,
+    )
+    _record_progress(database_client, chunk.progress, new_attempt=True)
+    database_client.commit()
+
+
+async def _flush_votes(
+    *,
+    writer: database_writer.DatabaseWriter,
+    work: _SittingWork,
+) -> None:
+    """Queue the votes of the sitting's finished votings to be written."""
+    chunk = _take_chunk(work)
+    await work.queued.wait()
+    logger.info(
+        "flushing votes",
+        sitting=work.sitting.number,
+        votings=len(chunk.votings),
+        count=len(chunk.votes),
+    )
+    await writer.submit(functools.partial(_store_vote_chunk, chunk=chunk))
+
+
+async def _flush_streamed_votes(
+    *,
+    writer: database_writer.DatabaseWriter,
+    work: _SittingWork,
+    voting: database.Voting,
+    batch: scrape.ScrapedVotesResult,
+    detail_options: list[database.VotingOption],
+) -> None:
+    """Queue votes of a voting streamed before it is finished.
+
+    They are queued with the voting and the options they refer to, so
+    that these are written first. An option the voting list does not
+    give is written as the batch's placeholder, until the voting's
+    ``detail_options`` replace it. The votes are upserted, not
+    inserted, as a retried request streams them again.
+    """
+    listed = [
+        option
+        for option in work.votings.voting_options  # ty: ignore[possibly-missing-attribute]  # votes are only scraped after the voting list
+        if option.voting_id == voting.id
+    ]
+    listed_ids = {option.id for option in listed}
+    chunk = _VoteChunk(
+        votings=[voting],
+        voting_options=[
+            *listed,
+            *(o for o in batch.voting_options if o.id not in listed_ids),
+        ],
+        detail_options=detail_options,
+        votes=batch.votes,
+        progress=[],
+        new=False,
+    )
+    await work.queued.wait()
+    logger.info(
+        "flushing streamed votes",
+        sitting=work.sitting.number,
+        voting=voting.number,
+        count=len(chunk.votes),
+    )
+    await writer.submit(functools.partial(_store_vote_chunk, chunk=chunk))
 
 
 async def _scrape_voting_votes(
+    *,
     client: httpx.AsyncClient,
-    limiter: anyio.CapacityLimiter,
+    limiter: concurrency.AdaptiveLimiter,
+    hedger: concurrency.Hedger | None,
     term: database.Term,
     sitting: database.Sitting,
     voting: database.Voting,
     mp_link_ids: dict[int, str],
-    all_votes: list[database.VoteRecord],
-    all_detail_options: list[database.VotingOption],
+    work: _SittingWork,
+    writer: database_writer.DatabaseWriter,
+    options: PipelineOptions,
 ) -> None:
-    async with limiter:
+    """Scrape a voting's votes into ``work``, flushing it if over budget.
+
+    When streaming, a voting's votes are written out every
+    ``options.flush_rows`` records while they are parsed, so memory use
+    does not grow with the size of the voting either.
+    """
+    streamed = 0
+
+    async def flush_streamed(batch: scrape.ScrapedVotesResult) -> None:
+        nonlocal streamed
+        streamed += len(batch.votes)
+        await _flush_streamed_votes(
+            writer=writer,
+            work=work,
+            voting=voting,
+            batch=batch,
+            detail_options=[],
+        )
+
+    started = time.monotonic()
+    with api_client.count_bytes() as received:
         result = await scrape.scrape_votes(
             client=client,
             term=term,
             sitting=sitting,
             voting=voting,
             mp_link_ids=mp_link_ids,
+            limiter=limiter,
+            hedger=hedger,
+            stream=options.stream_votes,
+            on_batch=flush_streamed,
+            batch_size=options.flush_rows,
+        )
+    if streamed:
+        # Upserted like the votes streamed before them, which a retry
+        # may have repeated among these.
+        await _flush_streamed_votes(
+            writer=writer,
+            work=work,
+            voting=voting,
+            batch=scrape.ScrapedVotesResult(
+                votes=result.votes, voting_options=[]
+            ),
+            detail_options=result.voting_options,
+        )
+        streamed += len(result.votes)
+        work.written_voting_ids.add(voting.id)
+        result = scrape.ScrapedVotesResult(votes=[], voting_options=[])
+    # Appended together, and to the lists the work holds now, as
+    # flushing replaces them.
+    work.votes.extend(result.votes)
+    work.detail_options.extend(result.voting_options)
+    work.voting_progress.append(
+        database.ScrapeProgress(
+            id=voting.id,
+            kind=database.UnitKind.VOTING,
+            parent_id=sitting.id,
+            status=database.UnitStatus.DONE,
+            attempts=1,
+            duration_seconds=time.monotonic() - started,
+            response_bytes=received.total,
         )
-    all_votes.extend(result.votes)
-    all_detail_options.extend(result.voting_options)
+    )
     logger.info(
         "scraped votes",
         term=term.number,
         sitting=sitting.number,
         voting=voting.number,
-        count=len(result.votes),
+        count=streamed or len(result.votes),
+        concurrency=limiter.limit,
     )
+    if work.pending_rows() >= options.flush_rows:
+        await _flush_votes(writer=writer, work=work)
 
 
-async def _process_sitting(
+async def _fetch_sitting(
     *,
     http_client: httpx.AsyncClient,
-    database_client: sqlmodel.Session,
-    limiter: anyio.CapacityLimiter,
+    writer: database_writer.DatabaseWriter,
+    limiter: concurrency.AdaptiveLimiter,
+    hedger: concurrency.Hedger | None,
     term: database.Term,
-    sitting: database.Sitting,
-    sitting_days: list[database.SittingDay],
+    work: _SittingWork,
     mp_link_ids: dict[int, str],
-    from_voting: int | None,
+    stored_sitting_ids: set[str],
+    options: PipelineOptions,
 ) -> None:
-    """Scrape and persist all votings and votes for a single sitting.
+    """Run `_scrape_sitting`, measuring the time and bytes it takes."""
+    started = time.monotonic()
+    with api_client.count_bytes() as received:
+        await _scrape_sitting(
+            http_client=http_client,
+            writer=writer,
+            limiter=limiter,
+            hedger=hedger,
+            term=term,
+            work=work,
+            mp_link_ids=mp_link_ids,
+            stored_sitting_ids=stored_sitting_ids,
+            options=options,
+        )
+    work.duration_seconds = time.monotonic() - started
+    work.response_bytes = received.total
+    work.fetched.set()
 
-    The sitting row is committed before any votings are scraped, and
-    votings are committed together with their votes only after all
-    network I/O for the sitting has finished. This keeps the database
-    consistent with the resume logic: a crash mid-sitting leaves the
-    sitting without votings, so `resume_pipeline` restarts from this
-    sitting instead of skipping the unfinished work.
+
+async def _scrape_sitting(
+    *,
+    http_client: httpx.AsyncClient,
+    writer: database_writer.DatabaseWriter,
+    limiter: concurrency.AdaptiveLimiter,
+    hedger: concurrency.Hedger | None,
+    term: database.Term,
+    work: _SittingWork,
+    mp_link_ids: dict[int, str],
+    stored_sitting_ids: set[str],
+    options: PipelineOptions,
+) -> None:
+    """Scrape all votings and votes of a sitting into ``work``.
+
+    Once ``options.flush_rows`` is reached, the votes collected so far
+    are queued to the writer, and ``work`` only keeps those still to be
+    written when the sitting is done.
     """
+    sitting = work.sitting
+    try:
+        work.votings = await scrape.scrape_votings(
+            client=http_client,
+            term=term,
+            sitting=sitting,
+            from_voting=work.from_voting,
+            validators=work.validators,
+        )
+    except api_client.NotModifiedError:
+        if sitting.id in stored_sitting_ids:
+            logger.info(
+                "votings unchanged",
+                term=term.number,
+                sitting=sitting.number,
+            )
+            return
+        work.votings = await scrape.scrape_votings(
+            client=http_client,
+            term=term,
+            sitting=sitting,
+            from_voting=work.from_voting,
+        )
+
+    # A voting listed twice is scraped once, so that no vote is written
+    # twice, which `bulk_upsert` only allows for upserted votes.
+    started: set[str] = set(work.complete_voting_ids)
+    async with anyio.create_task_group() as tg:
+        for voting in work.votings.votings:
+            if voting.id in started:
+                continue
+            started.add(voting.id)
+            tg.start_soon(
+                functools.partial(
+                    _scrape_voting_votes,
+                    client=http_client,
+                    limiter=limiter,
+                    hedger=hedger,
+                    term=term,
+                    sitting=sitting,
+                    voting=voting,
+                    mp_link_ids=mp_link_ids,
+                    work=work,
+                    writer=writer,
+                    options=options,
+                )
+            )
+
+
+def _store_sitting(
+    database_client: sqlmodel.Session,
+    work: _SittingWork,
+) -> None:
+    """Commit a sitting and its days, before its votings are stored."""
     database.bulk_upsert(
         session=database_client,
         model=database.Sitting,
-        records=[sitting],
+        records=[work.sitting],
     )
     database.bulk_upsert(
         session=database_client,
         model=database.SittingDay,
-        records=sitting_days,
+        records=work.sitting_days,
+    )
+    _record_progress(
+        database_client,
+        [
+            database.ScrapeProgress(
+                id=work.sitting.id,
+                kind=database.UnitKind.SITTING,
+                parent_id=work.sitting.term_id,
+                status=database.UnitStatus.STARTED,
+                attempts=1,
+                duration_seconds=0.0,
+                response_bytes=0,
+            )
+        ],
+        new_attempt=True,
     )
     database_client.commit()
 
-    scraped_votings = await scrape.scrape_votings(
-        client=http_client,
-        term=term,
-        sitting=sitting,
-        from_voting=from_voting,
-    )
 
-    all_votes: list[database.VoteRecord] = []
-    all_detail_options: list[database.VotingOption] = []
+def _store_votings(
+    database_client: sqlmodel.Session,
+    term: database.Term,
+    work: _SittingWork,
+) -> None:
+    """Commit a sitting's votings together with their votes.
 
-    async with anyio.create_task_group() as tg:
-        for voting in scraped_votings.votings:
-            tg.start_soon(
-                _scrape_voting_votes,
-                http_client,
-                limiter,
-                term,
-                sitting,
-                voting,
-                mp_link_ids,
-                all_votes,
-                all_detail_options,
+    The sitting and its scraped votings are marked done in the ledger
+    in the same transaction. Votings already written in a chunk, or
+    skipped as complete, are left alone, so that their detail options
+    are not replaced by the options of the voting list.
+    """
+    _record_progress(
+        database_client,
+        [
+            database.ScrapeProgress(
+                id=work.sitting.id,
+                kind=database.UnitKind.SITTING,
+                parent_id=work.sitting.term_id,
+                status=database.UnitStatus.DONE,
+                attempts=1,
+                duration_seconds=work.duration_seconds,
+                response_bytes=work.response_bytes,
             )
-
+        ],
+        new_attempt=False,
+    )
+    if work.votings is None:
+        database_client.commit()
+        return
+    written = work.written_voting_ids | work.complete_voting_ids
     database.bulk_upsert(
         session=database_client,
         model=database.Voting,
-        records=scraped_votings.votings,
+        records=[v for v in work.votings.votings if v.id not in written],
     )
     database.bulk_upsert(
         session=database_client,
         model=database.VotingOption,
-        records=scraped_votings.voting_options,
+        records=[
+            o for o in work.votings.voting_options if o.voting_id not in written
+        ],
     )
     database.bulk_upsert(
         session=database_client,
         model=database.VotingOption,
-        records=all_detail_options,
+        records=work.detail_options,
     )
     database.bulk_upsert(
         session=database_client,
         model=database.VoteRecord,
-        records=all_votes,
+        records=work.votes,
+        insert_only=work.new,
     )
+    _record_progress(database_client, work.voting_progress, new_attempt=True)
+    _save_validators(database_client, work.validators)
     database_client.commit()
     logger.info(
         "scraped votings",
         term=term.number,
-        sitting=sitting.number,
-        count=len(scraped_votings.votings),
+        sitting=work.sitting.number,
+        count=len(work.votings.votings),
+    )
+
+
+def _stored_sitting_ids(
+    database_client: sqlmodel.Session,
+    term: database.Term,
+) -> set[str]:
+    """Return the ids of the term's sittings that have votings stored."""
+    return set(
+        database_client.exec(
+            sqlmodel.select(database.Voting.sitting_id)
+            .join(database.Sitting)
+            .where(database.Sitting.term_id == term.id)
+            .distinct()
+        )
+    )
+
+
+async def _process_sittings(
+    *,
+    http_client: httpx.AsyncClient,
+    writer: database_writer.DatabaseWriter,
+    limiter: concurrency.AdaptiveLimiter,
+    hedger: concurrency.Hedger | None,
+    term: database.Term,
+    works: list[_SittingWork],
+    mp_link_ids: dict[int, str],
+    options: PipelineOptions,
+) -> None:
+    """Scrape a term's sittings and queue them to be stored.
+
+    Up to `SITTING_LOOKAHEAD` sittings are fetched at once, so requests
+    for the next sitting keep the API busy while earlier ones finish or
+    are written. Writes are queued to the writer strictly in order: a
+    sitting row is committed once every sitting before it is complete,
+    and its votings are committed together with their votes, in chunks
+    of finished votings while a long sitting is fetched and the rest
+    once all of its network I/O has finished. This keeps the database
+    consistent with the resume logic: a crash mid-sitting leaves the
+    last stored sitting marked started in the ledger, or, without
+    chunks, without votings, so `resume_pipeline` restarts from that
+    sitting instead of skipping the unfinished work. For the same
+    reason an unchanged voting list only skips the sitting if its
+    votings were already stored.
+    """
+    stored_sitting_ids = await writer.run(
+        functools.partial(_stored_sitting_ids, term=term)
+    )
+    for work in works:
+        work.new = work.sitting.id not in stored_sitting_ids
+
+    lookahead = anyio.Semaphore(SITTING_LOOKAHEAD)
+    async with anyio.create_task_group() as tg:
+
+        async def fetch_all() -> None:
+            for work in works:
+                await lookahead.acquire()
+                tg.start_soon(
+                    functools.partial(
+                        _fetch_sitting,
+                        http_client=http_client,
+                        writer=writer,
+                        limiter=limiter,
+                        hedger=hedger,
+                        term=term,
+                        work=work,
+                        mp_link_ids=mp_link_ids,
+                        stored_sitting_ids=stored_sitting_ids,
+                        options=options,
+                    )
+                )
+
+        tg.start_soon(fetch_all)
+        for work in works:
+            await writer.submit(functools.partial(_store_sitting, work=work))
+            work.queued.set()
+            await work.fetched.wait()
+            await writer.submit(
+                functools.partial(_store_votings, term=term, work=work)
+            )
+            lookahead.release()
+
+
+def _stored_mp_link_ids(
+    database_client: sqlmodel.Session,
+    term: database.Term,
+) -> dict[int, str]:
+    """Return the stored MpToTermLink key of each of the term's MPs."""
+    return {
+        link.in_term_id: link.id
+        for link in database_client.exec(
+            sqlmodel.select(database.MpToTermLink).where(
+                database.MpToTermLink.term_id == term.id
+            )
+        )
+    }
+
+
+def _store_mps(
+    database_client: sqlmodel.Session,
+    *,
+    term: database.Term,
+    scraped_mps: scrape.ScrapedMpsResult,
+    validators: api_client.ValidatorStore | None,
+) -> None:
+    database.bulk_upsert(
+        session=database_client,
+        model=database.Mp,
+        records=scraped_mps.mps,
+    )
+    database.bulk_upsert(
+        session=database_client,
+        model=database.MpToTermLink,
+        records=scraped_mps.mp_to_term_links,
+    )
+    _save_validators(database_client, validators)
+    database_client.commit()
+    logger.info(
+        "scraped mps",
+        term=term.number,
+        mp_count=len(scraped_mps.mps),
+    )
+
+
+async def _fetch_mps(
+    *,
+    http_client: httpx.AsyncClient,
+    writer: database_writer.DatabaseWriter,
+    term: database.Term,
+    validators: api_client.ValidatorStore | None,
+) -> tuple[dict[int, str], _Write | None]:
+    """Scrape a term's MPs, without storing them yet.
+
+    Returns:
+        Mapping of each MP's term-scoped id to their MpToTermLink key,
+        and the write storing the MPs, or None if they are stored.
+    """
+    try:
+        scraped_mps = await scrape.scrape_mps(
+            client=http_client, term=term, validators=validators
+        )
+    except api_client.NotModifiedError:
+        stored_link_ids = await writer.run(
+            functools.partial(_stored_mp_link_ids, term=term)
+        )
+        if stored_link_ids:
+            logger.info("mps unchanged", term=term.number)
+            return stored_link_ids, None
+        scraped_mps = await scrape.scrape_mps(client=http_client, term=term)
+    link_ids = {
+        link.in_term_id: link.id for link in scraped_mps.mp_to_term_links
+    }
+    return link_ids, functools.partial(
+        _store_mps,
+        term=term,
+        scraped_mps=scraped_mps,
+        validators=validators,
+    )
+
+
+async def _process_mps(
+    *,
+    http_client: httpx.AsyncClient,
+    writer: database_writer.DatabaseWriter,
+    term: database.Term,
+    validators: api_client.ValidatorStore | None,
+) -> dict[int, str]:
+    """Scrape a term's MPs and queue them to be stored.
+
+    Returns:
+        Mapping of each MP's term-scoped id to their MpToTermLink key.
+    """
+    link_ids, store = await _fetch_mps(
+        http_client=http_client,
+        writer=writer,
+        term=term,
+        validators=validators,
+    )
+    if store is not None:
+        await writer.submit(store)
+    return link_ids
+
+
+def _has_clubs(database_client: sqlmodel.Session, term: database.Term) -> bool:
+    """Whether any of the term's clubs are stored."""
+    return (
+        database_client.exec(
+            sqlmodel.select(database.Club.id).where(
+                database.Club.term_id == term.id
+            )
+        ).first()
+        is not None
+    )
+
+
+def _store_clubs(
+    database_client: sqlmodel.Session,
+    *,
+    term: database.Term,
+    clubs: list[database.Club],
+    validators: api_client.ValidatorStore | None,
+) -> None:
+    database.bulk_upsert(
+        session=database_client,
+        model=database.Club,
+        records=clubs,
+    )
+    _save_validators(database_client, validators)
+    database_client.commit()
+    logger.info(
+        "scraped clubs",
+        term=term.number,
+        club_count=len(clubs),
     )
 
 
+async def _fetch_clubs(
+    *,
+    http_client: httpx.AsyncClient,
+    writer: database_writer.DatabaseWriter,
+    term: database.Term,
+    validators: api_client.ValidatorStore | None,
+) -> _Write | None:
+    """Scrape a term's clubs, returning the write that stores them.
+
+    Returns:
+        The write storing the clubs, or None if they are stored.
+    """
+    try:
+        scraped_clubs = await scrape.scrape_clubs(
+            client=http_client, term=term, validators=validators
+        )
+    except api_client.NotModifiedError:
+        if await writer.run(functools.partial(_has_clubs, term=term)):
+            logger.info("clubs unchanged", term=term.number)
+            return None
+        scraped_clubs = await scrape.scrape_clubs(client=http_client, term=term)
+    return functools.partial(
+        _store_clubs,
+        term=term,
+        clubs=scraped_clubs,
+        validators=validators,
+    )
+
+
+async def _scrape_term_sittings(
+    *,
+    http_client: httpx.AsyncClient,
+    term: database.Term,
+    from_sitting: int | None = None,
+) -> scrape.ScrapedSittingsResult:
+    """Scrape a term's sittings, from its voting table if it has none.
+
+    For the terms in `TERMS_WITHOUT_PROCEEDINGS`, the voting table is
+    requested alongside the sitting list rather than after it.
+    """
+    async with anyio.create_task_group() as tg:
+        if term.number in TERMS_WITHOUT_PROCEEDINGS:
+            # The client shares the response with the identical request
+            # made when discovering the sittings below.
+            tg.start_soon(
+                functools.partial(
+                    api_client.fetch_voting_table,
+                    client=http_client,
+                    term=term.number,
+                )
+            )
+        scraped_sittings = await scrape.scrape_sittings(
+            client=http_client, term=term, from_sitting=from_sitting
+        )
+    if scraped_sittings.sittings:
+        return scraped_sittings
+    scraped_sittings = await scrape.discover_sittings_from_votings(
+        client=http_client, term=term, from_sitting=from_sitting
+    )
+    if scraped_sittings.sittings:
+        logger.info(
+            "discovered sittings from voting table",
+            term=term.number,
+            count=len(scraped_sittings.sittings),
+        )
+    return scraped_sittings
+
+
+def _store_term(database_client: sqlmodel.Session, term: database.Term) -> None:
+    database.bulk_upsert(
+        session=database_client,
+        model=database.Term,
+        records=[term],
+    )
+    _record_progress(
+        database_client,
+        [
+            database.ScrapeProgress(
+                id=term.id,
+                kind=database.UnitKind.TERM,
+                parent_id=None,
+                status=database.UnitStatus.STARTED,
+                attempts=1,
+                duration_seconds=0.0,
+                response_bytes=0,
+            )
+        ],
+        new_attempt=True,
+    )
+    database_client.commit()
+
+
+def _finish_term(
+    database_client: sqlmodel.Session,
+    term: database.Term,
+    *,
+    duration_seconds: float,
+    response_bytes: int,
+) -> None:
+    """Mark a term done, once everything in it has been stored."""
+    _record_progress(
+        database_client,
+        [
+            database.ScrapeProgress(
+                id=term.id,
+                kind=database.UnitKind.TERM,
+                parent_id=None,
+                status=database.UnitStatus.DONE,
+                attempts=1,
+                duration_seconds=duration_seconds,
+                response_bytes=response_bytes,
+            )
+        ],
+        new_attempt=False,
+    )
+    database_client.commit()
+
+
+async def _process_term(
+    *,
+    http_client: httpx.AsyncClient,
+    writer: database_writer.DatabaseWriter,
+    limiter: concurrency.AdaptiveLimiter,
+    hedger: concurrency.Hedger | None,
+    term: database.Term,
+    start: TermStart,
+    done_units: frozenset[str],
+    validators: api_client.ValidatorStore | None,
+    options: PipelineOptions,
+) -> None:
+    """Scrape a term and queue everything in it to be stored.
+
+    Sittings and votings in ``done_units`` are skipped, and the term is
+    marked done once everything else in it has been queued. A term in
+    ``done_units`` is only skipped once it has ended, as until then it
+    gains new sittings; its done sittings are still skipped.
+    """
+    if term.id in done_units and term.to_date is not None:
+        logger.info("term already done", term=term.number)
+        return
+    started = time.monotonic()
+    with api_client.count_bytes() as received:
+        await _scrape_term(
+            http_client=http_client,
+            writer=writer,
+            limiter=limiter,
+            hedger=hedger,
+            term=term,
+            start=start,
+            done_units=done_units,
+            validators=validators,
+            options=options,
+        )
+    await writer.submit(
+        functools.partial(
+            _finish_term,
+            term=term,
+            duration_seconds=time.monotonic() - started,
+            response_bytes=received.total,
+        )
+    )
+
+
+async def _scrape_term(
+    *,
+    http_client: httpx.AsyncClient,
+    writer: database_writer.DatabaseWriter,
+    limiter: concurrency.AdaptiveLimiter,
+    hedger: concurrency.Hedger | None,
+    term: database.Term,
+    start: TermStart,
+    done_units: frozenset[str],
+    validators: api_client.ValidatorStore | None,
+    options: PipelineOptions,
+) -> None:
+    await writer.submit(functools.partial(_store_term, term=term))
+
+    # Mps, clubs and sittings are independent lists, so they are fetched
+    # at once; their writes are still queued in that order.
+    mp_link_ids: dict[int, str] = {}
+    store_mps: _Write | None = None
+    store_clubs: _Write | None = None
+    scraped_sittings = scrape.ScrapedSittingsResult(
+        sittings=[], sitting_days=[]
+    )
+
+    async def fetch_mps() -> None:
+        nonlocal mp_link_ids, store_mps
+        mp_link_ids, store_mps = await _fetch_mps(
+            http_client=http_client,
+            writer=writer,
+            term=term,
+            validators=validators.fork() if validators is not None else None,
+        )
+
+    async def fetch_clubs() -> None:
+        nonlocal store_clubs
+        store_clubs = await _fetch_clubs(
+            http_client=http_client,
+            writer=writer,
+            term=term,
+            validators=validators.fork() if validators is not None else None,
+        )
+
+    async def fetch_sittings() -> None:
+        nonlocal scraped_sittings
+        scraped_sittings = await _scrape_term_sittings(
+            http_client=http_client, term=term, from_sitting=start.sitting
+        )
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(fetch_mps)
+        tg.start_soon(fetch_clubs)
+        tg.start_soon(fetch_sittings)
+    for store in (store_mps, store_clubs):
+        if store is not None:
+            await writer.submit(store)
+
+    logger.info(
+        "scraped sittings",
+        term=term.number,
+        count=len(scraped_sittings.sittings),
+    )
+
+    sittings = sorted(scraped_sittings.sittings, key=lambda s: s.number)
+    days_by_sitting: dict[str, list[database.SittingDay]] = {}
+    for day in scraped_sittings.sitting_days:
+        days_by_sitting.setdefault(day.sitting_id, []).append(day)
+
+    # Votings & Votes
+    await _process_sittings(
+        http_client=http_client,
+        writer=writer,
+        limiter=limiter,
+        hedger=hedger,
+        term=term,
+        works=[
+            _SittingWork(
+                sitting=sitting,
+                sitting_days=days_by_sitting.get(sitting.id, []),
+                from_voting=start.voting
+                if sitting.number == start.sitting
+                else None,
+                validators=validators.fork()
+                if validators is not None
+                else None,
+                complete_voting_ids=done_units,
+            )
+            for sitting in sittings
+            if sitting.id not in done_units
+            and (options.shard is None or options.shard.owns(sitting))
+        ],
+        mp_link_ids=mp_link_ids,
+        options=options,
+    )
+
+
+@dataclass
+class _Run:
+    """What the work of one pipeline run shares."""
+
+    http_client: httpx.AsyncClient
+    writer: database_writer.DatabaseWriter
+    limiter: concurrency.AdaptiveLimiter
+    hedger: concurrency.Hedger | None
+
+
+@contextlib.asynccontextmanager
+async def _open_run(
+    *,
+    engine: Engine,
+    http_client: httpx.AsyncClient | None,
+    options: PipelineOptions,
+) -> AsyncIterator[_Run]:
+    """Set up a run, creating (and closing) an HTTP client if none is given."""
+    database.create_db_and_tables(
+        engine=engine, foreign_keys=not options.bulk_load
+    )
+    async with contextlib.AsyncExitStack() as stack:
+        if http_client is None:
+            http_client = await stack.enter_async_context(
+                httpx.AsyncClient(transport=api_client.create_transport())
+            )
+        yield _Run(
+            http_client=http_client,
+            writer=await stack.enter_async_context(
+                database_writer.DatabaseWriter(engine)
+            ),
+            limiter=concurrency.AdaptiveLimiter(
+                initial_limit=INITIAL_CONCURRENT_VOTE_REQUESTS,
+                max_limit=MAX_CONCURRENT_VOTE_REQUESTS,
+            ),
+            hedger=concurrency.Hedger(percentile=options.hedge_percentile)
+            if options.hedge_percentile is not None
+            else None,
+        )
+
+
 async def pipeline(
     *,
     engine: Engine | None = None,
+    http_client: httpx.AsyncClient | None = None,
+    options: PipelineOptions | None = None,
     from_term: int | None = None,
     from_sitting: int | None = None,
     from_voting: int | None = None,
+    term_starts: Mapping[int, TermStart] | None = None,
+    done_units: Collection[str] = frozenset(),
 ) -> None:
     """Run the full scraping pipeline.
 
     Records are committed in the same order and granularity that
-    `resume_pipeline` uses to infer the resume point: each term and
-    sitting is committed when processing of it starts, and a sitting's
-    votings are committed atomically with their votes once complete.
+    `resume_pipeline` uses to infer the resume point: each term is
+    committed when processing of it starts, and a term's sittings are
+    committed in order, each atomically with its votings and votes once
+    complete. Terms processed concurrently start in ascending order.
 
     Args:
         engine: SQLAlchemy engine to use. Defaults to a new engine
             with the default DuckDB URL.
+        http_client: HTTP client to fetch with, e.g. one routed through
+            a response cache. Defaults to a plain client owned and
+            closed by the pipeline.
+        options: Optional behaviours; defaults to `PipelineOptions()`.
         from_term: Start scraping from this term number onwards.
         from_sitting: Start scraping from this sitting number onwards
             (requires from_term).
         from_voting: Start scraping from this voting number onwards
             (requires from_term and from_sitting).
+        term_starts: Where to start within each term, by term number,
+            in place of from_sitting and from_voting. Terms missing
+            from it are scraped whole.
+        done_units: Keys of terms, sittings and votings an earlier run
+            finished (see `database.ScrapeProgress`), which are skipped.
 
     Raises:
         ValueError: If from_voting is set without from_sitting/from_term,
             or from_sitting is set without from_term.
+        database.ForeignKeyViolationError: If ``options.bulk_load`` is
+            set and the loaded rows refer to missing keys.
     """
     if from_voting is not None and (from_sitting is None or from_term is None):
         msg = (
@@ -168,173 +1245,201 @@ async def pipeline(
 
     if engine is None:
         engine = database.get_engine()
+    if options is None:
+        options = PipelineOptions()
 
-    database.create_db_and_tables(engine=engine)
+    async with _open_run(
+        engine=engine, http_client=http_client, options=options
+    ) as run:
+        validators = (
+            await run.writer.run(_load_validators)
+            if options.conditional
+            else None
+        )
 
-    limiter = anyio.CapacityLimiter(MAX_CONCURRENT_VOTE_REQUESTS)
+        # Terms
+        terms = await scrape.scrape_terms(
+            client=run.http_client, from_term=from_term
+        )
+        # Process in ascending order so the highest committed
+        # term number is always the last one started.
+        terms.sort(key=lambda t: t.number)
+        logger.info("scraped terms", count=len(terms))
 
-    async with httpx.AsyncClient() as http_client:
-        with sqlmodel.Session(engine) as database_client:
-            # Terms
-            terms = await scrape.scrape_terms(
-                client=http_client, from_term=from_term
-            )
-            # Process in ascending order so the highest committed
-            # term number is always the last one started.
-            terms.sort(key=lambda t: t.number)
-            logger.info("scraped terms", count=len(terms))
+        process_term = functools.partial(
+            _process_term,
+            http_client=run.http_client,
+            writer=run.writer,
+            limiter=run.limiter,
+            hedger=run.hedger,
+            done_units=frozenset(done_units),
+            validators=validators,
+            options=options,
+        )
+
+        def term_start(term: database.Term) -> TermStart:
+            if term_starts is not None:
+                return term_starts.get(term.number, TermStart())
+            if term.number == from_term:
+                return TermStart(sitting=from_sitting, voting=from_voting)
+            return TermStart()
 
+        if options.concurrent_terms == 1:
             for term in terms:
-                database.bulk_upsert(
-                    session=database_client,
-                    model=database.Term,
-                    records=[term],
-                )
-                database_client.commit()
+                await process_term(term=term, start=term_start(term))
+        else:
+            # The limiter is fair, so terms still start in order.
+            term_slots = anyio.CapacityLimiter(options.concurrent_terms)
 
-                # Mps & Clubs
-                scraped_mps = await scrape.scrape_mps(
-                    client=http_client, term=term
-                )
-                database.bulk_upsert(
-                    session=database_client,
-                    model=database.Mp,
-                    records=scraped_mps.mps,
-                )
-                database.bulk_upsert(
-                    session=database_client,
-                    model=database.MpToTermLink,
-                    records=scraped_mps.mp_to_term_links,
-                )
-                database_client.commit()
-                logger.info(
-                    "scraped mps",
-                    term=term.number,
-                    mp_count=len(scraped_mps.mps),
-                )
-                mp_link_ids = {
-                    link.in_term_id: link.id
-                    for link in scraped_mps.mp_to_term_links
-                }
+            async def process_term_in_slot(term: database.Term) -> None:
+                async with term_slots:
+                    await process_term(term=term, start=term_start(term))
 
-                scraped_clubs = await scrape.scrape_clubs(
-                    client=http_client, term=term
-                )
-                database.bulk_upsert(
-                    session=database_client,
-                    model=database.Club,
-                    records=scraped_clubs,
-                )
-                database_client.commit()
-                logger.info(
-                    "scraped clubs",
-                    term=term.number,
-                    club_count=len(scraped_clubs),
-                )
+            async with anyio.create_task_group() as tg:
+                for term in terms:
+                    tg.start_soon(process_term_in_slot, term)
 
-                # Sittings
-                effective_from_sitting = (
-                    from_sitting if term.number == from_term else None
-                )
-                scraped_sittings = await scrape.scrape_sittings(
-                    client=http_client,
-                    term=term,
-                    from_sitting=effective_from_sitting,
-                )
-                if not scraped_sittings.sittings:
-                    scraped_sittings = (
-                        await scrape.discover_sittings_from_votings(
-                            client=http_client,
-                            term=term,
-                            from_sitting=effective_from_sitting,
-                        )
-                    )
-                    if scraped_sittings.sittings:
-                        logger.info(
-                            "discovered sittings from voting table",
-                            term=term.number,
-                            count=len(scraped_sittings.sittings),
-                        )
-                logger.info(
-                    "scraped sittings",
-                    term=term.number,
-                    count=len(scraped_sittings.sittings),
-                )
+    if options.bulk_load:
+        logger.info("checking and adding foreign keys")
+        database.add_foreign_keys(engine=engine)
 
-                sittings = sorted(
-                    scraped_sittings.sittings, key=lambda s: s.number
-                )
-                days_by_sitting: dict[str, list[database.SittingDay]] = {}
-                for day in scraped_sittings.sitting_days:
-                    days_by_sitting.setdefault(day.sitting_id, []).append(day)
 
-                # Votings & Votes
-                for sitting in sittings:
-                    await _process_sitting(
-                        http_client=http_client,
-                        database_client=database_client,
-                        limiter=limiter,
-                        term=term,
-                        sitting=sitting,
-                        sitting_days=days_by_sitting.get(sitting.id, []),
-                        mp_link_ids=mp_link_ids,
-                        from_voting=from_voting
-                        if term.number == from_term
-                        and sitting.number == from_sitting
-                        else None,
-                    )
+def _stored_term_start(
+    database_client: sqlmodel.Session,
+    term: database.Term,
+) -> TermStart:
+    """Return where to resume a term: its last stored sitting and voting."""
+    last_sitting = database_client.exec(
+        sqlmodel.select(database.Sitting)
+        .where(database.Sitting.term_id == term.id)
+        .order_by(sqlmodel.desc(database.Sitting.number))
+    ).first()
+    if last_sitting is None:
+        return TermStart()
+    last_voting = database_client.exec(
+        sqlmodel.select(database.Voting)
+        .where(database.Voting.sitting_id == last_sitting.id)
+        .order_by(sqlmodel.desc(database.Voting.number))
+    ).first()
+    return TermStart(
+        sitting=last_sitting.number,
+        voting=last_voting.number if last_voting is not None else None,
+    )
 
 
-async def resume_pipeline(*, engine: Engine | None = None) -> None:
+async def resume_pipeline(
+    *,
+    engine: Engine | None = None,
+    http_client: httpx.AsyncClient | None = None,
+    options: PipelineOptions | None = None,
+) -> None:
     """Resume the scraping pipeline from the last completed point.
 
-    Queries the database for the most recent term, sitting, and voting,
-    then resumes the pipeline from that point. The most recent unit is
-    re-scraped (upserts make this idempotent), since it may have been
-    interrupted mid-way.
+    If the database has a progress ledger (`database.ScrapeProgress`),
+    the pipeline is rerun from the first stored term not recorded as
+    done, skipping exactly the terms, sittings and votings that are.
+
+    Databases written before the ledger existed fall back to inferring
+    the resume point: the most recent term, sitting, and voting are
+    queried and the pipeline resumes from that point. The most recent
+    unit is re-scraped (upserts make this idempotent), since it may
+    have been interrupted mid-way. With ``options.concurrent_terms``
+    above one, any stored term may be unfinished, so every stored term
+    resumes from its own most recent sitting and voting instead.
 
     Args:
         engine: SQLAlchemy engine to use. Defaults to a new engine
             with the default DuckDB URL.
+        http_client: HTTP client passed through to `pipeline`.
+        options: Optional behaviours passed through to `pipeline`.
     """
     if engine is None:
         engine = database.get_engine()
 
-    database.create_db_and_tables(engine=engine)
+    database.create_db_and_tables(
+        engine=engine,
+        foreign_keys=options is None or not options.bulk_load,
+    )
 
     from_term: int | None = None
     from_sitting: int | None = None
     from_voting: int | None = None
 
     with sqlmodel.Session(engine) as database_client:
-        last_term = database_client.exec(
-            sqlmodel.select(database.Term).order_by(
-                sqlmodel.desc(database.Term.number)
+        done_units = database.done_units(database_client)
+        ledger_term: int | None = None
+        if database_client.exec(
+            sqlmodel.select(database.ScrapeProgress.id).limit(1)
+        ).first():
+            # The first unfinished term, or the last one if all are
+            # done, so that newer terms are picked up.
+            ledger_term = (
+                database_client.exec(
+                    sqlmodel.select(
+                        sqlmodel.func.min(database.Term.number)
+                    ).where(sqlmodel.col(database.Term.id).not_in(done_units))
+                ).one()
+                or database_client.exec(
+                    sqlmodel.select(sqlmodel.func.max(database.Term.number))
+                ).one()
             )
-        ).first()
-        if last_term is not None:
-            from_term = last_term.number
-            last_sitting = database_client.exec(
-                sqlmodel.select(database.Sitting)
-                .where(database.Sitting.term_id == last_term.id)
-                .order_by(sqlmodel.desc(database.Sitting.number))
+        if ledger_term is not None:
+            term_starts = None
+        elif options is not None and options.concurrent_terms > 1:
+            # Several terms may have been cut short, so each stored term
+            # resumes from its own last sitting.
+            term_starts = {
+                term.number: _stored_term_start(database_client, term)
+                for term in database_client.exec(sqlmodel.select(database.Term))
+            }
+        else:
+            term_starts = None
+            last_term = database_client.exec(
+                sqlmodel.select(database.Term).order_by(
+                    sqlmodel.desc(database.Term.number)
+                )
             ).first()
-            if last_sitting is not None:
-                from_sitting = last_sitting.number
-                last_voting = database_client.exec(
-                    sqlmodel.select(database.Voting)
-                    .where(database.Voting.sitting_id == last_sitting.id)
-                    .order_by(sqlmodel.desc(database.Voting.number))
-                ).first()
-                if last_voting is not None:
-                    from_voting = last_voting.number
+            if last_term is not None:
+                from_term = last_term.number
+                start = _stored_term_start(database_client, last_term)
+                from_sitting, from_voting = start.sitting, start.voting
+
+    if ledger_term is not None:
+        logger.info(
+            "resuming pipeline from progress ledger",
+            term=ledger_term,
+            done_units=len(done_units),
+        )
+        await pipeline(
+            engine=engine,
+            http_client=http_client,
+            options=options,
+            from_term=ledger_term,
+            done_units=done_units,
+        )
+        return
+    if term_starts:
+        logger.info("resuming pipeline", terms=sorted(term_starts))
+        await pipeline(
+            engine=engine,
+            http_client=http_client,
+            options=options,
+            from_term=min(term_starts),
+            term_starts=term_starts,
+        )
+        return
 
     if from_term is None:
         logger.info("no existing data found, starting fresh pipeline")
-        await pipeline(engine=engine)
+        await pipeline(engine=engine, http_client=http_client, options=options)
     elif from_sitting is None:
         logger.info("resuming pipeline", term=from_term)
-        await pipeline(engine=engine, from_term=from_term)
+        await pipeline(
+            engine=engine,
+            http_client=http_client,
+            options=options,
+            from_term=from_term,
+        )
     elif from_voting is None:
         logger.info(
             "resuming pipeline",
@@ -343,6 +1448,8 @@ async def resume_pipeline(*, engine: Engine | None = None) -> None:
         )
         await pipeline(
             engine=engine,
+            http_client=http_client,
+            options=options,
             from_term=from_term,
             from_sitting=from_sitting,
         )
@@ -355,7 +1462,382 @@ async def resume_pipeline(*, engine: Engine | None = None) -> None:
         )
         await pipeline(
             engine=engine,
+            http_client=http_client,
+            options=options,
             from_term=from_term,
             from_sitting=from_sitting,
             from_voting=from_voting,
         )
+
+
+def _stored_votings(
+    database_client: sqlmodel.Session,
+    term: database.Term,
+) -> dict[int, dict[str, bool]]:
+    """Return the term's stored votings, by sitting number.
+
+    Returns:
+        For each sitting number, whether each stored voting (by key) has
+        all its votes stored: whether the progress ledger records it as
+        done. A voting streamed in part has some votes stored, but is
+        not. Votings stored before the ledger existed, of sittings it
+        does not record as started, count as complete if they have any
+        votes.
+    """
+    done = (
+        sqlmodel.select(database.ScrapeProgress.id)
+        .where(
+            database.ScrapeProgress.id == database.Voting.id,
+            database.ScrapeProgress.status == database.UnitStatus.DONE,
+        )
+        .exists()
+    )
+    sitting_started = (
+        sqlmodel.select(database.ScrapeProgress.id)
+        .where(
+            database.ScrapeProgress.id == database.Voting.sitting_id,
+            database.ScrapeProgress.status == database.UnitStatus.STARTED,
+        )
+        .exists()
+    )
+    has_votes = (
+        sqlmodel.select(database.VoteRecord.id)
+        .join(database.VotingOption)
+        .where(database.VotingOption.voting_id == database.Voting.id)
+        .exists()
+    )
+    complete = sqlmodel.or_(
+        done, sqlmodel.and_(has_votes, sqlmodel.not_(sitting_started))
+    )
+    stored: dict[int, dict[str, bool]] = {}
+    for sitting_number, voting_id, voting_complete in database_client.exec(
+        sqlmodel.select(database.Sitting.number, database.Voting.id, complete)
+        .join(database.Sitting)
+        .where(database.Sitting.term_id == term.id)
+    ):
+        stored.setdefault(sitting_number, {})[voting_id] = voting_complete
+    return stored
+
+
+def _listed_votings(
+    database_client: sqlmodel.Session,
+    term: database.Term,
+) -> dict[int, int]:
+    """Return the voting counts the term's sittings were filled in for.
+
+    Returns:
+        For each sitting number the gap fill scraped, how many votings
+        the voting table listed for it then.
+    """
+    return dict(
+        database_client.exec(
+            sqlmodel.select(
+                database.Sitting.number,
+                database.ScrapeProgress.listed_votings,
+            )
+            .join(
+                database.ScrapeProgress,
+                sqlmodel.col(database.ScrapeProgress.id) == database.Sitting.id,
+            )
+            .where(
+                database.Sitting.term_id == term.id,
+                sqlmodel.col(database.ScrapeProgress.listed_votings).is_not(
+                    None
+                ),
+            )
+        ).all()
+    )
+
+
+def _record_listed_votings(
+    database_client: sqlmodel.Session,
+    counts: dict[str, int],
+) -> None:
+    """Record how many votings the voting table listed for sittings."""
+    units = database_client.exec(
+        sqlmodel.select(database.ScrapeProgress).where(
+            sqlmodel.col(database.ScrapeProgress.id).in_(counts)
+        )
+    ).all()
+    database.bulk_upsert(
+        session=database_client,
+        model=database.ScrapeProgress,
+        records=[
+            unit.model_copy(update={"listed_votings": counts[unit.id]})
+            for unit in units
+        ],
+    )
+    database_client.commit()
+
+
+async def _fill_term_gaps(
+    *,
+    run: _Run,
+    term: database.Term,
+    options: PipelineOptions,
+    mp_validators: api_client.ValidatorStore | None = None,
+) -> None:
+    """Scrape the votings of a term missing from the database.
+
+    The voting table lists how many votings each sitting had; a sitting
+    with fewer votings stored, or with votings whose votes are not all
+    stored (see `_stored_votings`), is scraped again, fetching votes
+    only for those votings. The others are left as stored.
+    As the API lists some votings twice, a sitting may still have fewer
+    votings stored afterwards; the count it was filled in for is kept
+    in the ledger, and it is only scraped again for a different count.
+    With ``mp_validators``, the MP list is requested conditionally and
+    the stored MPs are used if it is unchanged.
+    """
+    entries = await api_client.fetch_voting_table(
+        client=run.http_client, term=term.number
+    )
+    expected: dict[int, int] = {}
+    for entry in entries:
+        expected[entry.proceeding] = (
+            expected.get(entry.proceeding, 0) + entry.votings_num
+        )
+    stored = await run.writer.run(functools.partial(_stored_votings, term=term))
+    listed = await run.writer.run(functools.partial(_listed_votings, term=term))
+    gaps = {
+        number
+        for number, count in expected.items()
+        if (len(stored.get(number, {})) < count and listed.get(number) != count)
+        or not all(stored.get(number, {}).values())
+    }
+    logger.info(
+        "found voting gaps",
+        term=term.number,
+        sittings=sorted(gaps),
+    )
+    if not gaps:
+        return
+
+    # The sittings and MPs are fetched again rather than read back, in
+    # case a gap is a sitting, or votes of an MP, not stored at all.
+    scraped_sittings = await _scrape_term_sittings(
+        http_client=run.http_client, term=term
+    )
+    mp_link_ids = await _process_mps(
+        http_client=run.http_client,
+        writer=run.writer,
+        term=term,
+        validators=mp_validators,
+    )
+    days_by_sitting: dict[str, list[database.SittingDay]] = {}
+    for day in scraped_sittings.sitting_days:
+        days_by_sitting.setdefault(day.sitting_id, []).append(day)
+    filled = sorted(
+        (s for s in scraped_sittings.sittings if s.number in gaps),
+        key=lambda s: s.number,
+    )
+    await _process_sittings(
+        http_client=run.http_client,
+        writer=run.writer,
+        limiter=run.limiter,
+        hedger=run.hedger,
+        term=term,
+        works=[
+            _SittingWork(
+                sitting=sitting,
+                sitting_days=days_by_sitting.get(sitting.id, []),
+                from_voting=None,
+                validators=None,
+                complete_voting_ids=frozenset(
+                    voting_id
+                    for voting_id, has_votes in stored.get(
+                        sitting.number, {}
+                    ).items()
+                    if has_votes
+                ),
+            )
+            for sitting in filled
+        ],
+        mp_link_ids=mp_link_ids,
+        options=options,
+    )
+    await run.writer.run(
+        functools.partial(
+            _record_listed_votings,
+            counts={sitting.id: expected[sitting.number] for sitting in filled},
+        )
+    )
+
+
+async def gap_fill_pipeline(
+    *,
+    engine: Engine | None = None,
+    http_client: httpx.AsyncClient | None = None,
+    options: PipelineOptions | None = None,
+    terms: Sequence[int] | None = None,
+) -> None:
+    """Scrape only the votings and votes missing from the database.
+
+    Unlike `resume_pipeline`, which continues after the most recent
+    stored voting, this finds holes anywhere in a term, such as those
+    left by earlier failed runs or by votings published late. Each term
+    costs a single request when nothing is missing.
+
+    Args:
+        engine: SQLAlchemy engine to use. Defaults to a new engine
+            with the default DuckDB URL.
+        http_client: HTTP client to fetch with. Defaults to a plain
+            client owned and closed by the pipeline.
+        options: Optional behaviours; ``conditional`` does not apply,
+            as a gap is worth filling even in an unchanged list.
+        terms: Numbers of the stored terms to check. Defaults to the
+            most recent stored term.
+    """
+    if engine is None:
+        engine = database.get_engine()
+    if options is None:
+        options = PipelineOptions()
+
+    async with _open_run(
+        engine=engine, http_client=http_client, options=options
+    ) as run:
+        stored_terms = await run.writer.run(
+            lambda database_client: database_client.exec(
+                sqlmodel.select(database.Term).order_by(
+                    sqlmodel.desc(database.Term.number)
+                )
+            ).all()
+        )
+        if terms is None:
+            selected = stored_terms[:1]
+        else:
+            selected = [term for term in stored_terms if term.number in terms]
+        if not selected:
+            logger.info("no stored terms to fill gaps in")
+            return
+        for term in sorted(selected, key=lambda t: t.number):
+            await _fill_term_gaps(run=run, term=term, options=options)
+
+
+async def _scrape_new_terms(
+    *,
+    run: _Run,
+    term: database.Term,
+    options: PipelineOptions,
+) -> database.Term:
+    """Scrape the terms begun after ``term`` in full.
+
+    Returns:
+        The most recent term, to be watched from now on.
+    """
+    terms = await scrape.scrape_terms(
+        client=run.http_client, from_term=term.number
+    )
+    new_terms = [t for t in terms if t.number > term.number]
+    for new_term in sorted(new_terms, key=lambda t: t.number):
+        logger.info("found new term", term=new_term.number)
+        await _process_term(
+            http_client=run.http_client,
+            writer=run.writer,
+            limiter=run.limiter,
+            hedger=run.hedger,
+            term=new_term,
+            start=TermStart(),
+            done_units=frozenset(),
+            validators=None,
+            options=options,
+        )
+        term = new_term
+    return term
+
+
+def _watch_delay(*, interval: float, failures: int) -> float:
+    """Seconds to wait before the next poll, backing off on failures."""
+    delay = min(interval * 2**failures, max(interval, WATCH_MAX_BACKOFF))
+    # Not security relevant: only spreads the polls out.
+    return delay * random.uniform(1 - WATCH_JITTER, 1 + WATCH_JITTER)  # noqa: S311
+
+
+async def watch_pipeline(
+    *,
+    engine: Engine | None = None,
+    http_client: httpx.AsyncClient | None = None,
+    options: PipelineOptions | None = None,
+    interval: float = WATCH_INTERVAL,
+    polls: int | None = None,
+) -> None:
+    """Keep polling the current term and store new votings as they appear.
+
+    Each poll is a gap fill of the most recent stored term (see
+    `gap_fill_pipeline`), followed by a request for the term list, so a
+    poll with nothing new costs two requests: the term's voting table
+    and the list of later terms. When votings are missing, the MP list
+    is requested conditionally, so stored MPs are reused unless the
+    list changed. Clubs are not scraped again. A term begun while
+    watching is scraped in full, as `pipeline` would, and watched from
+    then on. The HTTP client and the database connection stay open
+    between polls.
+
+    A poll failing with an HTTP error is logged and retried later, each
+    consecutive failure doubling the wait, up to `WATCH_MAX_BACKOFF`.
+
+    Args:
+        engine: SQLAlchemy engine to use. Defaults to a new engine
+            with the default DuckDB URL.
+        http_client: HTTP client to fetch with. Defaults to a plain
+            client owned and closed by the pipeline.
+        options: Optional behaviours; as for `gap_fill_pipeline`,
+            ``conditional`` does not apply.
+        interval: Seconds between polls, varied by up to `WATCH_JITTER`.
+        polls: Stop after this many polls. Runs until cancelled by
+            default.
+    """
+    if engine is None:
+        engine = database.get_engine()
+    if options is None:
+        options = PipelineOptions()
+
+    async with _open_run(
+        engine=engine, http_client=http_client, options=options
+    ) as run:
+        term = await run.writer.run(
+            lambda database_client: database_client.exec(
+                sqlmodel.select(database.Term).order_by(
+                    sqlmodel.desc(database.Term.number)
+                )
+            ).first()
+        )
+        if term is None:
+            logger.info("no stored terms to watch, run a scrape first")
+            return
+        mp_validators = await run.writer.run(_load_validators)
+
+        failures = 0
+        poll = 0
+        while polls is None or poll < polls:
+            if poll:
+                delay = _watch_delay(interval=interval, failures=failures)
+                logger.info("waiting for next poll", seconds=round(delay))
+                await anyio.sleep(delay)
+            poll += 1
+            # The client would otherwise answer from its last response.
+            api_client.forget_responses(run.http_client)
+            try:
+                await _fill_term_gaps(
+                    run=run,
+                    term=term,
+                    options=options,
+                    mp_validators=mp_validators,
+                )
+                term = await _scrape_new_terms(
+                    run=run, term=term, options=options
+                )
+            except* (
+                httpx.HTTPError,
+                api_client.CircuitOpenError,
+                api_client.RetryBudgetExhaustedError,
+            ) as errors:
+                failures += 1
+                logger.warning(
+                    "poll failed",
+                    term=term.number,
+                    failures=failures,
+                    error=str(errors.exceptions[0]),
+                )
+            else:
+                failures = 0
@@ -0,0 +1,226 @@
+"""Dry-run estimate of the requests a scrape would make, and their time."""
+
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+import httpx
+import sqlmodel
+from sqlalchemy import Engine
+
+from sejm_scraper import api_client, database, scrape
+
+# Requests a scraped term makes besides those of its sittings: the MP,
+# club and sitting lists.
+TERM_LIST_REQUESTS = 3
+
+# Request rate assumed when none is given or measured.
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+
+
+class RateSource(StrEnum):
+    """Where the request rate of an estimate comes from."""
+
+    CONFIGURED = "configured"
+    MEASURED = "measured"
+    DEFAULT = "default"
+
+
+@dataclass
+class SittingPlan:
+    """Requests left to scrape one sitting.
+
+    Attributes:
+        number: Sitting number within the term.
+        votings: Votings the API's voting table lists for the sitting.
+        done_votings: Votings recorded as done in the progress ledger,
+            whose votes are not fetched again.
+        requests: The sitting's voting list, if the sitting is not done,
+            and one request per voting not done.
+    """
+
+    number: int
+    votings: int
+    done_votings: int
+    requests: int
+
+
+@dataclass
+class TermPlan:
+    """Requests left to scrape one term.
+
+    Attributes:
+        number: Term number.
+        requests: Requests for the term's lists and all its sittings;
+            zero if the term has ended and is recorded as done.
+        sittings: Plans of the sittings, in order.
+    """
+
+    number: int
+    requests: int
+    sittings: list[SittingPlan] = field(default_factory=list)
+
+
+@dataclass
+class Plan:
+    """Requests left for a scrape, and how long they should take.
+
+    Attributes:
+        terms: Plans of the terms, in order.
+        requests: All requests, including the one for the term list.
+        requests_per_second: Rate the estimate assumes.
+        rate_source: Whether the rate was given, measured from the
+            progress ledger of earlier runs, or the default rate.
+        estimated_seconds: Wall time of the requests at that rate.
+    """
+
+    terms: list[TermPlan]
+    requests: int
+    requests_per_second: float
+    rate_source: RateSource
+    estimated_seconds: float
+
+
+def _done_votings(database_client: sqlmodel.Session) -> dict[str, int]:
+    """Count the votings recorded as done, per sitting key."""
+    rows = database_client.exec(
+        sqlmodel.select(
+            database.ScrapeProgress.parent_id,
+            sqlmodel.func.count(),
+        )
+        .where(
+            database.ScrapeProgress.kind == database.UnitKind.VOTING,
+            database.ScrapeProgress.status == database.UnitStatus.DONE,
+        )
+        .group_by(database.ScrapeProgress.parent_id)
+    )
+    return {parent_id: count for parent_id, count in rows if parent_id}
+
+
+def _measured_rate(database_client: sqlmodel.Session) -> float | None:
+    """Requests per second of the sittings done by earlier runs.
+
+    A sitting's duration covers its voting list and the votes of all its
+    votings, so this is the throughput the pipeline achieved, including
+    the effect of the rate cap and of the API's response times.
+    """
+    sittings, seconds = database_client.exec(
+        sqlmodel.select(
+            sqlmodel.func.count(),
+            sqlmodel.func.sum(database.ScrapeProgress.duration_seconds),
+        ).where(
+            database.ScrapeProgress.kind == database.UnitKind.SITTING,
+            database.ScrapeProgress.status == database.UnitStatus.DONE,
+        )
+    ).one()
+    if not sittings or not seconds:
+        return None
+    votings = sum(_done_votings(database_client).values())
+    return (sittings + votings) / seconds
+
+
+async def plan_scrape(
+    *,
+    engine: Engine,
+    http_client: httpx.AsyncClient,
+    from_term: int | None = None,
+    requests_per_second: float | None = None,
+) -> Plan:
+    """Count the requests left for a scrape, using only list endpoints.
+
+    Fetches the term list and, for each term not yet done, its sitting
+    list and voting table, which gives the number of votings, and thus
+    of vote requests, of every sitting. Work recorded as done in the
+    progress ledger is subtracted the way `pipeline.resume_pipeline`
+    skips it. Conditional requests are not taken into account.
+
+    Args:
+        engine: Engine of the database to plan against.
+        http_client: HTTP client to fetch the lists with.
+        from_term: Only plan terms from this number onwards.
+        requests_per_second: Rate to estimate the time with. Defaults
+            to the rate measured from earlier runs, or failing that
+            `DEFAULT_REQUESTS_PER_SECOND`.
+
+    Returns:
+        The plan, per term and per sitting.
+    """
+    database.create_db_and_tables(engine=engine)
+    with sqlmodel.Session(engine) as database_client:
+        done_units = database.done_units(database_client)
+        done_votings = _done_votings(database_client)
+        measured_rate = _measured_rate(database_client)
+
+    terms = await scrape.scrape_terms(client=http_client, from_term=from_term)
+    term_plans = []
+    for term in sorted(terms, key=lambda t: t.number):
+        if term.id in done_units and term.to_date is not None:
+            term_plans.append(TermPlan(number=term.number, requests=0))
+            continue
+        term_plans.append(
+            await _plan_term(
+                http_client=http_client,
+                term=term,
+                done_units=done_units,
+                done_votings=done_votings,
+            )
+        )
+
+    if requests_per_second is not None:
+        rate, source = requests_per_second, RateSource.CONFIGURED
+    elif measured_rate is not None:
+        rate, source = measured_rate, RateSource.MEASURED
+    else:
+        rate = DEFAULT_REQUESTS_PER_SECOND
+        source = RateSource.DEFAULT
+    requests = 1 + sum(term_plan.requests for term_plan in term_plans)
+    return Plan(
+        terms=term_plans,
+        requests=requests,
+        requests_per_second=rate,
+        rate_source=source,
+        estimated_seconds=requests / rate,
+    )
+
+
+async def _plan_term(
+    *,
+    http_client: httpx.AsyncClient,
+    term: database.Term,
+    done_units: frozenset[str],
+    done_votings: dict[str, int],
+) -> TermPlan:
+    requests = TERM_LIST_REQUESTS
+    scraped_sittings = await scrape.scrape_sittings(
+        client=http_client, term=term
+    )
+    if not scraped_sittings.sittings:
+        # The pipeline falls back to the voting table, as here.
+        requests += 1
+        scraped_sittings = await scrape.discover_sittings_from_votings(
+            client=http_client, term=term
+        )
+    votings: dict[int, int] = {}
+    for entry in await api_client.fetch_voting_table(
+        client=http_client, term=term.number
+    ):
+        votings[entry.proceeding] = (
+            votings.get(entry.proceeding, 0) + entry.votings_num
+        )
+
+    sitting_plans = []
+    for sitting in sorted(scraped_sittings.sittings, key=lambda s: s.number):
+        count = votings.get(sitting.number, 0)
+        done = min(done_votings.get(sitting.id, 0), count)
+        sitting_requests = 0 if sitting.id in done_units else 1 + count - done
+        sitting_plans.append(
+            SittingPlan(
+                number=sitting.number,
+                votings=count,
+                done_votings=done,
+                requests=sitting_requests,
+            )
+        )
+        requests += sitting_requests
+    return TermPlan(
+        number=term.number, requests=requests, sittings=sitting_plans
+    )
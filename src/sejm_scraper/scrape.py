@@ -1,11 +1,17 @@
-from collections.abc import Mapping
+from collections.abc import Awaitable, Callable, Mapping
 from dataclasses import dataclass
 from itertools import groupby
 from operator import attrgetter
 
 import httpx
 
-from sejm_scraper import api_client, api_schemas, database, database_key_utils
+from sejm_scraper import (
+    api_client,
+    api_schemas,
+    concurrency,
+    database,
+    database_key_utils,
+)
 
 PLANNED_SITTING_NUMBER = 0
 
@@ -178,6 +184,7 @@ async def scrape_votings(
     term: database.Term,
     sitting: database.Sitting,
     from_voting: int | None = None,
+    validators: api_client.ValidatorStore | None = None,
 ) -> ScrapedVotingsResult:
     """Scrape votings and voting options for a sitting.
 
@@ -188,12 +195,19 @@ async def scrape_votings(
         term: Term database model.
         sitting: Sitting database model to scrape votings for.
         from_voting: If set, only include votings with number >= this value.
+        validators: If set, only scrape if the voting list has changed.
 
     Returns:
         Scraped votings and their associated voting options.
+
+    Raises:
+        api_client.NotModifiedError: If the voting list is unchanged.
     """
     votings = await api_client.fetch_votings(
-        client=client, term=term.number, sitting=sitting.number
+        client=client,
+        term=term.number,
+        sitting=sitting.number,
+        validators=validators,
     )
     if from_voting is not None:
         votings = [voting for voting in votings if voting.number >= from_voting]
@@ -271,17 +285,24 @@ async def scrape_votings(
 async def scrape_clubs(
     client: httpx.AsyncClient,
     term: database.Term,
+    validators: api_client.ValidatorStore | None = None,
 ) -> list[database.Club]:
     """Scrape clubs for a given term.
 
     Args:
         client: HTTP client instance.
         term: Term database model to scrape clubs for.
+        validators: If set, only scrape if the club list has changed.
 
     Returns:
         List of Club database models.
+
+    Raises:
+        api_client.NotModifiedError: If the club list is unchanged.
     """
-    clubs = await api_client.fetch_clubs(client=client, term=term.number)
+    clubs = await api_client.fetch_clubs(
+        client=client, term=term.number, validators=validators
+    )
 
     return [
         database.Club(
@@ -309,17 +330,24 @@ class ScrapedMpsResult:
 async def scrape_mps(
     client: httpx.AsyncClient,
     term: database.Term,
+    validators: api_client.ValidatorStore | None = None,
 ) -> ScrapedMpsResult:
     """Scrape MPs and their term links for a given term.
 
     Args:
         client: HTTP client instance.
         term: Term database model to scrape MPs for.
+        validators: If set, only scrape if the MP list has changed.
 
     Returns:
         Scraped MP records and MP-to-term link records.
+
+    Raises:
+        api_client.NotModifiedError: If the MP list is unchanged.
     """
-    mps = await api_client.fetch_mps(client=client, term=term.number)
+    mps = await api_client.fetch_mps(
+        client=client, term=term.number, validators=validators
+    )
 
     scraped_mps = []
     mp_to_term_links = []
@@ -378,6 +406,12 @@ async def scrape_votes(
     sitting: database.Sitting,
     voting: database.Voting,
     mp_link_ids: Mapping[int, str] | None = None,
+    *,
+    limiter: concurrency.AdaptiveLimiter | None = None,
+    hedger: concurrency.Hedger | None = None,
+    stream: bool = False,
+    on_batch: Callable[[ScrapedVotesResult], Awaitable[None]] | None = None,
+    batch_size: int = 0,
 ) -> ScrapedVotesResult:
     """Scrape individual MP votes for a specific voting.
 
@@ -394,23 +428,63 @@ async def scrape_votes(
         mp_link_ids: Mapping of the MP's term-scoped id to the
             MpToTermLink natural key, used to link each vote record
             directly to the MP's term entry.
+        limiter: If set, hold one of its slots while each request runs.
+        hedger: If set, duplicate a slow request and use whichever
+            copy answers first. Ignored when streaming.
+        stream: Parse the votes as the response arrives instead of
+            loading it whole, so memory use does not grow with the
+            size of the response.
+        on_batch: If set when streaming, called with every
+            ``batch_size`` vote records as they are parsed, so that
+            they need not be held until the voting is complete. Each
+            batch also carries a voting option, with no label and no
+            vote count, for every option its records refer to; the
+            options returned at the end describe them in full. A
+            retried request hands its records over again, so a record
+            may appear in more than one batch.
+        batch_size: Vote records in a batch passed to ``on_batch``.
 
     Returns:
         Scraped vote records and voting options from the detail endpoint.
+        When streaming with ``on_batch``, only the records not yet
+        passed to it.
 
     Raises:
         ValueError: If vote data is inconsistent (VOTE_VALID without
             multiple option votes).
     """
     link_ids: Mapping[int, str] = mp_link_ids if mp_link_ids is not None else {}
-    voting_with_votes = await api_client.fetch_votes(
-        client=client,
-        term=term.number,
-        sitting=sitting.number,
-        voting=voting.number,
-    )
-
-    votes = voting_with_votes.mp_votes
+    if stream:
+        voting_with_votes, scraped_votes = await _stream_vote_records(
+            client=client,
+            term=term,
+            sitting=sitting,
+            voting=voting,
+            link_ids=link_ids,
+            limiter=limiter,
+            on_batch=on_batch,
+            batch_size=batch_size,
+        )
+    else:
+        voting_with_votes = await api_client.fetch_votes(
+            client=client,
+            term=term.number,
+            sitting=sitting.number,
+            voting=voting.number,
+            limiter=limiter,
+            hedger=hedger,
+        )
+        scraped_votes = [
+            record
+            for vote in voting_with_votes.mp_votes
+            for record in _vote_records(
+                term=term,
+                sitting=sitting,
+                voting=voting,
+                vote=vote,
+                link_ids=link_ids,
+            )
+        ]
 
     # Build VotingOptions from the detail endpoint response. This
     # ensures correct options exist even when the list endpoint
@@ -450,65 +524,139 @@ async def scrape_votes(
             )
         )
 
-    scraped_votes: list[database.VoteRecord] = []
+    return ScrapedVotesResult(
+        votes=scraped_votes,
+        voting_options=scraped_voting_options,
+    )
 
-    for vote in votes:
-        if vote.multiple_option_votes is None:
-            if vote.vote == "VOTE_VALID":
-                msg = (
-                    "Invalid vote data: 'multiple_option_votes' "
-                    "is None but 'vote' is 'VOTE_VALID'"
-                )
-                raise ValueError(msg)
 
-            # Single option vote with default vote option
-            scraped_votes.append(
+def _vote_records(
+    *,
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+    vote: api_schemas.MpVoteSchema,
+    link_ids: Mapping[int, str],
+) -> list[database.VoteRecord]:
+    """Convert one MP's vote into a record per voting option voted on."""
+    records: list[database.VoteRecord] = []
+    if vote.multiple_option_votes is None:
+        if vote.vote == "VOTE_VALID":
+            msg = (
+                "Invalid vote data: 'multiple_option_votes' "
+                "is None but 'vote' is 'VOTE_VALID'"
+            )
+            raise ValueError(msg)
+
+        # Single option vote with default vote option
+        records.append(
+            database.VoteRecord(
+                id=database_key_utils.generate_vote_natural_key(
+                    term=term,
+                    sitting=sitting,
+                    voting=voting,
+                    voting_option_index=api_schemas.OptionIndex(1),
+                    mp_term_id=vote.mp_term_id,
+                ),
+                voting_option_id=database_key_utils.generate_voting_option_natural_key(
+                    term=term,
+                    sitting=sitting,
+                    voting=voting,
+                    voting_option_index=api_schemas.OptionIndex(1),
+                ),
+                mp_to_term_link_id=link_ids.get(vote.mp_term_id),
+                mp_term_id=vote.mp_term_id,
+                vote=vote.vote,
+                party=vote.party,
+            )
+        )
+    else:
+        # Multiple options vote
+        for voting_option, inner_vote in vote.multiple_option_votes.items():
+            records.append(
                 database.VoteRecord(
                     id=database_key_utils.generate_vote_natural_key(
                         term=term,
                         sitting=sitting,
                         voting=voting,
-                        voting_option_index=api_schemas.OptionIndex(1),
+                        voting_option_index=voting_option,
                         mp_term_id=vote.mp_term_id,
                     ),
                     voting_option_id=database_key_utils.generate_voting_option_natural_key(
                         term=term,
                         sitting=sitting,
                         voting=voting,
-                        voting_option_index=api_schemas.OptionIndex(1),
+                        voting_option_index=voting_option,
                     ),
                     mp_to_term_link_id=link_ids.get(vote.mp_term_id),
                     mp_term_id=vote.mp_term_id,
-                    vote=vote.vote,
+                    vote=inner_vote,
                     party=vote.party,
                 )
             )
-        else:
-            # Multiple options vote
-            for voting_option, inner_vote in vote.multiple_option_votes.items():
-                scraped_votes.append(
-                    database.VoteRecord(
-                        id=database_key_utils.generate_vote_natural_key(
-                            term=term,
-                            sitting=sitting,
-                            voting=voting,
-                            voting_option_index=voting_option,
-                            mp_term_id=vote.mp_term_id,
-                        ),
-                        voting_option_id=database_key_utils.generate_voting_option_natural_key(
-                            term=term,
-                            sitting=sitting,
-                            voting=voting,
-                            voting_option_index=voting_option,
-                        ),
-                        mp_to_term_link_id=link_ids.get(vote.mp_term_id),
-                        mp_term_id=vote.mp_term_id,
-                        vote=inner_vote,
-                        party=vote.party,
+    return records
+
+
+async def _stream_vote_records(
+    *,
+    client: httpx.AsyncClient,
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+    link_ids: Mapping[int, str],
+    limiter: concurrency.AdaptiveLimiter | None,
+    on_batch: Callable[[ScrapedVotesResult], Awaitable[None]] | None,
+    batch_size: int,
+) -> tuple[api_schemas.VotingSchema, list[database.VoteRecord]]:
+    # Keyed by natural key: a retried stream yields its votes again.
+    records: dict[str, database.VoteRecord] = {}
+    option_indexes: set[api_schemas.OptionIndex] = set()
+    voting_detail: api_schemas.VotingSchema | None = None
+    async for item in api_client.stream_votes(
+        client=client,
+        term=term.number,
+        sitting=sitting.number,
+        voting=voting.number,
+        limiter=limiter,
+    ):
+        if isinstance(item, api_schemas.MpVoteSchema):
+            for record in _vote_records(
+                term=term,
+                sitting=sitting,
+                voting=voting,
+                vote=item,
+                link_ids=link_ids,
+            ):
+                records[record.id] = record
+            option_indexes.update(
+                item.multiple_option_votes or [api_schemas.OptionIndex(1)]
+            )
+            if on_batch is not None and len(records) >= batch_size:
+                await on_batch(
+                    ScrapedVotesResult(
+                        votes=list(records.values()),
+                        voting_options=[
+                            database.VotingOption(
+                                id=database_key_utils.generate_voting_option_natural_key(
+                                    term=term,
+                                    sitting=sitting,
+                                    voting=voting,
+                                    voting_option_index=index,
+                                ),
+                                voting_id=voting.id,
+                                index=index,
+                                option_label=None,
+                                description=None,
+                                votes=0,
+                            )
+                            for index in sorted(option_indexes)
+                        ],
                     )
                 )
-
-    return ScrapedVotesResult(
-        votes=scraped_votes,
-        voting_options=scraped_voting_options,
-    )
+                records, option_indexes = {}, set()
+        else:
+            voting_detail = item
+    if voting_detail is None:
+        msg = "vote stream ended without the voting"
+        raise RuntimeError(msg)
+    return voting_detail, list(records.values())
@@ -1,12 +1,14 @@
+import functools
 from collections.abc import Iterator
 
+import anyio
 import httpx
 import pydantic
 import pytest
 import respx
 import stamina
 
-from sejm_scraper import api_client, api_schemas
+from sejm_scraper import api_client, api_schemas, concurrency
 
 from .conftest import (
     CLUB_RESPONSE,
@@ -14,6 +16,7 @@ from .conftest import (
     MP_RESPONSE,
     SITTING_RESPONSE,
     TERM_RESPONSE,
+    VOTE_DETAIL_MULTI_OPTION_RESPONSE,
     VOTE_DETAIL_RESPONSE,
     VOTING_LIST_RESPONSE,
     VOTING_TABLE_RESPONSE,
@@ -93,6 +96,81 @@ async def test_fetch_votes() -> None:
     assert result.mp_votes[0].vote == api_schemas.Vote.NO
 
 
+@pytest.mark.anyio
+@respx.mock
+async def test_count_bytes_counts_nested_blocks() -> None:
+    response = httpx.Response(200, json=VOTE_DETAIL_RESPONSE)
+    respx.get(url__regex=rf"{MOCK_BASE_URL}/term10/votings/39/\d+").mock(
+        return_value=response
+    )
+    async with httpx.AsyncClient() as client:
+        with api_client.count_bytes() as outer:
+            await api_client.fetch_votes(
+                client=client, term=10, sitting=39, voting=205
+            )
+            with api_client.count_bytes() as inner:
+                await api_client.fetch_votes(
+                    client=client, term=10, sitting=39, voting=206
+                )
+
+    assert inner.total == len(response.content)
+    assert outer.total == 2 * inner.total
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_stream_votes_yields_votes_then_voting() -> None:
+    respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        return_value=httpx.Response(200, json=VOTE_DETAIL_MULTI_OPTION_RESPONSE)
+    )
+    async with httpx.AsyncClient() as client:
+        items = [
+            item
+            async for item in api_client.stream_votes(
+                client=client, term=10, sitting=39, voting=205
+            )
+        ]
+
+    *votes, voting = items
+    assert [vote.mp_term_id for vote in votes] == [1]
+    assert isinstance(votes[0], api_schemas.MpVoteSchema)
+    assert isinstance(voting, api_schemas.VotingSchema)
+    assert voting.voting_options is not None
+    assert len(voting.voting_options) == 2
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_stream_votes_raises_http_errors() -> None:
+    respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        return_value=httpx.Response(404)
+    )
+    async with httpx.AsyncClient() as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            async for _ in api_client.stream_votes(
+                client=client, term=10, sitting=39, voting=205
+            ):
+                pass
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_fetch_votes_parses_option_keys_from_json() -> None:
+    respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        return_value=httpx.Response(200, json=VOTE_DETAIL_MULTI_OPTION_RESPONSE)
+    )
+    async with httpx.AsyncClient() as client:
+        result = await api_client.fetch_votes(
+            client=client, term=10, sitting=39, voting=205
+        )
+
+    # JSON object keys are strings; they must still become option indexes.
+    assert result.mp_votes[0].multiple_option_votes == {
+        1: api_schemas.Vote.YES,
+        2: api_schemas.Vote.NO,
+    }
+
+
 @pytest.mark.anyio
 @respx.mock
 async def test_fetch_voting_table() -> None:
@@ -187,3 +265,256 @@ async def test_fetch_retries_transport_errors() -> None:
             )
 
     assert route.call_count == 3
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [
+        ("term", (api_client.EndpointFamily.TERMS, None)),
+        ("term10/proceedings", (api_client.EndpointFamily.PROCEEDINGS, 10)),
+        ("term3/votings", (api_client.EndpointFamily.VOTING_TABLE, 3)),
+        ("term10/votings/39", (api_client.EndpointFamily.VOTINGS, 10)),
+        (
+            "term10/votings/39/205",
+            (api_client.EndpointFamily.VOTING_DETAIL, 10),
+        ),
+        ("term10/MP", (api_client.EndpointFamily.MPS, 10)),
+        ("term10/clubs", (api_client.EndpointFamily.CLUBS, 10)),
+        ("term10/clubs/KO", None),
+        ("term10/committees", None),
+    ],
+)
+def test_classify_url(
+    path: str, expected: tuple[api_client.EndpointFamily, int | None] | None
+) -> None:
+    assert api_client.classify_url(f"{MOCK_BASE_URL}/{path}") == expected
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_fetch_with_validators_sends_conditional_headers() -> None:
+    url = f"{MOCK_BASE_URL}/term10/MP"
+    route = respx.get(url).mock(return_value=httpx.Response(304))
+    validators = api_client.ValidatorStore(
+        {url: api_client.Validators(etag='"v1"', last_modified="yesterday")}
+    )
+    async with httpx.AsyncClient() as client:
+        with pytest.raises(api_client.NotModifiedError):
+            await api_client.fetch_mps(
+                client=client, term=10, validators=validators
+            )
+
+    request = route.calls.last.request
+    assert request.headers["If-None-Match"] == '"v1"'
+    assert request.headers["If-Modified-Since"] == "yesterday"
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_fetch_with_validators_records_fresh_validators() -> None:
+    url = f"{MOCK_BASE_URL}/term10/MP"
+    respx.get(url).mock(
+        return_value=httpx.Response(
+            200, json=MP_RESPONSE, headers={"ETag": '"v2"'}
+        )
+    )
+    validators = api_client.ValidatorStore()
+    async with httpx.AsyncClient() as client:
+        mps = await api_client.fetch_mps(
+            client=client, term=10, validators=validators
+        )
+
+    assert len(mps) == 1
+    assert validators.pop_fresh() == {url: api_client.Validators(etag='"v2"')}
+    assert validators.pop_fresh() == {}
+    assert validators.request_headers(url) == {"If-None-Match": '"v2"'}
+
+
+@pytest.mark.anyio
+@respx.mock
+@pytest.mark.usefixtures("_no_retry_wait")
+async def test_fetch_with_limiter_shrinks_window_on_server_errors() -> None:
+    respx.get(f"{MOCK_BASE_URL}/term").mock(return_value=httpx.Response(503))
+    limiter = concurrency.AdaptiveLimiter(initial_limit=8, max_limit=8)
+    async with httpx.AsyncClient() as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await api_client.fetch_terms(client=client, limiter=limiter)
+
+    # One cut per attempt: retries are sent after the previous cut.
+    assert limiter.limit == 1
+
+
+@pytest.mark.parametrize(
+    ("response", "expected"),
+    [
+        (httpx.Response(429, headers={"Retry-After": "7"}), 7.0),
+        (httpx.Response(503), True),
+        (httpx.Response(404, headers={"Retry-After": "7"}), False),
+    ],
+)
+def test_retry_backoff_honours_retry_after(
+    response: httpx.Response, expected: float
+) -> None:
+    response.request = httpx.Request("GET", f"{MOCK_BASE_URL}/term")
+    error = httpx.HTTPStatusError(
+        "error", request=response.request, response=response
+    )
+
+    assert api_client._retry_backoff(error) == expected
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_fetch_coalesces_identical_requests() -> None:
+    votes_route = respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        return_value=httpx.Response(200, json=VOTE_DETAIL_RESPONSE)
+    )
+    terms_route = respx.get(f"{MOCK_BASE_URL}/term").mock(
+        return_value=httpx.Response(200, json=TERM_RESPONSE)
+    )
+    async with httpx.AsyncClient() as client, anyio.create_task_group() as tg:
+        for _ in range(3):
+            tg.start_soon(
+                functools.partial(
+                    api_client.fetch_votes,
+                    client=client,
+                    term=10,
+                    sitting=39,
+                    voting=205,
+                )
+            )
+        first = await api_client.fetch_terms(client=client)
+        first.clear()
+        second = await api_client.fetch_terms(client=client)
+
+    assert votes_route.call_count == 1
+    assert terms_route.call_count == 1
+    # Each caller gets its own list.
+    assert len(second) == len(TERM_RESPONSE)
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_fetch_does_not_coalesce_across_clients() -> None:
+    route = respx.get(f"{MOCK_BASE_URL}/term").mock(
+        return_value=httpx.Response(200, json=TERM_RESPONSE)
+    )
+    for _ in range(2):
+        async with httpx.AsyncClient() as client:
+            await api_client.fetch_terms(client=client)
+
+    assert route.call_count == 2
+
+
+def _primed_hedger() -> concurrency.Hedger:
+    hedger = concurrency.Hedger(max_hedge_ratio=1, min_samples=2)
+    hedger.record(0.01)
+    hedger.record(0.01)
+    return hedger
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_fetch_votes_hedges_slow_request() -> None:
+    requests: list[httpx.Request] = []
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            await anyio.sleep(10)
+        return httpx.Response(200, json=VOTE_DETAIL_RESPONSE)
+
+    respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        side_effect=respond
+    )
+    async with httpx.AsyncClient() as client:
+        with anyio.fail_after(5):
+            result = await api_client.fetch_votes(
+                client=client,
+                term=10,
+                sitting=39,
+                voting=205,
+                hedger=_primed_hedger(),
+            )
+
+    assert len(requests) == 2
+    assert result.number == 205
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_fetch_votes_hedge_survives_failed_request() -> None:
+    requests: list[httpx.Request] = []
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            await anyio.sleep(0.05)
+            return httpx.Response(404)
+        await anyio.sleep(0.1)
+        return httpx.Response(200, json=VOTE_DETAIL_RESPONSE)
+
+    respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        side_effect=respond
+    )
+    async with httpx.AsyncClient() as client:
+        result = await api_client.fetch_votes(
+            client=client,
+            term=10,
+            sitting=39,
+            voting=205,
+            hedger=_primed_hedger(),
+        )
+
+    assert len(requests) == 2
+    assert result.number == 205
+
+
+@pytest.mark.anyio
+@respx.mock
+@pytest.mark.usefixtures("_no_retry_wait")
+async def test_fetch_fails_fast_once_circuit_opens() -> None:
+    votes_route = respx.get(
+        url__regex=rf"{MOCK_BASE_URL}/term10/votings/39/\d+"
+    ).mock(return_value=httpx.Response(500))
+    terms_route = respx.get(f"{MOCK_BASE_URL}/term").mock(
+        return_value=httpx.Response(200, json=TERM_RESPONSE)
+    )
+    async with httpx.AsyncClient() as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await api_client.fetch_votes(
+                client=client, term=10, sitting=39, voting=205
+            )
+        # The fifth consecutive failure opens the circuit, so the third
+        # attempt of this call is refused without reaching the API.
+        with pytest.raises(api_client.CircuitOpenError):
+            await api_client.fetch_votes(
+                client=client, term=10, sitting=39, voting=206
+            )
+        with pytest.raises(api_client.CircuitOpenError):
+            await api_client.fetch_votes(
+                client=client, term=10, sitting=39, voting=207
+            )
+        # Other endpoint families have circuits of their own.
+        await api_client.fetch_terms(client=client)
+
+    assert votes_route.call_count == api_client.CIRCUIT_FAILURE_THRESHOLD
+    assert terms_route.call_count == 1
+
+
+@pytest.mark.anyio
+@respx.mock
+@pytest.mark.usefixtures("_no_retry_wait")
+async def test_fetch_stops_retrying_when_budget_is_spent(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(api_client, "RETRY_BUDGET_RATIO", 0)
+    monkeypatch.setattr(api_client, "RETRY_BUDGET_MIN_RETRIES", 1)
+    route = respx.get(f"{MOCK_BASE_URL}/term").mock(
+        return_value=httpx.Response(503)
+    )
+    async with httpx.AsyncClient() as client:
+        with pytest.raises(api_client.RetryBudgetExhaustedError):
+            await api_client.fetch_terms(client=client)
+
+    assert route.call_count == 2
@@ -0,0 +1,125 @@
+import gzip
+from pathlib import Path
+
+import httpx
+import pytest
+import respx
+
+from sejm_scraper import api_client, archive
+
+from .conftest import MOCK_BASE_URL, MP_RESPONSE, TERM_RESPONSE
+
+
+@pytest.fixture(autouse=True)
+def _patch_base_url(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api_client, "BASE_URL", MOCK_BASE_URL)
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [
+        ("term", "terms.jsonl.gz"),
+        ("term10/MP", "term10.jsonl.gz"),
+        ("term3/votings/5/12", "term3.jsonl.gz"),
+        ("term10/committees", "other.jsonl.gz"),
+    ],
+)
+def test_segment_name(path: str, expected: str) -> None:
+    assert archive.segment_name(f"{MOCK_BASE_URL}/{path}") == expected
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_archiving_transport_appends_every_response(
+    tmp_path: Path,
+) -> None:
+    respx.get(f"{MOCK_BASE_URL}/term").mock(
+        return_value=httpx.Response(200, json=TERM_RESPONSE)
+    )
+    respx.get(f"{MOCK_BASE_URL}/term10/MP").mock(
+        return_value=httpx.Response(404)
+    )
+    with archive.ResponseArchive(tmp_path) as response_archive:
+        transport = archive.ArchivingTransport(response_archive)
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get(f"{MOCK_BASE_URL}/term")
+            await client.get(f"{MOCK_BASE_URL}/term10/MP")
+
+    (terms,) = archive.read_segment(tmp_path / "terms.jsonl.gz")
+    (mps,) = archive.read_segment(tmp_path / "term10.jsonl.gz")
+    assert terms["url"] == f"{MOCK_BASE_URL}/term"
+    assert terms["status"] == 200
+    assert terms["fetched_at"]
+    assert mps["status"] == 404
+
+
+def test_archive_appends_gzip_members(tmp_path: Path) -> None:
+    request = httpx.Request("GET", f"{MOCK_BASE_URL}/term")
+    for body in [b"[1]", b"[2]"]:
+        with archive.ResponseArchive(tmp_path) as response_archive:
+            response_archive.append(
+                httpx.Response(200, content=body, request=request)
+            )
+
+    segment = tmp_path / "terms.jsonl.gz"
+    assert segment.read_bytes().count(b"\x1f\x8b") >= 2
+    assert len(gzip.decompress(segment.read_bytes()).splitlines()) == 2
+    assert [r["body"] for r in archive.read_segment(segment)] == ["[1]", "[2]"]
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_replay_serves_archived_responses_offline(
+    tmp_path: Path,
+) -> None:
+    respx.get(f"{MOCK_BASE_URL}/term").mock(
+        return_value=httpx.Response(200, json=TERM_RESPONSE)
+    )
+    respx.get(f"{MOCK_BASE_URL}/term10/MP").mock(
+        side_effect=[
+            httpx.Response(200, json=[]),
+            httpx.Response(200, json=MP_RESPONSE),
+            httpx.Response(500),
+        ]
+    )
+    with archive.ResponseArchive(tmp_path) as response_archive:
+        transport = archive.ArchivingTransport(response_archive)
+        for _ in range(3):
+            async with httpx.AsyncClient(transport=transport) as client:
+                await client.get(f"{MOCK_BASE_URL}/term")
+                await client.get(f"{MOCK_BASE_URL}/term10/MP")
+    network = respx.calls.call_count
+
+    transport = archive.ReplayTransport(tmp_path)
+    async with httpx.AsyncClient(transport=transport) as client:
+        terms = await api_client.fetch_terms(client=client)
+        mps = await api_client.fetch_mps(client=client, term=10)
+        with pytest.raises(httpx.HTTPStatusError):
+            await api_client.fetch_clubs(client=client, term=10)
+
+    assert respx.calls.call_count == network
+    assert len(terms) == len(TERM_RESPONSE)
+    # The latest successful response wins; the later 500 is ignored.
+    assert len(mps) == len(MP_RESPONSE)
+
+
+@pytest.mark.anyio
+async def test_replay_drops_wire_encoding_headers(tmp_path: Path) -> None:
+    request = httpx.Request("GET", f"{MOCK_BASE_URL}/term")
+    with archive.ResponseArchive(tmp_path) as response_archive:
+        response_archive.append(
+            httpx.Response(
+                200,
+                headers={"Content-Encoding": "gzip", "ETag": '"v1"'},
+                content=gzip.compress(b"[]"),
+                request=request,
+            )
+        )
+
+    transport = archive.ReplayTransport(tmp_path)
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get(f"{MOCK_BASE_URL}/term")
+
+    assert response.content == b"[]"
+    assert response.headers["ETag"] == '"v1"'
+    assert "Content-Encoding" not in response.headers
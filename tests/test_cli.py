@@ -1,10 +1,18 @@
+import json
 from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
 from typer.testing import CliRunner
 
-from sejm_scraper import cli, pipeline
+from sejm_scraper import (
+    api_client,
+    archive,
+    cli,
+    database,
+    pipeline,
+    planner,
+)
 
 runner = CliRunner()
 
@@ -63,3 +71,300 @@ def test_resume_invokes_resume_pipeline(
     assert result.exit_code == 0
     mock_resume.assert_called_once()
     assert mock_resume.call_args.kwargs["engine"] is not None
+
+
+def test_gap_fill_passes_terms(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    mock_gap_fill = AsyncMock()
+    monkeypatch.setattr(pipeline, "gap_fill_pipeline", mock_gap_fill)
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "gap-fill",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--term",
+            "9",
+            "--term",
+            "10",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert mock_gap_fill.call_args.kwargs["terms"] == [9, 10]
+
+
+def test_scrape_with_shard_writes_to_shard_file(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    mock_pipeline = AsyncMock()
+    monkeypatch.setattr(pipeline, "pipeline", mock_pipeline)
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "scrape",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--shard",
+            "2/4",
+        ],
+    )
+
+    assert result.exit_code == 0
+    call_kwargs = mock_pipeline.call_args.kwargs
+    assert call_kwargs["options"].shard == pipeline.Shard(2, 4)
+    assert call_kwargs["engine"].url.database == str(
+        tmp_path / "test.shard-2-of-4.duckdb"
+    )
+
+
+def test_scrape_rejects_malformed_shard(tmp_path: Path) -> None:
+    result = runner.invoke(
+        cli.app,
+        [
+            "scrape",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--shard",
+            "5/4",
+        ],
+    )
+
+    assert result.exit_code != 0
+
+
+def test_merge_merges_shard_files(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    merged: list[str] = []
+    monkeypatch.setattr(
+        database,
+        "merge_database",
+        lambda *, engine, path: merged.append(path),  # noqa: ARG005
+    )
+    for index in (1, 2):
+        (tmp_path / f"test.shard-{index}-of-2.duckdb").touch()
+
+    result = runner.invoke(
+        cli.app, ["merge", "--db-path", str(tmp_path / "test.duckdb")]
+    )
+
+    assert result.exit_code == 0
+    assert merged == [
+        str(tmp_path / "test.shard-1-of-2.duckdb"),
+        str(tmp_path / "test.shard-2-of-2.duckdb"),
+    ]
+
+
+def test_compact_rejects_existing_output(tmp_path: Path) -> None:
+    output = tmp_path / "compact.duckdb"
+    output.touch()
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "compact",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--output",
+            str(output),
+        ],
+    )
+
+    assert result.exit_code != 0
+    assert "already exists" in result.output
+
+
+def test_watch_passes_interval(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    mock_watch = AsyncMock()
+    monkeypatch.setattr(pipeline, "watch_pipeline", mock_watch)
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "watch",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--interval",
+            "60",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert mock_watch.call_args.kwargs["interval"] == 60
+
+
+def test_plan_writes_json(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(
+        planner,
+        "plan_scrape",
+        AsyncMock(
+            return_value=planner.Plan(
+                terms=[planner.TermPlan(number=10, requests=3)],
+                requests=4,
+                requests_per_second=2,
+                rate_source=planner.RateSource.CONFIGURED,
+                estimated_seconds=2,
+            )
+        ),
+    )
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "plan",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--requests-per-second",
+            "2",
+        ],
+    )
+
+    assert result.exit_code == 0
+    plan = json.loads(result.output)
+    assert plan["requests"] == 4
+    assert plan["rate_source"] == "configured"
+    assert plan["terms"] == [{"number": 10, "requests": 3, "sittings": []}]
+
+
+def test_scrape_with_cache_creates_cache_file(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    mock_pipeline = AsyncMock()
+    monkeypatch.setattr(pipeline, "pipeline", mock_pipeline)
+    cache_file = tmp_path / "cache.sqlite3"
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "scrape",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--cache-path",
+            str(cache_file),
+            "--cache-ttl",
+            "votings=60",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert cache_file.exists()
+    assert mock_pipeline.call_args.kwargs["http_client"] is not None
+
+
+def test_scrape_rejects_malformed_cache_ttl(tmp_path: Path) -> None:
+    result = runner.invoke(
+        cli.app,
+        [
+            "scrape",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--cache-ttl",
+            "bogus",
+        ],
+    )
+
+    assert result.exit_code != 0
+
+
+def test_resume_passes_conditional_option(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    mock_resume = AsyncMock()
+    monkeypatch.setattr(pipeline, "resume_pipeline", mock_resume)
+
+    result = runner.invoke(
+        cli.app,
+        ["resume", "--db-path", str(tmp_path / "test.duckdb"), "--conditional"],
+    )
+
+    assert result.exit_code == 0
+    options = mock_resume.call_args.kwargs["options"]
+    assert options == pipeline.PipelineOptions(conditional=True)
+
+
+def test_scrape_passes_bulk_load_option(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    mock_pipeline = AsyncMock()
+    monkeypatch.setattr(pipeline, "pipeline", mock_pipeline)
+
+    result = runner.invoke(
+        cli.app,
+        ["scrape", "--db-path", str(tmp_path / "test.duckdb"), "--bulk-load"],
+    )
+
+    assert result.exit_code == 0
+    options = mock_pipeline.call_args.kwargs["options"]
+    assert options == pipeline.PipelineOptions(bulk_load=True)
+
+
+def test_scrape_has_no_rate_limit_by_default(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(pipeline, "pipeline", AsyncMock())
+    monkeypatch.setattr(api_client.request_bucket, "rate", 2.5)
+
+    result = runner.invoke(
+        cli.app, ["scrape", "--db-path", str(tmp_path / "test.duckdb")]
+    )
+
+    assert result.exit_code == 0
+    assert api_client.request_bucket.rate is None
+
+
+def test_scrape_sets_requests_per_second(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(pipeline, "pipeline", AsyncMock())
+    monkeypatch.setattr(
+        api_client.request_bucket, "rate", api_client.request_bucket.rate
+    )
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "scrape",
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--requests-per-second",
+            "2.5",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert api_client.request_bucket.rate == 2.5
+
+
+def test_replay_runs_pipeline_from_archive(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    mock_pipeline = AsyncMock()
+    monkeypatch.setattr(pipeline, "pipeline", mock_pipeline)
+
+    result = runner.invoke(
+        cli.app,
+        [
+            "replay",
+            "--archive-dir",
+            str(tmp_path),
+            "--db-path",
+            str(tmp_path / "test.duckdb"),
+            "--from-term",
+            "10",
+        ],
+    )
+
+    assert result.exit_code == 0
+    call_kwargs = mock_pipeline.call_args.kwargs
+    assert call_kwargs["from_term"] == 10
+    assert isinstance(
+        call_kwargs["http_client"]._transport, archive.ReplayTransport
+    )
@@ -0,0 +1,408 @@
+import statistics
+import time
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+
+import anyio
+import httpx
+import pytest
+import respx
+
+from sejm_scraper import concurrency
+
+
+def _complete(
+    limiter: concurrency.AdaptiveLimiter,
+    *,
+    latency: float,
+    count: int,
+) -> None:
+    for _ in range(count):
+        limiter.record(started=time.monotonic() - latency, overloaded=False)
+
+
+def test_rejects_initial_limit_outside_bounds() -> None:
+    with pytest.raises(ValueError, match="initial_limit"):
+        concurrency.AdaptiveLimiter(initial_limit=10, max_limit=5)
+
+
+def test_grows_by_one_per_healthy_window() -> None:
+    limiter = concurrency.AdaptiveLimiter(initial_limit=2, max_limit=10)
+
+    _complete(limiter, latency=0.1, count=2)
+    assert limiter.limit == 3
+    _complete(limiter, latency=0.1, count=3)
+    assert limiter.limit == 4
+
+
+def test_does_not_grow_beyond_max_limit() -> None:
+    limiter = concurrency.AdaptiveLimiter(initial_limit=2, max_limit=2)
+
+    _complete(limiter, latency=0.1, count=10)
+
+    assert limiter.limit == 2
+
+
+def test_holds_window_when_latency_degrades() -> None:
+    limiter = concurrency.AdaptiveLimiter(initial_limit=2, max_limit=10)
+    _complete(limiter, latency=0.1, count=2)
+
+    _complete(limiter, latency=1.0, count=3)
+
+    assert limiter.limit == 3
+
+
+def test_halves_window_on_overload() -> None:
+    limiter = concurrency.AdaptiveLimiter(initial_limit=8, max_limit=10)
+
+    limiter.record(started=time.monotonic(), overloaded=True)
+
+    assert limiter.limit == 4
+
+
+def test_overloads_started_before_a_cut_do_not_cut_again() -> None:
+    limiter = concurrency.AdaptiveLimiter(initial_limit=8, max_limit=10)
+    started = time.monotonic() - 1
+
+    for _ in range(5):
+        limiter.record(started=started, overloaded=True)
+
+    assert limiter.limit == 4
+
+
+def test_does_not_shrink_below_min_limit() -> None:
+    limiter = concurrency.AdaptiveLimiter(
+        initial_limit=2, min_limit=2, max_limit=10
+    )
+
+    limiter.record(started=time.monotonic(), overloaded=True)
+
+    assert limiter.limit == 2
+
+
+def test_window_with_failures_is_not_healthy() -> None:
+    limiter = concurrency.AdaptiveLimiter(initial_limit=4, max_limit=10)
+    stale = time.monotonic() - 1
+    limiter.record(started=time.monotonic(), overloaded=True)
+    assert limiter.limit == 2
+
+    limiter.record(started=stale, overloaded=True)
+    _complete(limiter, latency=0.1, count=1)
+
+    assert limiter.limit == 2
+
+
+@pytest.mark.anyio
+async def test_limits_concurrent_holders() -> None:
+    limiter = concurrency.AdaptiveLimiter(initial_limit=2, max_limit=2)
+    running = 0
+    peak = 0
+
+    async def hold() -> None:
+        nonlocal running, peak
+        async with limiter:
+            running += 1
+            peak = max(peak, running)
+            await anyio.sleep(0.01)
+            running -= 1
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(6):
+            tg.start_soon(hold)
+
+    assert peak == 2
+
+
+@pytest.mark.anyio
+async def test_token_bucket_spaces_requests_at_rate() -> None:
+    bucket = concurrency.TokenBucket(rate=50)
+    started = time.monotonic()
+
+    for _ in range(6):
+        await bucket.acquire()
+
+    # The first token is free; the other five arrive 20 ms apart.
+    assert time.monotonic() - started >= 0.1
+
+
+@pytest.mark.anyio
+async def test_token_bucket_allows_burst() -> None:
+    bucket = concurrency.TokenBucket(rate=1, burst=3)
+
+    with anyio.fail_after(0.5):
+        for _ in range(3):
+            await bucket.acquire()
+
+
+@pytest.mark.anyio
+async def test_token_bucket_pause_holds_all_waiters() -> None:
+    bucket = concurrency.TokenBucket(rate=None)
+    bucket.pause(0.1)
+    started = time.monotonic()
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(3):
+            tg.start_soon(bucket.acquire)
+
+    assert time.monotonic() - started >= 0.1
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, None),
+        ("3", 3.0),
+        ("-5", 0.0),
+        ("86400", concurrency.MAX_RETRY_AFTER),
+        ("soon", None),
+    ],
+)
+def test_retry_after(value: str | None, expected: float | None) -> None:
+    headers = {} if value is None else {"Retry-After": value}
+    response = httpx.Response(429, headers=headers)
+
+    assert concurrency.retry_after(response) == expected
+
+
+def test_retry_after_http_date() -> None:
+    retry_at = datetime.now(UTC) + timedelta(seconds=30)
+    response = httpx.Response(
+        429, headers={"Retry-After": format_datetime(retry_at, usegmt=True)}
+    )
+
+    delay = concurrency.retry_after(response)
+
+    assert delay is not None
+    assert 25 < delay <= 30
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_rate_limited_transport_pauses_bucket_on_retry_after() -> None:
+    respx.get("https://example.test/").mock(
+        return_value=httpx.Response(429, headers={"Retry-After": "0.1"})
+    )
+    bucket = concurrency.TokenBucket(rate=None)
+    transport = concurrency.RateLimitedTransport(bucket)
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get("https://example.test/")
+        started = time.monotonic()
+        await bucket.acquire()
+
+    assert response.status_code == 429
+    assert time.monotonic() - started >= 0.05
+
+
+@pytest.mark.anyio
+async def test_single_flight_shares_concurrent_call() -> None:
+    single_flight = concurrency.SingleFlight(memo_size=4)
+    calls = 0
+    results = []
+
+    async def call() -> int:
+        nonlocal calls
+        calls += 1
+        await anyio.sleep(0.01)
+        return 42
+
+    async def run() -> None:
+        results.append(await single_flight.run("key", call))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(3):
+            tg.start_soon(run)
+
+    assert calls == 1
+    assert results == [42, 42, 42]
+
+
+@pytest.mark.anyio
+async def test_single_flight_memo_is_bounded() -> None:
+    single_flight = concurrency.SingleFlight(memo_size=1)
+    calls: list[str] = []
+
+    async def call(key: str) -> str:
+        calls.append(key)
+        return key
+
+    for key in ["a", "a", "b", "a"]:
+        await single_flight.run(key, lambda key=key: call(key))
+
+    assert calls == ["a", "b", "a"]
+
+
+@pytest.mark.anyio
+async def test_single_flight_forget_reruns_calls() -> None:
+    single_flight = concurrency.SingleFlight(memo_size=4)
+    calls: list[str] = []
+
+    async def call() -> str:
+        calls.append("a")
+        return "a"
+
+    await single_flight.run("a", call)
+    single_flight.forget()
+    await single_flight.run("a", call)
+
+    assert calls == ["a", "a"]
+
+
+@pytest.mark.anyio
+async def test_single_flight_does_not_remember_failures() -> None:
+    single_flight = concurrency.SingleFlight(memo_size=4)
+    attempts = 0
+
+    async def call() -> int:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            msg = "boom"
+            raise RuntimeError(msg)
+        return attempts
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await single_flight.run("key", call)
+
+    assert await single_flight.run("key", call) == 2
+
+
+@pytest.mark.anyio
+async def test_single_flight_waiter_takes_over_cancelled_call() -> None:
+    single_flight = concurrency.SingleFlight(memo_size=4)
+    started = anyio.Event()
+    calls = 0
+
+    async def call() -> int:
+        nonlocal calls
+        calls += 1
+        started.set()
+        await anyio.sleep(0.05 if calls == 1 else 0)
+        return calls
+
+    async with anyio.create_task_group() as tg:
+        leader = anyio.CancelScope()
+
+        async def lead() -> None:
+            with leader:
+                await single_flight.run("key", call)
+
+        tg.start_soon(lead)
+        await started.wait()
+        result = []
+
+        async def follow() -> None:
+            result.append(await single_flight.run("key", call))
+
+        tg.start_soon(follow)
+        await anyio.sleep(0.01)
+        leader.cancel()
+
+    assert result == [2]
+
+
+def test_circuit_breaker_opens_after_consecutive_failures() -> None:
+    breaker = concurrency.CircuitBreaker("votings", failure_threshold=3)
+
+    breaker.record(overloaded=True)
+    breaker.record(overloaded=True)
+    breaker.record(overloaded=False)
+    breaker.record(overloaded=True)
+    breaker.record(overloaded=True)
+    assert breaker.allow()
+
+    breaker.record(overloaded=True)
+    assert not breaker.allow()
+
+
+def test_circuit_breaker_half_opens_after_reset_timeout() -> None:
+    breaker = concurrency.CircuitBreaker(
+        "votings", failure_threshold=1, reset_timeout=0.01
+    )
+    breaker.record(overloaded=True)
+    time.sleep(0.02)
+    assert breaker.allow()
+
+    # A single failure while half-open opens the circuit again...
+    breaker.record(overloaded=True)
+    assert not breaker.allow()
+    time.sleep(0.02)
+
+    # ...and a success closes it.
+    breaker.record(overloaded=False)
+    breaker.record(overloaded=True)
+    assert breaker.is_open
+
+
+def test_retry_budget_allows_minimum_then_ratio() -> None:
+    budget = concurrency.RetryBudget(ratio=0.1, min_retries=2)
+
+    assert budget.try_retry()
+    assert budget.try_retry()
+    assert not budget.try_retry()
+
+    for _ in range(10):
+        budget.record_request()
+    assert budget.try_retry()
+    assert not budget.try_retry()
+
+
+def test_retry_budget_forgets_outside_window() -> None:
+    budget = concurrency.RetryBudget(ratio=0, min_retries=1, window=0.01)
+    assert budget.try_retry()
+    assert not budget.try_retry()
+
+    time.sleep(0.02)
+
+    assert budget.try_retry()
+
+
+def test_hedger_waits_for_enough_latencies() -> None:
+    hedger = concurrency.Hedger(percentile=50, min_samples=3)
+    hedger.record(1.0)
+    hedger.record(2.0)
+    assert hedger.hedge_delay() is None
+
+    hedger.record(3.0)
+    assert hedger.hedge_delay() == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize("percentile", [2, 50, 95])
+def test_hedger_matches_quantiles_for_whole_percentiles(
+    percentile: int,
+) -> None:
+    latencies = [0.1 * i**1.5 for i in range(1, 41)]
+    hedger = concurrency.Hedger(percentile=percentile)
+    for latency in latencies:
+        hedger.record(latency)
+
+    cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+    assert hedger.hedge_delay() == pytest.approx(cut_points[percentile - 1])
+
+
+@pytest.mark.parametrize(
+    ("percentile", "expected"), [(2.5, 1.25), (95.5, 10.55), (99.5, 10.95)]
+)
+def test_hedger_interpolates_fractional_percentiles(
+    percentile: float, expected: float
+) -> None:
+    hedger = concurrency.Hedger(percentile=percentile, min_samples=3)
+    for i in range(1, 12):
+        hedger.record(float(i))
+
+    assert hedger.hedge_delay() == pytest.approx(expected)
+
+
+def test_hedger_caps_share_of_hedged_requests() -> None:
+    hedger = concurrency.Hedger(max_hedge_ratio=0.1)
+    for _ in range(19):
+        hedger.hedge_delay()
+    assert hedger.try_hedge()
+    assert not hedger.try_hedge()
+
+    hedger.hedge_delay()
+    assert hedger.try_hedge()
+
+
+def test_hedger_rejects_percentile_out_of_range() -> None:
+    with pytest.raises(ValueError, match="percentile"):
+        concurrency.Hedger(percentile=100)
@@ -1,29 +1,33 @@
 from datetime import UTC, date, datetime
 from typing import TYPE_CHECKING
 
+import duckdb
+import pyarrow as pa
+import pytest
 import sqlmodel
 
-from sejm_scraper import database
-from sejm_scraper.api_schemas import Vote
+from sejm_scraper import database, database_key_utils
+from sejm_scraper.api_schemas import MpTermId, OptionIndex, Vote
 
 if TYPE_CHECKING:
-    from sqlalchemy.engine.base import Engine
-
-
-def test_json_safe_date() -> None:
-    assert database._json_safe(date(2025, 1, 15)) == "2025-01-15"
-
+    from pathlib import Path
 
-def test_json_safe_string() -> None:
-    assert database._json_safe("hello") == "hello"
+    from sqlalchemy.engine.base import Engine
 
 
-def test_json_safe_none() -> None:
-    assert database._json_safe(None) is None
+def test_arrow_column_type_maps_table_schema() -> None:
+    columns = database.Voting.__table__.columns  # ty: ignore[unresolved-attribute]
+    assert database._arrow_column_type(columns["id"]) == pa.string()
+    assert database._arrow_column_type(columns["number"]) == pa.int64()
+    assert database._arrow_column_type(columns["date"]) == pa.date32()
+    assert database._arrow_column_type(columns["loaded_at"]) == pa.timestamp(
+        "us", tz="UTC"
+    )
 
 
-def test_json_safe_int() -> None:
-    assert database._json_safe(42) == 42
+def test_arrow_column_type_boolean() -> None:
+    columns = database.MpToTermLink.__table__.columns  # ty: ignore[unresolved-attribute]
+    assert database._arrow_column_type(columns["active"]) == pa.bool_()
 
 
 def test_bulk_upsert_empty_records(engine: "Engine") -> None:
@@ -141,6 +145,76 @@ def test_bulk_upsert_replaces_on_duplicate(engine: "Engine") -> None:
         assert results[0].to_date == date(2027, 11, 12)
 
 
+def test_bulk_upsert_skips_unchanged_rows(
+    engine: "Engine", term: database.Term, sitting: database.Sitting
+) -> None:
+    """Only rows whose content changed are rewritten and restamped."""
+    other = sitting.model_copy(update={"id": "other", "number": 40})
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting, other]
+        )
+        session.commit()
+        first = {
+            row.id: (row.loaded_at, row.fingerprint)
+            for row in session.exec(sqlmodel.select(database.Sitting))
+        }
+
+    renamed = other.model_copy(update={"title": "Renamed"})
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting, renamed]
+        )
+        session.commit()
+        second = {
+            row.id: (row.loaded_at, row.fingerprint)
+            for row in session.exec(sqlmodel.select(database.Sitting))
+        }
+
+    assert first[sitting.id][1] is not None
+    assert second[sitting.id] == first[sitting.id]
+    assert second["other"][0] > first["other"][0]
+    assert second["other"][1] != first["other"][1]
+
+
+def test_bulk_upsert_replaces_referenced_row(
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    """A row with both a parent and children can be upserted again."""
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Voting, records=[voting]
+        )
+        session.commit()
+
+    renamed = sitting.model_copy(update={"title": "Renamed"})
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[renamed]
+        )
+        session.commit()
+
+    with sqlmodel.Session(engine) as session:
+        results = session.exec(sqlmodel.select(database.Sitting)).all()
+        assert len(results) == 1
+        assert results[0].title == "Renamed"
+        # Validators would skip requests for data other shards hold.
+        assert not session.exec(sqlmodel.select(database.HttpValidator)).all()
+        assert results[0].term_id == term.id
+
+
 def test_bulk_upsert_binds_enums_dates_and_nulls(
     engine: "Engine",
     term: database.Term,
@@ -193,6 +267,42 @@ def test_bulk_upsert_binds_enums_dates_and_nulls(
         assert stored_voting.date == voting.date
 
 
+def test_bulk_upsert_insert_only_keeps_first_of_repeated_keys(
+    engine: "Engine",
+    term: database.Term,
+) -> None:
+    renamed = term.model_copy(update={"number": 11})
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session,
+            model=database.Term,
+            records=[term, renamed],
+            insert_only=True,
+        )
+        session.commit()
+
+    with sqlmodel.Session(engine) as session:
+        results = session.exec(sqlmodel.select(database.Term)).all()
+        assert [result.number for result in results] == [10]
+
+
+def test_bulk_upsert_insert_only_rejects_stored_key(
+    engine: "Engine",
+    term: database.Term,
+) -> None:
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        with pytest.raises(duckdb.ConstraintException):
+            database.bulk_upsert(
+                session=session,
+                model=database.Term,
+                records=[term],
+                insert_only=True,
+            )
+
+
 def test_create_db_and_tables_with_engine(engine: "Engine") -> None:
     # engine fixture already calls create_db_and_tables,
     # verify tables exist by inserting a record
@@ -214,3 +324,278 @@ def test_create_db_and_tables_with_engine(engine: "Engine") -> None:
     with sqlmodel.Session(engine) as session:
         result = session.exec(sqlmodel.select(database.Term)).first()
         assert result is not None
+
+
+def test_create_db_and_tables_adds_new_columns(tmp_path: "Path") -> None:
+    """Tables stored before a column was added gain it."""
+    path = tmp_path / "old.duckdb"
+    with duckdb.connect(str(path)) as connection:
+        connection.execute(
+            "CREATE TABLE term (id VARCHAR PRIMARY KEY, number BIGINT, "
+            "from_date DATE, to_date DATE, loaded_at TIMESTAMPTZ)"
+        )
+        connection.execute(
+            "INSERT INTO term VALUES ('t1', 1, '2000-01-01', NULL, now())"
+        )
+        connection.execute(
+            "CREATE TABLE scrapeprogress (id VARCHAR PRIMARY KEY, "
+            "kind VARCHAR, parent_id VARCHAR, status VARCHAR, "
+            "attempts BIGINT, duration_seconds DOUBLE, "
+            "response_bytes BIGINT, loaded_at TIMESTAMPTZ, "
+            "fingerprint VARCHAR)"
+        )
+        connection.execute(
+            "INSERT INTO scrapeprogress "
+            "VALUES ('s1', 'SITTING', 't1', 'DONE', 1, 0, 0, now(), NULL)"
+        )
+    old_engine = database.get_engine(url=f"duckdb:///{path}")
+
+    database.create_db_and_tables(engine=old_engine)
+
+    with sqlmodel.Session(old_engine) as session:
+        result = session.exec(sqlmodel.select(database.Term)).one()
+        assert result.fingerprint is None
+        progress = session.exec(sqlmodel.select(database.ScrapeProgress)).one()
+        assert progress.listed_votings is None
+    old_engine.dispose()
+
+
+def test_add_foreign_keys_reports_missing_keys(
+    sitting: database.Sitting,
+) -> None:
+    """Rows loaded without constraints are checked before they are added."""
+    engine = database.get_engine(url="duckdb:///:memory:")
+    database.create_db_and_tables(engine=engine, foreign_keys=False)
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting]
+        )
+        session.commit()
+
+    with pytest.raises(database.ForeignKeyViolationError) as excinfo:
+        database.add_foreign_keys(engine=engine)
+
+    assert excinfo.value.violations == {
+        "sitting.term_id -> term.id": [sitting.term_id]
+    }
+
+
+def test_add_foreign_keys_adds_constraints_keeping_rows(
+    term: database.Term, sitting: database.Sitting
+) -> None:
+    engine = database.get_engine(url="duckdb:///:memory:")
+    database.create_db_and_tables(engine=engine, foreign_keys=False)
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        session.commit()
+
+    database.add_foreign_keys(engine=engine)
+    database.add_foreign_keys(engine=engine)
+
+    orphan = sitting.model_copy(update={"id": "orphan", "term_id": "missing"})
+    with sqlmodel.Session(engine) as session:
+        stored = session.exec(sqlmodel.select(database.Sitting)).one()
+        assert stored.title == sitting.title
+        with pytest.raises(duckdb.ConstraintException, match="foreign key"):
+            database.bulk_upsert(
+                session=session, model=database.Sitting, records=[orphan]
+            )
+
+
+def test_merge_database_upserts_rows_of_another_file(
+    tmp_path: "Path",
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    shard_file = tmp_path / "shard.duckdb"
+    shard_engine = database.get_engine(url=f"duckdb:///{shard_file}")
+    database.create_db_and_tables(engine=shard_engine)
+    renamed = sitting.model_copy(update={"title": "Renamed"})
+    with sqlmodel.Session(shard_engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[renamed]
+        )
+        database.bulk_upsert(
+            session=session,
+            model=database.HttpValidator,
+            records=[
+                database.HttpValidator(
+                    url="https://example.com", etag='"v1"', last_modified=None
+                )
+            ],
+        )
+        session.commit()
+    shard_engine.dispose()
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting]
+        )
+        session.commit()
+
+    database.merge_database(engine=engine, path=shard_file)
+
+    with sqlmodel.Session(engine) as session:
+        results = session.exec(sqlmodel.select(database.Sitting)).all()
+        assert len(results) == 1
+        assert results[0].title == "Renamed"
+        # Validators would skip requests for data other shards hold.
+        assert not session.exec(sqlmodel.select(database.HttpValidator)).all()
+
+
+def test_compact_database_writes_integer_keys_and_hex_views(
+    tmp_path: "Path",
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting]
+        )
+        session.commit()
+    path = tmp_path / "compact.duckdb"
+
+    database.compact_database(engine=engine, path=path)
+
+    with duckdb.connect(str(path)) as connection:
+        compact = connection.execute(
+            "SELECT id, term_id, title FROM sitting"
+        ).fetchall()
+        hex_keys = connection.execute(
+            "SELECT id, term_id FROM sitting_hex"
+        ).fetchall()
+        tables = {
+            row[0] for row in connection.execute("SHOW TABLES").fetchall()
+        }
+    assert compact == [
+        (
+            database_key_utils.compact_key(sitting.id),
+            database_key_utils.compact_key(term.id),
+            sitting.title,
+        )
+    ]
+    assert hex_keys == [(sitting.id, term.id)]
+    assert "scrapeprogress" not in tables
+
+
+def test_compact_database_rebuilds_vote_keys(
+    tmp_path: "Path",
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    """Vote keys are rebuilt by the view, and only those that cannot be
+    are mapped."""
+    option = database.VotingOption(
+        id=database_key_utils.generate_voting_option_natural_key(
+            term=term,
+            sitting=sitting,
+            voting=voting,
+            voting_option_index=OptionIndex(1),
+        ),
+        voting_id=voting.id,
+        index=1,
+        option_label=None,
+        description=None,
+        votes=2,
+    )
+    hashed = database.VoteRecord(
+        id=database_key_utils.generate_vote_natural_key(
+            term=term,
+            sitting=sitting,
+            voting=voting,
+            voting_option_index=OptionIndex(1),
+            mp_term_id=MpTermId(1),
+        ),
+        voting_option_id=option.id,
+        mp_to_term_link_id=None,
+        mp_term_id=1,
+        vote=Vote.YES,
+        party=None,
+    )
+    other = hashed.model_copy(update={"id": "f" * 64, "mp_term_id": 2})
+    with sqlmodel.Session(engine) as session:
+        for model, records in [
+            (database.Term, [term]),
+            (database.Sitting, [sitting]),
+            (database.Voting, [voting]),
+            (database.VotingOption, [option]),
+            (database.VoteRecord, [hashed, other]),
+        ]:
+            database.bulk_upsert(session=session, model=model, records=records)
+        session.commit()
+    path = tmp_path / "compact.duckdb"
+
+    database.compact_database(engine=engine, path=path)
+
+    with duckdb.connect(str(path)) as connection:
+        mapped = connection.execute(
+            "SELECT natural_key FROM voterecord_key"
+        ).fetchall()
+        hex_keys = connection.execute(
+            "SELECT id, voting_option_id FROM voterecord_hex ORDER BY id"
+        ).fetchall()
+    assert mapped == [(other.id,)]
+    assert hex_keys == sorted([(hashed.id, option.id), (other.id, option.id)])
+
+
+def test_compact_database_rejects_colliding_keys(
+    tmp_path: "Path",
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    twin = sitting.model_copy(update={"id": sitting.id[:15] + "0" * 49})
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting, twin]
+        )
+        session.commit()
+    path = tmp_path / "compact.duckdb"
+
+    with pytest.raises(database.KeyCollisionError, match="sitting"):
+        database.compact_database(engine=engine, path=path)
+
+    assert not path.exists()
+
+
+def test_compact_database_rejects_dangling_foreign_keys(
+    tmp_path: "Path", term: database.Term, sitting: database.Sitting
+) -> None:
+    """A foreign key sharing only its compact key with a row is caught."""
+    engine = database.get_engine(url="duckdb:///:memory:")
+    database.create_db_and_tables(engine=engine, foreign_keys=False)
+    lookalike = sitting.model_copy(update={"term_id": term.id[:15] + "0" * 49})
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[lookalike]
+        )
+        session.commit()
+    path = tmp_path / "compact.duckdb"
+
+    with pytest.raises(database.ForeignKeyViolationError, match="term_id"):
+        database.compact_database(engine=engine, path=path)
+
+    assert not path.exists()
@@ -241,3 +241,9 @@ def test_generate_vote_natural_key() -> None:
         mp_term_id=api_schemas.MpTermId(1),
     )
     assert len(key) == 64
+
+
+def test_compact_key_reads_leading_hex_digits() -> None:
+    key = database_key_utils._generate_hash(10)
+    assert database_key_utils.compact_key(key) == int(key[:15], 16)
+    assert database_key_utils.compact_key(key) < 2**63
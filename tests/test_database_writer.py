@@ -0,0 +1,102 @@
+import threading
+from typing import TYPE_CHECKING
+
+import anyio
+import pytest
+import sqlmodel
+
+from sejm_scraper import database, database_writer
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine.base import Engine
+
+
+def _store(session: sqlmodel.Session, term: database.Term) -> None:
+    database.bulk_upsert(session=session, model=database.Term, records=[term])
+    session.commit()
+
+
+def _count_terms(session: sqlmodel.Session) -> int:
+    return len(session.exec(sqlmodel.select(database.Term)).all())
+
+
+@pytest.mark.anyio
+async def test_run_sees_jobs_submitted_before_it(
+    engine: "Engine", term: database.Term
+) -> None:
+    async with database_writer.DatabaseWriter(engine) as writer:
+        await writer.submit(lambda session: _store(session, term))
+        assert await writer.run(_count_terms) == 1
+
+
+@pytest.mark.anyio
+async def test_run_raises_job_error_and_writer_carries_on(
+    engine: "Engine", term: database.Term
+) -> None:
+    def fail(_: sqlmodel.Session) -> None:
+        msg = "broken query"
+        raise RuntimeError(msg)
+
+    async with database_writer.DatabaseWriter(engine) as writer:
+        with pytest.raises(RuntimeError, match="broken query"):
+            await writer.run(fail)
+        await writer.submit(lambda session: _store(session, term))
+
+    with sqlmodel.Session(engine) as session:
+        assert _count_terms(session) == 1
+
+
+@pytest.mark.anyio
+async def test_failed_submitted_job_stops_writer(engine: "Engine") -> None:
+    def fail(_: sqlmodel.Session) -> None:
+        msg = "broken write"
+        raise RuntimeError(msg)
+
+    async def write() -> None:
+        async with database_writer.DatabaseWriter(engine) as writer:
+            await writer.submit(fail)
+            await anyio.sleep_forever()
+
+    with pytest.raises(ExceptionGroup) as excinfo:
+        await write()
+
+    assert excinfo.group_contains(RuntimeError, match="broken write")
+
+
+@pytest.mark.anyio
+async def test_submit_waits_while_queue_is_full(
+    engine: "Engine", term: database.Term
+) -> None:
+    release = threading.Event()
+    async with database_writer.DatabaseWriter(engine, max_pending=1) as writer:
+        await writer.submit(lambda _: release.wait())
+        await anyio.sleep(0.05)
+        await writer.submit(lambda _: None)
+
+        with anyio.move_on_after(0.05) as waiting:
+            await writer.submit(lambda session: _store(session, term))
+        assert waiting.cancelled_caught
+
+        release.set()
+        await writer.submit(lambda session: _store(session, term))
+
+    with sqlmodel.Session(engine) as session:
+        assert _count_terms(session) == 1
+
+
+@pytest.mark.anyio
+async def test_queued_jobs_are_written_when_block_fails(
+    engine: "Engine", term: database.Term
+) -> None:
+    async def write() -> None:
+        async with database_writer.DatabaseWriter(engine) as writer:
+            await writer.submit(lambda session: _store(session, term))
+            msg = "scrape failed"
+            raise RuntimeError(msg)
+
+    with pytest.raises(ExceptionGroup) as excinfo:
+        await write()
+
+    assert excinfo.group_contains(RuntimeError, match="scrape failed")
+    with sqlmodel.Session(engine) as session:
+        assert _count_terms(session) == 1
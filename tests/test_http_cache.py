@@ -0,0 +1,240 @@
+import time
+from collections.abc import Iterator
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+import respx
+
+from sejm_scraper import api_client, concurrency, http_cache
+
+from .conftest import MOCK_BASE_URL, TERM_RESPONSE, VOTE_DETAIL_RESPONSE
+
+TERMS_URL = f"{MOCK_BASE_URL}/term"
+MPS_URL = f"{MOCK_BASE_URL}/term9/MP"
+CLUBS_URL = f"{MOCK_BASE_URL}/term9/clubs"
+
+
+@pytest.fixture(autouse=True)
+def _patch_base_url(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api_client, "BASE_URL", MOCK_BASE_URL)
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> Iterator[http_cache.ResponseCache]:
+    with http_cache.ResponseCache(tmp_path / "cache.sqlite3") as c:
+        yield c
+
+
+def _age_entries(cache: http_cache.ResponseCache, seconds: float) -> None:
+    with cache._connection:
+        cache._connection.execute(
+            "UPDATE response SET stored_at = stored_at - ?", (seconds,)
+        )
+
+
+def test_get_returns_stored_body(cache: http_cache.ResponseCache) -> None:
+    cache.put(MPS_URL, b"[]")
+
+    assert cache.get(MPS_URL) == b"[]"
+
+
+def test_get_misses_unknown_url(cache: http_cache.ResponseCache) -> None:
+    assert cache.get(MPS_URL) is None
+
+
+def test_put_ignores_non_api_urls(cache: http_cache.ResponseCache) -> None:
+    url = "https://example.com/other"
+    cache.put(url, b"[]")
+
+    assert cache.get(url) is None
+
+
+def test_entry_expires_after_family_ttl(
+    cache: http_cache.ResponseCache,
+) -> None:
+    cache.put(MPS_URL, b"[]")
+    _age_entries(cache, timedelta(days=2).total_seconds())
+
+    assert cache.get(MPS_URL) is None
+
+
+def test_ttl_override(tmp_path: Path) -> None:
+    with http_cache.ResponseCache(
+        tmp_path / "cache.sqlite3",
+        ttls={api_client.EndpointFamily.MPS: timedelta(days=30)},
+    ) as cache:
+        cache.put(MPS_URL, b"[]")
+        _age_entries(cache, timedelta(days=2).total_seconds())
+
+        assert cache.get(MPS_URL) == b"[]"
+
+
+def test_closed_term_entries_never_expire(
+    cache: http_cache.ResponseCache,
+) -> None:
+    cache.put(
+        TERMS_URL,
+        b'[{"num": 9, "from": "2019-11-12", "to": "2023-11-12"},'
+        b' {"num": 10, "from": "2023-11-13"}]',
+    )
+    cache.put(MPS_URL, b"[]")
+    cache.put(f"{MOCK_BASE_URL}/term10/MP", b"[]")
+    _age_entries(cache, timedelta(days=365).total_seconds())
+
+    assert cache.get(MPS_URL) == b"[]"
+    assert cache.get(f"{MOCK_BASE_URL}/term10/MP") is None
+
+
+def test_closed_terms_persist_across_instances(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite3"
+    with http_cache.ResponseCache(path) as cache:
+        cache.put(
+            TERMS_URL, b'[{"num": 9, "from": "2019-11-12", "to": "2023-11-12"}]'
+        )
+        cache.put(MPS_URL, b"[]")
+        _age_entries(cache, timedelta(days=365).total_seconds())
+
+    with http_cache.ResponseCache(path) as cache:
+        assert cache.get(MPS_URL) == b"[]"
+
+
+def test_identical_bodies_are_stored_once(
+    cache: http_cache.ResponseCache,
+) -> None:
+    cache.put(MPS_URL, b"[]")
+    cache.put(CLUBS_URL, b"[]")
+
+    (count,) = cache._connection.execute(
+        "SELECT COUNT(*) FROM content"
+    ).fetchone()
+    assert count == 1
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    with http_cache.ResponseCache(
+        tmp_path / "cache.sqlite3", max_bytes=10
+    ) as cache:
+        cache.put(MPS_URL, b"[1111]")
+        time.sleep(0.01)
+        cache.put(CLUBS_URL, b"[2222]")
+
+        assert cache.get(MPS_URL) is None
+        assert cache.get(CLUBS_URL) == b"[2222]"
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_caching_transport_serves_repeat_requests(
+    cache: http_cache.ResponseCache,
+) -> None:
+    route = respx.get(TERMS_URL).mock(
+        return_value=httpx.Response(200, json=TERM_RESPONSE)
+    )
+    transport = http_cache.CachingTransport(cache)
+    async with httpx.AsyncClient(transport=transport) as client:
+        first = await api_client.fetch_terms(client=client)
+        second = await api_client.fetch_terms(client=client)
+
+    assert route.call_count == 1
+    assert first == second
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_caching_transport_does_not_store_errors(
+    cache: http_cache.ResponseCache,
+) -> None:
+    respx.get(TERMS_URL).mock(return_value=httpx.Response(404))
+    transport = http_cache.CachingTransport(cache)
+    async with httpx.AsyncClient(transport=transport) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            await api_client.fetch_terms(client=client)
+
+    assert cache.get(TERMS_URL) is None
+
+
+def test_cache_file_with_other_schema_version_is_reset(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite3"
+    with http_cache.ResponseCache(path) as cache:
+        cache.put(MPS_URL, b"[]")
+        cache._connection.execute("PRAGMA user_version = 1")
+
+    with http_cache.ResponseCache(path) as cache:
+        assert cache.get(MPS_URL) is None
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_caching_transport_revalidates_stale_entries(
+    cache: http_cache.ResponseCache,
+) -> None:
+    respx.get(TERMS_URL).mock(
+        side_effect=[
+            httpx.Response(200, json=TERM_RESPONSE, headers={"ETag": '"v1"'}),
+            httpx.Response(304),
+        ]
+    )
+    transport = http_cache.CachingTransport(cache)
+    async with httpx.AsyncClient(transport=transport) as client:
+        first = await client.get(TERMS_URL)
+        _age_entries(cache, timedelta(days=2).total_seconds())
+        second = await client.get(TERMS_URL)
+
+    assert respx.calls.last.request.headers["If-None-Match"] == '"v1"'
+    assert second.status_code == httpx.codes.OK
+    assert second.content == first.content
+    assert cache.get(TERMS_URL) is not None
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_caching_transport_answers_matching_conditional_request(
+    cache: http_cache.ResponseCache,
+) -> None:
+    url = f"{MOCK_BASE_URL}/term10/MP"
+    route = respx.get(url).mock(
+        return_value=httpx.Response(200, json=[], headers={"ETag": '"v1"'})
+    )
+    validators = api_client.ValidatorStore()
+    transport = http_cache.CachingTransport(cache)
+    async with httpx.AsyncClient(transport=transport) as client:
+        await api_client.fetch_mps(
+            client=client, term=10, validators=validators
+        )
+        validators.pop_fresh()
+        with pytest.raises(api_client.NotModifiedError):
+            await api_client.fetch_mps(
+                client=client, term=10, validators=validators
+            )
+
+    assert route.call_count == 1
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_cache_hits_are_kept_out_of_latency_samples(
+    cache: http_cache.ResponseCache,
+) -> None:
+    respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        return_value=httpx.Response(200, json=VOTE_DETAIL_RESPONSE)
+    )
+    limiter = concurrency.AdaptiveLimiter(initial_limit=8, max_limit=8)
+    hedger = concurrency.Hedger()
+    # Separate clients, so the second request is not coalesced with the
+    # first and reaches the cache.
+    for _ in range(2):
+        transport = http_cache.CachingTransport(cache)
+        async with httpx.AsyncClient(transport=transport) as client:
+            await api_client.fetch_votes(
+                client=client,
+                term=10,
+                sitting=39,
+                voting=205,
+                limiter=limiter,
+                hedger=hedger,
+            )
+
+    assert len(limiter._latencies) == 1
+    assert len(hedger._latencies) == 1
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from sejm_scraper import json_stream
+
+DOCUMENT = {
+    "title": "Głosowanie nad całością projektu",
+    "yes": 1234,
+    "votes": [
+        {"MP": 1, "club": "PiS", "vote": "YES"},
+        {"MP": 2, "club": "KO", "vote": "NO", "listVotes": {"1": "YES"}},
+        {"MP": 3, "club": None, "vote": "ABSENT"},
+    ],
+    "votingOptions": [{"optionIndex": 1, "votes": 7}],
+    "against": None,
+}
+
+
+def _parse_in_chunks(
+    data: bytes, size: int
+) -> tuple[list[object], dict[str, object]]:
+    parser = json_stream.ArrayStreamParser("votes")
+    elements = []
+    for start in range(0, len(data), size):
+        elements.extend(parser.feed(data[start : start + size]))
+    return elements, parser.close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 10_000])
+def test_parses_document_in_chunks_of_any_size(size: int) -> None:
+    data = json.dumps(DOCUMENT, ensure_ascii=False, indent=1).encode()
+
+    elements, members = _parse_in_chunks(data, size)
+
+    assert elements == DOCUMENT["votes"]
+    assert members == {
+        key: value for key, value in DOCUMENT.items() if key != "votes"
+    }
+
+
+def test_returns_elements_as_soon_as_they_are_complete() -> None:
+    parser = json_stream.ArrayStreamParser("votes")
+
+    assert parser.feed(b'{"votes": [{"MP": 1}, {"MP"') == [{"MP": 1}]
+    assert parser.feed(b": 2}]}") == [{"MP": 2}]
+    assert parser.close() == {}
+
+
+def test_waits_for_numbers_split_across_chunks() -> None:
+    parser = json_stream.ArrayStreamParser("votes")
+
+    parser.feed(b'{"yes": 12')
+    parser.feed(b"34}")
+
+    assert parser.close() == {"yes": 1234}
+
+
+def test_rejects_incomplete_document() -> None:
+    parser = json_stream.ArrayStreamParser("votes")
+    parser.feed(b'{"votes": [{"MP": 1}')
+
+    with pytest.raises(ValueError, match="incomplete"):
+        parser.close()
+
+
+def test_rejects_non_array_member() -> None:
+    parser = json_stream.ArrayStreamParser("votes")
+
+    with pytest.raises(ValueError, match="'\\['"):
+        parser.feed(b'{"votes": {}}')
+
+
+def test_rejects_malformed_document() -> None:
+    parser = json_stream.ArrayStreamParser("votes")
+    parser.feed(b'{"votes": [{"MP": oops}]}')
+
+    with pytest.raises(ValueError):  # noqa: PT011
+        parser.close()
@@ -1,12 +1,24 @@
+from datetime import UTC, date, datetime
 from typing import TYPE_CHECKING
 from unittest.mock import AsyncMock
 
+import anyio
+import httpx
 import pytest
 import sqlmodel
 
-from sejm_scraper import database, pipeline, scrape
+from sejm_scraper import (
+    api_client,
+    api_schemas,
+    database,
+    pipeline,
+    scrape,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+    from pathlib import Path
+
     from sqlalchemy.engine.base import Engine
 
 
@@ -111,6 +123,28 @@ async def test_pipeline_full_flow(engine: "Engine") -> None:
         assert len(votings) == 1
 
 
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_bulk_load_adds_foreign_keys_at_the_end() -> None:
+    engine = database.get_engine(url="duckdb:///:memory:")
+
+    await pipeline.pipeline(
+        engine=engine, options=pipeline.PipelineOptions(bulk_load=True)
+    )
+
+    with engine.connect() as connection:
+        constrained = set(
+            connection.exec_driver_sql(
+                "SELECT table_name FROM duckdb_constraints() "
+                "WHERE constraint_type = 'FOREIGN KEY'"
+            ).scalars()
+        )
+    with sqlmodel.Session(engine) as session:
+        votings = session.exec(sqlmodel.select(database.Voting)).all()
+    assert {"sitting", "voting", "voterecord"} <= constrained
+    assert len(votings) == 1
+
+
 @pytest.mark.anyio
 @pytest.mark.usefixtures("_mock_scrape")
 async def test_pipeline_passes_from_term(engine: "Engine") -> None:
@@ -242,6 +276,509 @@ async def test_pipeline_crash_during_votes_commits_no_votings(
         assert len(votings) == 0
 
 
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_flushes_finished_votings_of_long_sitting(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    """Over the row budget, finished votings are committed with their
+    votes before the sitting is done, and a crash keeps them."""
+    second = voting.model_copy(update={"id": "second", "number": 206})
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(
+            return_value=scrape.ScrapedVotingsResult(
+                votings=[voting, second], voting_options=[]
+            )
+        ),
+    )
+
+    async def scrape_votes(
+        *, voting: database.Voting, **_: object
+    ) -> scrape.ScrapedVotesResult:
+        if voting.id == second.id:
+            await anyio.sleep(0.1)
+            msg = "simulated crash"
+            raise RuntimeError(msg)
+        return scrape.ScrapedVotesResult(
+            votes=[
+                database.VoteRecord(
+                    id="vote1",
+                    voting_option_id="opt1",
+                    mp_to_term_link_id=None,
+                    mp_term_id=1,
+                    vote=api_schemas.Vote.YES,
+                    party=None,
+                )
+            ],
+            voting_options=[
+                database.VotingOption(
+                    id="opt1",
+                    voting_id=voting.id,
+                    index=1,
+                    option_label=None,
+                    description=None,
+                    votes=1,
+                )
+            ],
+        )
+
+    monkeypatch.setattr(scrape, "scrape_votes", scrape_votes)
+
+    with pytest.raises(ExceptionGroup):
+        await pipeline.pipeline(
+            engine=engine, options=pipeline.PipelineOptions(flush_rows=2)
+        )
+
+    with sqlmodel.Session(engine) as session:
+        votings = session.exec(sqlmodel.select(database.Voting)).all()
+        assert [v.id for v in votings] == [voting.id]
+        assert len(session.exec(sqlmodel.select(database.VoteRecord)).all())
+        voting_progress = session.get(database.ScrapeProgress, voting.id)
+        assert voting_progress is not None
+        assert voting_progress.status == database.UnitStatus.DONE
+        sitting_progress = session.get(database.ScrapeProgress, sitting.id)
+        assert sitting_progress is not None
+        assert sitting_progress.status == database.UnitStatus.STARTED
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+@pytest.mark.parametrize("votes", ["buffered", "streamed"])
+async def test_pipeline_keeps_detail_options_of_flushed_votings(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    voting: database.Voting,
+    votes: str,
+) -> None:
+    """Options from a voting's detail, written in a chunk, are not
+    replaced by the voting list's when the sitting is committed."""
+    stream_votes = votes == "streamed"
+
+    def option(label: str) -> database.VotingOption:
+        return database.VotingOption(
+            id="opt1",
+            voting_id=voting.id,
+            index=1,
+            option_label=label,
+            description=None,
+            votes=1,
+        )
+
+    vote = database.VoteRecord(
+        id="vote1",
+        voting_option_id="opt1",
+        mp_to_term_link_id=None,
+        mp_term_id=1,
+        vote=api_schemas.Vote.YES,
+        party=None,
+    )
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(
+            return_value=scrape.ScrapedVotingsResult(
+                votings=[voting], voting_options=[option("list")]
+            )
+        ),
+    )
+
+    async def scrape_votes(
+        *,
+        on_batch: "Callable[[scrape.ScrapedVotesResult], Awaitable[None]]",
+        **_: object,
+    ) -> scrape.ScrapedVotesResult:
+        if stream_votes:
+            await on_batch(
+                scrape.ScrapedVotesResult(votes=[vote], voting_options=[])
+            )
+            return scrape.ScrapedVotesResult(
+                votes=[], voting_options=[option("detail")]
+            )
+        return scrape.ScrapedVotesResult(
+            votes=[vote], voting_options=[option("detail")]
+        )
+
+    monkeypatch.setattr(scrape, "scrape_votes", scrape_votes)
+
+    await pipeline.pipeline(
+        engine=engine,
+        options=pipeline.PipelineOptions(
+            stream_votes=stream_votes, flush_rows=1
+        ),
+    )
+
+    with sqlmodel.Session(engine) as session:
+        stored = session.get(database.VotingOption, "opt1")
+        assert stored is not None
+        assert stored.option_label == "detail"
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_writes_streamed_votes_in_batches(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    voting: database.Voting,
+) -> None:
+    """Streamed votes are written while the voting is parsed, with a
+    placeholder option the voting's detail replaces at the end."""
+
+    def record(vote_id: str) -> database.VoteRecord:
+        return database.VoteRecord(
+            id=vote_id,
+            voting_option_id="opt1",
+            mp_to_term_link_id=None,
+            mp_term_id=1,
+            vote=api_schemas.Vote.YES,
+            party=None,
+        )
+
+    def option(label: str | None) -> database.VotingOption:
+        return database.VotingOption(
+            id="opt1",
+            voting_id=voting.id,
+            index=1,
+            option_label=label,
+            description=None,
+            votes=0,
+        )
+
+    async def scrape_votes(
+        *,
+        stream: bool,
+        on_batch: "Callable[[scrape.ScrapedVotesResult], Awaitable[None]]",
+        batch_size: int,
+        **_: object,
+    ) -> scrape.ScrapedVotesResult:
+        assert stream
+        assert batch_size == 1
+        # A retried request passes its records again.
+        for _attempt in range(2):
+            await on_batch(
+                scrape.ScrapedVotesResult(
+                    votes=[record("vote1")], voting_options=[option(None)]
+                )
+            )
+        return scrape.ScrapedVotesResult(
+            votes=[record("vote2")], voting_options=[option("Za")]
+        )
+
+    monkeypatch.setattr(scrape, "scrape_votes", scrape_votes)
+
+    await pipeline.pipeline(
+        engine=engine,
+        options=pipeline.PipelineOptions(stream_votes=True, flush_rows=1),
+    )
+
+    with sqlmodel.Session(engine) as session:
+        votes = session.exec(sqlmodel.select(database.VoteRecord)).all()
+        assert sorted(v.id for v in votes) == ["vote1", "vote2"]
+        stored = session.get(database.VotingOption, "opt1")
+        assert stored is not None
+        assert stored.option_label == "Za"
+        progress = session.get(database.ScrapeProgress, voting.id)
+        assert progress is not None
+        assert progress.status == database.UnitStatus.DONE
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_fetches_term_lists_concurrently(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+) -> None:
+    """The MP, club and sitting lists are all requested before any of
+    them has answered."""
+    started: list[str] = []
+    all_started = anyio.Event()
+
+    def wait_for_all(name: str, result: object) -> AsyncMock:
+        async def fetch(**_: object) -> object:
+            started.append(name)
+            if len(started) == 3:
+                all_started.set()
+            await all_started.wait()
+            return result
+
+        return AsyncMock(side_effect=fetch)
+
+    for name in ("scrape_mps", "scrape_clubs", "scrape_sittings"):
+        monkeypatch.setattr(
+            scrape,
+            name,
+            wait_for_all(name, getattr(scrape, name).return_value),
+        )
+
+    with anyio.fail_after(5):
+        await pipeline.pipeline(engine=engine)
+
+    assert sorted(started) == ["scrape_clubs", "scrape_mps", "scrape_sittings"]
+    with sqlmodel.Session(engine) as session:
+        assert len(session.exec(sqlmodel.select(database.Voting)).all()) == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_prefetches_voting_table_of_terms_without_sittings(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    old_term = term.model_copy(update={"number": 5})
+    monkeypatch.setattr(
+        scrape, "scrape_terms", AsyncMock(return_value=[old_term])
+    )
+    table_requested = anyio.Event()
+
+    async def fetch_voting_table(**_: object) -> list[object]:
+        table_requested.set()
+        return []
+
+    async def scrape_sittings(**_: object) -> scrape.ScrapedSittingsResult:
+        await table_requested.wait()
+        return scrape.ScrapedSittingsResult(sittings=[], sitting_days=[])
+
+    monkeypatch.setattr(api_client, "fetch_voting_table", fetch_voting_table)
+    monkeypatch.setattr(scrape, "scrape_sittings", scrape_sittings)
+    scrape.discover_sittings_from_votings.return_value = (  # ty: ignore[unresolved-attribute]
+        scrape.ScrapedSittingsResult(sittings=[sitting], sitting_days=[])
+    )
+
+    with anyio.fail_after(5):
+        await pipeline.pipeline(engine=engine)
+
+    scrape.scrape_votings.assert_called_once()  # ty: ignore[unresolved-attribute]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_rescrapes_votes_of_stored_sitting(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    voting: database.Voting,
+) -> None:
+    """Votes of a new sitting are inserted plainly, and upserted once
+    the sitting is stored; a voting listed twice is scraped once."""
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(
+            return_value=scrape.ScrapedVotingsResult(
+                votings=[voting, voting], voting_options=[]
+            )
+        ),
+    )
+    option = database.VotingOption(
+        id="opt1",
+        voting_id=voting.id,
+        index=1,
+        option_label=None,
+        description=None,
+        votes=1,
+    )
+    vote = database.VoteRecord(
+        id="vote1",
+        voting_option_id=option.id,
+        mp_to_term_link_id=None,
+        mp_term_id=1,
+        vote=api_schemas.Vote.YES,
+        party=None,
+    )
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votes",
+        AsyncMock(
+            return_value=scrape.ScrapedVotesResult(
+                votes=[vote], voting_options=[option]
+            )
+        ),
+    )
+
+    await pipeline.pipeline(engine=engine)
+    scrape.scrape_votes.assert_called_once()  # ty: ignore[unresolved-attribute]
+    await pipeline.pipeline(engine=engine)
+
+    with sqlmodel.Session(engine) as session:
+        assert (
+            len(session.exec(sqlmodel.select(database.VoteRecord)).all()) == 1
+        )
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_fetches_next_sitting_before_storing_previous(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    next_sitting = sitting.model_copy(update={"id": "next", "number": 40})
+    monkeypatch.setattr(
+        scrape,
+        "scrape_sittings",
+        AsyncMock(
+            return_value=scrape.ScrapedSittingsResult(
+                sittings=[sitting, next_sitting], sitting_days=[]
+            )
+        ),
+    )
+    events: list[tuple[str, int]] = []
+
+    async def scrape_votings(
+        *, sitting: database.Sitting, **_: object
+    ) -> scrape.ScrapedVotingsResult:
+        events.append(("fetch", sitting.number))
+        votings = [voting] if sitting.id == voting.sitting_id else []
+        return scrape.ScrapedVotingsResult(votings=votings, voting_options=[])
+
+    monkeypatch.setattr(scrape, "scrape_votings", scrape_votings)
+    store_votings = pipeline._store_votings
+
+    def record_store(
+        database_client: sqlmodel.Session,
+        term: database.Term,
+        work: pipeline._SittingWork,
+    ) -> None:
+        events.append(("store", work.sitting.number))
+        store_votings(database_client, term, work)
+
+    monkeypatch.setattr(pipeline, "_store_votings", record_store)
+
+    await pipeline.pipeline(engine=engine)
+
+    assert events.index(("fetch", 40)) < events.index(("store", 39))
+    assert events.index(("store", 39)) < events.index(("store", 40))
+    with sqlmodel.Session(engine) as session:
+        assert len(session.exec(sqlmodel.select(database.Sitting)).all()) == 2
+        assert len(session.exec(sqlmodel.select(database.Voting)).all()) == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_scrapes_terms_concurrently(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    earlier_term = term.model_copy(update={"id": "earlier", "number": 9})
+    monkeypatch.setattr(
+        scrape,
+        "scrape_terms",
+        AsyncMock(return_value=[term, earlier_term]),
+    )
+    started: list[int] = []
+    both_started = anyio.Event()
+
+    async def scrape_mps(
+        *, term: database.Term, **_: object
+    ) -> scrape.ScrapedMpsResult:
+        started.append(term.number)
+        if len(started) == 2:
+            both_started.set()
+        with anyio.fail_after(5):
+            await both_started.wait()
+        return scrape.ScrapedMpsResult(mps=[], mp_to_term_links=[])
+
+    async def scrape_sittings(
+        *, term: database.Term, **_: object
+    ) -> scrape.ScrapedSittingsResult:
+        sittings = [sitting] if term.id == sitting.term_id else []
+        return scrape.ScrapedSittingsResult(sittings=sittings, sitting_days=[])
+
+    monkeypatch.setattr(scrape, "scrape_mps", scrape_mps)
+    monkeypatch.setattr(scrape, "scrape_sittings", scrape_sittings)
+
+    await pipeline.pipeline(
+        engine=engine,
+        options=pipeline.PipelineOptions(concurrent_terms=2),
+    )
+
+    assert started == [9, 10]
+    with sqlmodel.Session(engine) as session:
+        assert len(session.exec(sqlmodel.select(database.Term)).all()) == 2
+        assert len(session.exec(sqlmodel.select(database.Voting)).all()) == 1
+
+
+@pytest.mark.parametrize("value", ["0/2", "3/2", "1", "a/b", "1/2/3"])
+def test_shard_parse_rejects_invalid(value: str) -> None:
+    with pytest.raises(ValueError, match=r"shard|INDEX/COUNT"):
+        pipeline.Shard.parse(value)
+
+
+def test_shards_partition_sittings(sitting: database.Sitting) -> None:
+    sittings = [
+        sitting.model_copy(update={"id": f"{number:064x}", "number": number})
+        for number in range(1, 13)
+    ]
+    shards = [pipeline.Shard.parse(f"{index}/3") for index in range(1, 4)]
+
+    owners = [[s for s in shards if s.owns(sitting)] for sitting in sittings]
+
+    assert all(len(owner) == 1 for owner in owners)
+    assert {owner[0] for owner in owners} == set(shards)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_skips_sittings_of_other_shards(
+    engine: "Engine",
+    sitting: database.Sitting,
+) -> None:
+    other = next(
+        pipeline.Shard(index, 2)
+        for index in (1, 2)
+        if not pipeline.Shard(index, 2).owns(sitting)
+    )
+
+    await pipeline.pipeline(
+        engine=engine, options=pipeline.PipelineOptions(shard=other)
+    )
+
+    scrape.scrape_votings.assert_not_called()  # ty: ignore[unresolved-attribute]
+    with sqlmodel.Session(engine) as session:
+        assert len(session.exec(sqlmodel.select(database.Term)).all()) == 1
+        assert not session.exec(sqlmodel.select(database.Sitting)).all()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_resume_pipeline_after_partial_merge_scrapes_missing_shard(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: "Path",
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    ended = term.model_copy(update={"to_date": date(2027, 11, 12)})
+    monkeypatch.setattr(scrape, "scrape_terms", AsyncMock(return_value=[ended]))
+    other = next(
+        pipeline.Shard(index, 2)
+        for index in (1, 2)
+        if not pipeline.Shard(index, 2).owns(sitting)
+    )
+    shard_file = tmp_path / "shard.duckdb"
+    shard_engine = database.get_engine(url=f"duckdb:///{shard_file}")
+    await pipeline.pipeline(
+        engine=shard_engine, options=pipeline.PipelineOptions(shard=other)
+    )
+    shard_engine.dispose()
+    database.merge_database(engine=engine, path=shard_file)
+
+    await pipeline.resume_pipeline(engine=engine)
+
+    # The merged shard finished the term, but not the sitting it lacks.
+    scrape.scrape_votings.assert_called_once()  # ty: ignore[unresolved-attribute]
+    with sqlmodel.Session(engine) as session:
+        assert session.get(database.Sitting, sitting.id) is not None
+
+
 @pytest.mark.anyio
 async def test_resume_pipeline_cold_start(
     monkeypatch: pytest.MonkeyPatch,
@@ -253,7 +790,9 @@ async def test_resume_pipeline_cold_start(
 
     await pipeline.resume_pipeline(engine=engine)
 
-    mock_pipeline.assert_called_once_with(engine=engine)
+    mock_pipeline.assert_called_once_with(
+        engine=engine, http_client=None, options=None
+    )
 
 
 @pytest.mark.anyio
@@ -276,7 +815,9 @@ async def test_resume_pipeline_with_existing_term(
 
     await pipeline.resume_pipeline(engine=engine)
 
-    mock_pipeline.assert_called_once_with(engine=engine, from_term=10)
+    mock_pipeline.assert_called_once_with(
+        engine=engine, http_client=None, options=None, from_term=10
+    )
 
 
 @pytest.mark.anyio
@@ -306,7 +847,11 @@ async def test_resume_pipeline_with_existing_sitting(
     await pipeline.resume_pipeline(engine=engine)
 
     mock_pipeline.assert_called_once_with(
-        engine=engine, from_term=10, from_sitting=39
+        engine=engine,
+        http_client=None,
+        options=None,
+        from_term=10,
+        from_sitting=39,
     )
 
 
@@ -344,7 +889,658 @@ async def test_resume_pipeline_with_existing_voting(
 
     mock_pipeline.assert_called_once_with(
         engine=engine,
+        http_client=None,
+        options=None,
         from_term=10,
         from_sitting=39,
         from_voting=205,
     )
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_records_progress(
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    await pipeline.pipeline(engine=engine)
+
+    with sqlmodel.Session(engine) as session:
+        progress = {
+            unit.id: unit
+            for unit in session.exec(sqlmodel.select(database.ScrapeProgress))
+        }
+
+    assert set(progress) == {term.id, sitting.id, voting.id}
+    assert all(
+        unit.status == database.UnitStatus.DONE for unit in progress.values()
+    )
+    assert progress[sitting.id].kind == database.UnitKind.SITTING
+    assert progress[sitting.id].parent_id == term.id
+    assert progress[voting.id].parent_id == sitting.id
+    assert progress[voting.id].attempts == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_resume_pipeline_skips_units_done_in_ledger(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    ended = term.model_copy(update={"to_date": date(2027, 11, 12)})
+    monkeypatch.setattr(scrape, "scrape_terms", AsyncMock(return_value=[ended]))
+    await pipeline.pipeline(engine=engine)
+    scrape.scrape_votings.reset_mock()  # ty: ignore[unresolved-attribute]
+    with sqlmodel.Session(engine) as session:
+        # As if the run had stopped before the term was finished.
+        progress = session.get(database.ScrapeProgress, term.id)
+        assert progress is not None
+        progress.status = database.UnitStatus.STARTED
+        session.add(progress)
+        session.commit()
+
+    await pipeline.resume_pipeline(engine=engine)
+
+    # The term is rerun, but its only sitting is done.
+    scrape.scrape_sittings.assert_called()  # ty: ignore[unresolved-attribute]
+    scrape.scrape_votings.assert_not_called()  # ty: ignore[unresolved-attribute]
+    with sqlmodel.Session(engine) as session:
+        stored = session.get(database.ScrapeProgress, sitting.id)
+        assert stored is not None
+        assert stored.attempts == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_rescrapes_done_term_until_it_ends(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    await pipeline.pipeline(engine=engine, done_units={term.id, sitting.id})
+
+    # The term is still running, so its sittings are listed again, but
+    # its done sitting is skipped.
+    scrape.scrape_sittings.assert_called_once()  # ty: ignore[unresolved-attribute]
+    scrape.scrape_votings.assert_not_called()  # ty: ignore[unresolved-attribute]
+
+    ended = term.model_copy(update={"to_date": date(2027, 11, 12)})
+    monkeypatch.setattr(scrape, "scrape_terms", AsyncMock(return_value=[ended]))
+    await pipeline.pipeline(engine=engine, done_units={term.id})
+
+    scrape.scrape_sittings.assert_called_once()  # ty: ignore[unresolved-attribute]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_resume_pipeline_rescrapes_sitting_done_before_it_ended(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    """A sitting marked done on one of its days gains votings on later
+    ones, while its done votings keep the options of their detail."""
+    monkeypatch.setattr(
+        scrape,
+        "scrape_sittings",
+        AsyncMock(
+            return_value=scrape.ScrapedSittingsResult(
+                sittings=[sitting],
+                sitting_days=[
+                    database.SittingDay(
+                        id="day",
+                        sitting_id=sitting.id,
+                        date=datetime.now(UTC).date(),
+                    )
+                ],
+            )
+        ),
+    )
+
+    def option(label: str) -> database.VotingOption:
+        return database.VotingOption(
+            id="opt1",
+            voting_id=voting.id,
+            index=1,
+            option_label=label,
+            description=None,
+            votes=1,
+        )
+
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votes",
+        AsyncMock(
+            return_value=scrape.ScrapedVotesResult(
+                votes=[], voting_options=[option("detail")]
+            )
+        ),
+    )
+    listed = [option("list")]
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(
+            return_value=scrape.ScrapedVotingsResult(
+                votings=[voting], voting_options=listed
+            )
+        ),
+    )
+    await pipeline.pipeline(engine=engine)
+    with sqlmodel.Session(engine) as session:
+        progress = session.get(database.ScrapeProgress, sitting.id)
+        assert progress is not None
+        assert progress.status == database.UnitStatus.DONE
+    next_day = voting.model_copy(
+        update={"id": "next-day", "number": 206, "sitting_day": 7}
+    )
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(
+            return_value=scrape.ScrapedVotingsResult(
+                votings=[voting, next_day], voting_options=listed
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votes",
+        AsyncMock(
+            return_value=scrape.ScrapedVotesResult(votes=[], voting_options=[])
+        ),
+    )
+
+    await pipeline.resume_pipeline(engine=engine)
+
+    # Only the new voting's votes are fetched.
+    scrape.scrape_votes.assert_called_once()  # ty: ignore[unresolved-attribute]
+    with sqlmodel.Session(engine) as session:
+        assert session.get(database.Voting, "next-day") is not None
+        stored = session.get(database.VotingOption, "opt1")
+        assert stored is not None
+        assert stored.option_label == "detail"
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_conditional_stores_validators(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    voting: database.Voting,
+) -> None:
+    url = "https://sejm-mock.pl/term10/votings/39"
+
+    async def _scrape_votings(
+        **kwargs: object,
+    ) -> scrape.ScrapedVotingsResult:
+        validators = kwargs["validators"]
+        assert isinstance(validators, api_client.ValidatorStore)
+        validators.record(url, httpx.Response(200, headers={"ETag": '"v1"'}))
+        return scrape.ScrapedVotingsResult(votings=[voting], voting_options=[])
+
+    monkeypatch.setattr(scrape, "scrape_votings", _scrape_votings)
+
+    await pipeline.pipeline(
+        engine=engine,
+        options=pipeline.PipelineOptions(conditional=True),
+    )
+
+    with sqlmodel.Session(engine) as session:
+        stored = session.get(database.HttpValidator, url)
+        assert stored is not None
+        assert stored.etag == '"v1"'
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_conditional_skips_unchanged_stored_sitting(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+) -> None:
+    await pipeline.pipeline(engine=engine)
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(side_effect=api_client.NotModifiedError("url")),
+    )
+    scrape_votes = AsyncMock()
+    monkeypatch.setattr(scrape, "scrape_votes", scrape_votes)
+
+    await pipeline.pipeline(
+        engine=engine,
+        options=pipeline.PipelineOptions(conditional=True),
+    )
+
+    scrape.scrape_votings.assert_called_once()  # ty: ignore[unresolved-attribute]
+    scrape_votes.assert_not_called()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_pipeline_conditional_refetches_when_nothing_stored(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    voting: database.Voting,
+) -> None:
+    """A 304 for data that never reached the database (e.g. after a
+    crash) must not skip it."""
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(
+            side_effect=[
+                api_client.NotModifiedError("url"),
+                scrape.ScrapedVotingsResult(
+                    votings=[voting], voting_options=[]
+                ),
+            ]
+        ),
+    )
+
+    await pipeline.pipeline(
+        engine=engine,
+        options=pipeline.PipelineOptions(conditional=True),
+    )
+
+    with sqlmodel.Session(engine) as session:
+        votings = session.exec(sqlmodel.select(database.Voting)).all()
+        assert len(votings) == 1
+
+
+@pytest.mark.anyio
+async def test_resume_pipeline_with_concurrent_terms_resumes_each_term(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    earlier_term = term.model_copy(update={"id": "earlier", "number": 9})
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session,
+            model=database.Term,
+            records=[earlier_term, term],
+        )
+        database.bulk_upsert(
+            session=session,
+            model=database.Sitting,
+            records=[sitting],
+        )
+        database.bulk_upsert(
+            session=session,
+            model=database.Voting,
+            records=[voting],
+        )
+        session.commit()
+
+    mock_pipeline = AsyncMock()
+    monkeypatch.setattr(pipeline, "pipeline", mock_pipeline)
+    options = pipeline.PipelineOptions(concurrent_terms=2)
+
+    await pipeline.resume_pipeline(engine=engine, options=options)
+
+    mock_pipeline.assert_called_once_with(
+        engine=engine,
+        http_client=None,
+        options=options,
+        from_term=9,
+        term_starts={
+            9: pipeline.TermStart(),
+            10: pipeline.TermStart(sitting=39, voting=205),
+        },
+    )
+
+
+def _store_voting(
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+    *,
+    with_votes: bool,
+) -> None:
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.Term, records=[term]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Sitting, records=[sitting]
+        )
+        database.bulk_upsert(
+            session=session, model=database.Voting, records=[voting]
+        )
+        if with_votes:
+            database.bulk_upsert(
+                session=session,
+                model=database.VotingOption,
+                records=[
+                    database.VotingOption(
+                        id="opt1",
+                        voting_id=voting.id,
+                        index=1,
+                        option_label=None,
+                        description=None,
+                        votes=1,
+                    )
+                ],
+            )
+            database.bulk_upsert(
+                session=session,
+                model=database.VoteRecord,
+                records=[
+                    database.VoteRecord(
+                        id="vote1",
+                        voting_option_id="opt1",
+                        mp_to_term_link_id=None,
+                        mp_term_id=1,
+                        vote=api_schemas.Vote.YES,
+                        party=None,
+                    )
+                ],
+            )
+        session.commit()
+
+
+@pytest.fixture
+def _mock_voting_table(
+    monkeypatch: pytest.MonkeyPatch, voting: database.Voting
+) -> None:
+    monkeypatch.setattr(
+        api_client,
+        "fetch_voting_table",
+        AsyncMock(
+            return_value=[
+                api_schemas.VotingTableEntrySchema(
+                    date=voting.date, proceeding=39, votingsNum=1
+                )
+            ]
+        ),
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape", "_mock_voting_table")
+async def test_gap_fill_pipeline_scrapes_votings_missing_votes(
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    _store_voting(engine, term, sitting, voting, with_votes=False)
+
+    await pipeline.gap_fill_pipeline(engine=engine)
+
+    scrape.scrape_votings.assert_called_once()  # ty: ignore[unresolved-attribute]
+    scrape.scrape_votes.assert_called_once()  # ty: ignore[unresolved-attribute]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape", "_mock_voting_table")
+async def test_gap_fill_pipeline_skips_complete_sittings(
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    _store_voting(engine, term, sitting, voting, with_votes=True)
+
+    await pipeline.gap_fill_pipeline(engine=engine)
+
+    scrape.scrape_votings.assert_not_called()  # ty: ignore[unresolved-attribute]
+    scrape.scrape_mps.assert_not_called()  # ty: ignore[unresolved-attribute]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape", "_mock_voting_table")
+async def test_gap_fill_pipeline_fetches_only_missing_votes(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    """A sitting short of votings is rescraped, but votes are only
+    fetched for the votings that have none stored."""
+    _store_voting(engine, term, sitting, voting, with_votes=True)
+    new_voting = voting.model_copy(update={"id": "new", "number": 206})
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(
+            return_value=scrape.ScrapedVotingsResult(
+                votings=[voting, new_voting], voting_options=[]
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        api_client,
+        "fetch_voting_table",
+        AsyncMock(
+            return_value=[
+                api_schemas.VotingTableEntrySchema(
+                    date=voting.date, proceeding=39, votingsNum=2
+                )
+            ]
+        ),
+    )
+
+    await pipeline.gap_fill_pipeline(engine=engine)
+
+    scrape.scrape_votes.assert_called_once()  # ty: ignore[unresolved-attribute]
+    assert scrape.scrape_votes.call_args.kwargs["voting"] == new_voting  # ty: ignore[unresolved-attribute]
+    with sqlmodel.Session(engine) as session:
+        assert len(session.exec(sqlmodel.select(database.Voting)).all()) == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_gap_fill_pipeline_keeps_options_of_complete_votings(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    _store_voting(engine, term, sitting, voting, with_votes=True)
+    new_voting = voting.model_copy(update={"id": "new", "number": 206})
+    listed = database.VotingOption(
+        id="opt1",
+        voting_id=voting.id,
+        index=1,
+        option_label="list",
+        description=None,
+        votes=1,
+    )
+    monkeypatch.setattr(
+        scrape,
+        "scrape_votings",
+        AsyncMock(
+            return_value=scrape.ScrapedVotingsResult(
+                votings=[voting, new_voting], voting_options=[listed]
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        api_client,
+        "fetch_voting_table",
+        AsyncMock(
+            return_value=[
+                api_schemas.VotingTableEntrySchema(
+                    date=voting.date, proceeding=39, votingsNum=2
+                )
+            ]
+        ),
+    )
+
+    await pipeline.gap_fill_pipeline(engine=engine)
+
+    with sqlmodel.Session(engine) as session:
+        stored = session.get(database.VotingOption, "opt1")
+        assert stored is not None
+        assert stored.option_label is None
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape", "_mock_voting_table")
+async def test_gap_fill_pipeline_scrapes_voting_streamed_in_part(
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    """A voting with some votes stored, in a sitting the ledger records
+    as started, was cut short and is scraped again."""
+    _store_voting(engine, term, sitting, voting, with_votes=True)
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session,
+            model=database.ScrapeProgress,
+            records=[
+                database.ScrapeProgress(
+                    id=sitting.id,
+                    kind=database.UnitKind.SITTING,
+                    parent_id=term.id,
+                    status=database.UnitStatus.STARTED,
+                    attempts=1,
+                    duration_seconds=0.0,
+                    response_bytes=0,
+                )
+            ],
+        )
+        session.commit()
+
+    await pipeline.gap_fill_pipeline(engine=engine)
+
+    scrape.scrape_votes.assert_called_once()  # ty: ignore[unresolved-attribute]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape", "_mock_voting_table")
+async def test_gap_fill_pipeline_does_not_refetch_voteless_votings(
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    _store_voting(engine, term, sitting, voting, with_votes=False)
+
+    await pipeline.gap_fill_pipeline(engine=engine)
+    await pipeline.gap_fill_pipeline(engine=engine)
+
+    scrape.scrape_votes.assert_called_once()  # ty: ignore[unresolved-attribute]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_gap_fill_pipeline_refetches_short_sitting_on_new_count(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    """A sitting the API lists fewer votings for than its voting table
+    counts is not refetched until the count changes."""
+    _store_voting(engine, term, sitting, voting, with_votes=True)
+    votings_num = 2
+
+    async def fetch_voting_table(**_: object) -> list[object]:
+        return [
+            api_schemas.VotingTableEntrySchema(
+                date=voting.date, proceeding=39, votingsNum=votings_num
+            )
+        ]
+
+    monkeypatch.setattr(api_client, "fetch_voting_table", fetch_voting_table)
+
+    await pipeline.gap_fill_pipeline(engine=engine)
+    await pipeline.gap_fill_pipeline(engine=engine)
+    assert scrape.scrape_votings.call_count == 1  # ty: ignore[unresolved-attribute]
+
+    votings_num = 3
+    await pipeline.gap_fill_pipeline(engine=engine)
+    assert scrape.scrape_votings.call_count == 2  # ty: ignore[unresolved-attribute]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape")
+async def test_watch_pipeline_scrapes_votings_published_between_polls(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    _store_voting(engine, term, sitting, voting, with_votes=True)
+    entry = api_schemas.VotingTableEntrySchema(
+        date=voting.date, proceeding=39, votingsNum=1
+    )
+    monkeypatch.setattr(
+        api_client,
+        "fetch_voting_table",
+        AsyncMock(
+            side_effect=[
+                [entry],
+                httpx.ConnectError("unreachable"),
+                [entry, entry],
+            ]
+        ),
+    )
+
+    await pipeline.watch_pipeline(engine=engine, interval=0, polls=3)
+
+    scrape.scrape_votings.assert_called_once()  # ty: ignore[unresolved-attribute]
+    scrape.scrape_mps.assert_called_once()  # ty: ignore[unresolved-attribute]
+    scrape.scrape_clubs.assert_not_called()  # ty: ignore[unresolved-attribute]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_scrape", "_mock_voting_table")
+async def test_watch_pipeline_scrapes_and_watches_new_term(
+    monkeypatch: pytest.MonkeyPatch,
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    _store_voting(engine, term, sitting, voting, with_votes=True)
+    new_term = term.model_copy(update={"id": "term11", "number": 11})
+    monkeypatch.setattr(
+        scrape,
+        "scrape_terms",
+        AsyncMock(side_effect=[[term], [term, new_term], [new_term]]),
+    )
+
+    await pipeline.watch_pipeline(engine=engine, interval=0, polls=3)
+
+    scrape.scrape_clubs.assert_called_once()  # ty: ignore[unresolved-attribute]
+    assert scrape.scrape_clubs.call_args.kwargs["term"] == new_term  # ty: ignore[unresolved-attribute]
+    watched = [
+        call.kwargs["term"]
+        for call in api_client.fetch_voting_table.call_args_list  # ty: ignore[unresolved-attribute]
+    ]
+    assert watched == [10, 10, 11]
+    with sqlmodel.Session(engine) as session:
+        assert session.get(database.Term, new_term.id) is not None
+
+
+@pytest.mark.anyio
+async def test_watch_pipeline_without_stored_term_returns(
+    engine: "Engine",
+) -> None:
+    await pipeline.watch_pipeline(engine=engine, polls=1)
+
+
+def test_watch_delay_backs_off_with_jitter() -> None:
+    assert 7.2 <= pipeline._watch_delay(interval=4, failures=1) <= 8.8
+    assert pipeline._watch_delay(
+        interval=4, failures=30
+    ) <= pipeline.WATCH_MAX_BACKOFF * (1 + pipeline.WATCH_JITTER)
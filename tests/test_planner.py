@@ -0,0 +1,142 @@
+from typing import TYPE_CHECKING
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+import sqlmodel
+
+from sejm_scraper import api_client, api_schemas, database, planner, scrape
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine.base import Engine
+
+
+@pytest.fixture
+def _mock_lists(
+    monkeypatch: pytest.MonkeyPatch,
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    monkeypatch.setattr(scrape, "scrape_terms", AsyncMock(return_value=[term]))
+    monkeypatch.setattr(
+        scrape,
+        "scrape_sittings",
+        AsyncMock(
+            return_value=scrape.ScrapedSittingsResult(
+                sittings=[sitting], sitting_days=[]
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        api_client,
+        "fetch_voting_table",
+        AsyncMock(
+            return_value=[
+                api_schemas.VotingTableEntrySchema(
+                    date=voting.date, proceeding=39, votingsNum=2
+                ),
+                api_schemas.VotingTableEntrySchema(
+                    date=voting.date, proceeding=39, votingsNum=1
+                ),
+            ]
+        ),
+    )
+
+
+def _record_progress(engine: "Engine", *units: database.ScrapeProgress) -> None:
+    with sqlmodel.Session(engine) as session:
+        database.bulk_upsert(
+            session=session, model=database.ScrapeProgress, records=units
+        )
+        session.commit()
+
+
+def _progress(
+    unit_id: str,
+    kind: database.UnitKind,
+    parent_id: str | None,
+    *,
+    duration_seconds: float = 0,
+) -> database.ScrapeProgress:
+    return database.ScrapeProgress(
+        id=unit_id,
+        kind=kind,
+        parent_id=parent_id,
+        status=database.UnitStatus.DONE,
+        attempts=1,
+        duration_seconds=duration_seconds,
+        response_bytes=0,
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_lists")
+async def test_plan_scrape_counts_requests_of_empty_database(
+    engine: "Engine",
+) -> None:
+    async with httpx.AsyncClient() as client:
+        plan = await planner.plan_scrape(engine=engine, http_client=client)
+
+    [term_plan] = plan.terms
+    assert term_plan.sittings == [
+        planner.SittingPlan(number=39, votings=3, done_votings=0, requests=4)
+    ]
+    assert term_plan.requests == planner.TERM_LIST_REQUESTS + 4
+    assert plan.requests == 1 + term_plan.requests
+    assert plan.rate_source == planner.RateSource.DEFAULT
+    assert plan.estimated_seconds == (
+        plan.requests / planner.DEFAULT_REQUESTS_PER_SECOND
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_lists")
+async def test_plan_scrape_subtracts_done_votings_and_measures_rate(
+    engine: "Engine",
+    term: database.Term,
+    sitting: database.Sitting,
+) -> None:
+    other_sitting_id = "other"
+    _record_progress(
+        engine,
+        _progress(
+            other_sitting_id,
+            database.UnitKind.SITTING,
+            term.id,
+            duration_seconds=2,
+        ),
+        _progress("done", database.UnitKind.VOTING, sitting.id),
+        _progress("elsewhere", database.UnitKind.VOTING, other_sitting_id),
+    )
+
+    async with httpx.AsyncClient() as client:
+        plan = await planner.plan_scrape(engine=engine, http_client=client)
+
+    assert plan.terms[0].sittings[0].done_votings == 1
+    assert plan.terms[0].sittings[0].requests == 3
+    assert plan.rate_source == planner.RateSource.MEASURED
+    # One sitting and two votings done in two seconds.
+    assert plan.requests_per_second == 1.5
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_mock_lists")
+async def test_plan_scrape_skips_ended_done_term(
+    engine: "Engine",
+    term: database.Term,
+) -> None:
+    ended = term.model_copy(update={"to_date": term.from_date})
+    scrape.scrape_terms.return_value = [ended]  # ty: ignore[unresolved-attribute]
+    _record_progress(engine, _progress(term.id, database.UnitKind.TERM, None))
+
+    async with httpx.AsyncClient() as client:
+        plan = await planner.plan_scrape(
+            engine=engine, http_client=client, requests_per_second=0.5
+        )
+
+    assert plan.terms == [planner.TermPlan(number=10, requests=0)]
+    scrape.scrape_sittings.assert_not_called()  # ty: ignore[unresolved-attribute]
+    assert plan.requests == 1
+    assert plan.estimated_seconds == 2
+    assert plan.rate_source == planner.RateSource.CONFIGURED
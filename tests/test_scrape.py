@@ -339,6 +339,82 @@ async def test_scrape_votes_multi_option(
     assert len(result.voting_options) == 2
 
 
+@pytest.mark.anyio
+@respx.mock
+@pytest.mark.parametrize(
+    "response", [VOTE_DETAIL_RESPONSE, VOTE_DETAIL_MULTI_OPTION_RESPONSE]
+)
+async def test_scrape_votes_stream_matches_buffered(
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+    response: dict[str, object],
+) -> None:
+    respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        return_value=httpx.Response(200, json=response)
+    )
+    async with httpx.AsyncClient() as client:
+        buffered = await scrape.scrape_votes(
+            client=client, term=term, sitting=sitting, voting=voting
+        )
+        streamed = await scrape.scrape_votes(
+            client=client,
+            term=term,
+            sitting=sitting,
+            voting=voting,
+            stream=True,
+        )
+
+    def content(result: scrape.ScrapedVotesResult) -> list[dict[str, object]]:
+        return [
+            record.model_dump(exclude={database.LOADED_AT_COLUMN})
+            for record in [*result.votes, *result.voting_options]
+        ]
+
+    assert content(streamed) == content(buffered)
+
+
+@pytest.mark.anyio
+@respx.mock
+async def test_scrape_votes_stream_passes_batches(
+    term: database.Term,
+    sitting: database.Sitting,
+    voting: database.Voting,
+) -> None:
+    mp_vote = VOTE_DETAIL_RESPONSE["votes"][0]  # ty: ignore[not-subscriptable]  # a list in the fixture
+    respx.get(f"{MOCK_BASE_URL}/term10/votings/39/205").mock(
+        return_value=httpx.Response(
+            200,
+            json={
+                **VOTE_DETAIL_RESPONSE,
+                "votes": [{**mp_vote, "MP": mp} for mp in (1, 2, 3)],
+            },
+        )
+    )
+    batches: list[scrape.ScrapedVotesResult] = []
+
+    async def on_batch(batch: scrape.ScrapedVotesResult) -> None:
+        batches.append(batch)
+
+    async with httpx.AsyncClient() as client:
+        result = await scrape.scrape_votes(
+            client=client,
+            term=term,
+            sitting=sitting,
+            voting=voting,
+            stream=True,
+            on_batch=on_batch,
+            batch_size=2,
+        )
+
+    assert [len(batch.votes) for batch in batches] == [2]
+    assert [o.index for o in batches[0].voting_options] == [1]
+    assert batches[0].voting_options[0].option_label is None
+    assert len(result.votes) == 1
+    assert result.votes[0].id not in {v.id for v in batches[0].votes}
+    assert len(result.voting_options) == 1
+
+
 @pytest.mark.anyio
 @respx.mock
 async def test_scrape_votes_vote_valid_without_list_votes_raises(